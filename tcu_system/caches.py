@@ -0,0 +1,88 @@
+'''
+Caches elegidos con variables de entorno. settings.py arma CACHES con
+caches_from_env().
+
+TCU_CACHE_BACKEND=local (por defecto, memoria de cada proceso), redis o
+memcached. Con varios procesos conviene un cache compartido: así la
+invalidación del usuario y del dashboard, y las sesiones, llegan a todos.
+TCU_CACHE_LOCATION es la URL de Redis o la dirección host:puerto de
+memcached. Las sesiones usan su propio alias para que vaciar 'default' no
+cierre sesiones.
+
+Las sesiones en cache (cached_db) solo se usan con un cache compartido: con
+el local, cerrar sesión en un proceso dejaría la sesión viva en los demás.
+'''
+import os
+
+
+BACKENDS = {
+    'local': 'django.core.cache.backends.locmem.LocMemCache',
+    # Requieren los paquetes redis y pymemcache
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+}
+
+DEFAULT_LOCATIONS = {'redis': 'redis://127.0.0.1:6379', 'memcached': '127.0.0.1:11211'}
+
+# Backends que comparten los datos entre procesos
+SHARED_BACKENDS = {'redis', 'memcached'}
+
+# Motores de sesión que leen del cache
+CACHE_SESSION_ENGINES = {
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+}
+
+# Base de Redis (o prefijo de claves) de cada alias
+ALIASES = {'default': 0, 'sessions': 1}
+
+
+def _backend(env):
+    backend = env.get('TCU_CACHE_BACKEND', 'local').lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"TCU_CACHE_BACKEND debe ser uno de: {', '.join(BACKENDS)}")
+    return backend
+
+
+def cache_is_shared(env=os.environ):
+    '''
+    Indica si el cache elegido es visible para todos los procesos
+    '''
+    return _backend(env) in SHARED_BACKENDS
+
+
+def session_engine_from_env(env=os.environ):
+    '''
+    SESSION_ENGINE: cached_db con un cache compartido, db con el local.
+    TCU_SESSION_ENGINE lo reemplaza, pero no se acepta un motor en cache
+    sobre el cache local.
+    '''
+    shared = cache_is_shared(env)
+    default = 'django.contrib.sessions.backends.cached_db' if shared else 'django.contrib.sessions.backends.db'
+    engine = env.get('TCU_SESSION_ENGINE', default)
+    if engine in CACHE_SESSION_ENGINES and not shared:
+        raise ValueError(
+            f"TCU_SESSION_ENGINE={engine} necesita un cache compartido (TCU_CACHE_BACKEND=redis o memcached)"
+        )
+    return engine
+
+
+def caches_from_env(env=os.environ):
+    '''
+    Alias 'default' y 'sessions' según el perfil del entorno
+    '''
+    backend = _backend(env)
+
+    caches = {}
+    for alias, db in ALIASES.items():
+        config = {'BACKEND': BACKENDS[backend], 'KEY_PREFIX': f'tcu-{alias}'}
+        if backend == 'local':
+            # Cada LOCATION es un almacén distinto dentro del proceso
+            config['LOCATION'] = f'tcu-{alias}'
+            config['OPTIONS'] = {'MAX_ENTRIES': int(env.get('TCU_CACHE_MAX_ENTRIES', 10000))}
+        elif backend == 'redis':
+            config['LOCATION'] = f"{env.get('TCU_CACHE_LOCATION', DEFAULT_LOCATIONS['redis']).rstrip('/')}/{db}"
+        else:
+            config['LOCATION'] = env.get('TCU_CACHE_LOCATION', DEFAULT_LOCATIONS['memcached'])
+        caches[alias] = config
+    return caches
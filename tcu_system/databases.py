@@ -0,0 +1,94 @@
+'''
+Perfiles de base de datos elegidos con variables de entorno. settings.py
+arma DATABASES con database_from_env().
+
+TCU_DB_ENGINE=sqlite (por defecto), mysql o postgresql. Con SQLite conviene
+WAL para que las escrituras de create_request y review_request no bloqueen
+a los lectores. El modo queda guardado en el archivo, así que se activa una
+sola vez con enable_sqlite_wal y no al abrir cada conexión. Con un servidor
+se leen TCU_DB_NAME, TCU_DB_USER, TCU_DB_PASSWORD, TCU_DB_HOST y TCU_DB_PORT.
+'''
+import os
+import sqlite3
+
+
+ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'mysql': 'django.db.backends.mysql',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+DEFAULT_PORTS = {'mysql': '3306', 'postgresql': '5432'}
+
+
+def sqlite_pragmas(env=os.environ):
+    '''
+    PRAGMAs que se ejecutan al abrir cada conexión SQLite
+    '''
+    return {
+        # Con WAL (enable_sqlite_wal), NORMAL solo sincroniza en los checkpoints y sigue siendo seguro ante caídas del proceso
+        'synchronous': env.get('TCU_SQLITE_SYNCHRONOUS', 'NORMAL'),
+        # Milisegundos que un escritor espera el bloqueo antes de fallar con "database is locked"
+        'busy_timeout': int(env.get('TCU_SQLITE_BUSY_TIMEOUT', 5000)),
+        # Negativo: KiB de cache de páginas por conexión
+        'cache_size': -int(env.get('TCU_SQLITE_CACHE_KB', 20000)),
+        'temp_store': 'MEMORY',
+    }
+
+
+def enable_wal(path):
+    '''
+    Pasa el archivo SQLite a modo WAL (los lectores no esperan al escritor:
+    leen la última versión confirmada). Devuelve el modo resultante.
+    '''
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+    finally:
+        connection.close()
+
+
+def sqlite_options(pragmas):
+    return {
+        'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items()),
+        # Las transacciones toman el bloqueo de escritura al empezar: así
+        # esperan con busy_timeout en lugar de fallar al pasar de lector a escritor
+        'transaction_mode': 'IMMEDIATE',
+    }
+
+
+def database_from_env(base_dir, env=os.environ):
+    '''
+    Configuración de la base 'default' según el perfil del entorno
+    '''
+    engine = env.get('TCU_DB_ENGINE', 'sqlite').lower()
+    if engine not in ENGINES:
+        raise ValueError(f"TCU_DB_ENGINE debe ser uno de: {', '.join(ENGINES)}")
+
+    config = {
+        'ENGINE': ENGINES[engine],
+        # Conexiones persistentes solo si se piden: bajo ASGI cada petición
+        # puede correr en otro hilo y Django recomienda dejarlas en 0
+        'CONN_MAX_AGE': int(env.get('TCU_DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+    }
+
+    if engine == 'sqlite':
+        config['NAME'] = env.get('TCU_DB_NAME', str(base_dir / 'db.sqlite3'))
+        config['OPTIONS'] = sqlite_options(sqlite_pragmas(env))
+        return config
+
+    config.update({
+        'NAME': env.get('TCU_DB_NAME', 'tcu_system'),
+        'USER': env.get('TCU_DB_USER', 'root' if engine == 'mysql' else 'postgres'),
+        'PASSWORD': env.get('TCU_DB_PASSWORD', ''),
+        'HOST': env.get('TCU_DB_HOST', 'localhost'),
+        'PORT': env.get('TCU_DB_PORT', DEFAULT_PORTS[engine]),
+    })
+    if engine == 'mysql':
+        config['OPTIONS'] = {
+            'charset': 'utf8mb4',
+            'isolation_level': 'read committed',
+            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+        }
+    return config
@@ -13,6 +13,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 from pathlib import Path
 import os
 
+from .caches import cache_is_shared, caches_from_env, session_engine_from_env
+from .databases import database_from_env
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -47,6 +50,9 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'tcu_system_app.middleware.CatalogMiddleware',
+    'tcu_system_app.middleware.CurrentUserMiddleware',
+    'tcu_system_app.middleware.QueryBudgetMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -74,28 +80,50 @@ WSGI_APPLICATION = 'tcu_system.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Perfil elegido con TCU_DB_ENGINE y las demás variables TCU_DB_* (databases.py)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_from_env(BASE_DIR),
 }
 
-#DATABASES = {
-#    'default': {
-#        'ENGINE': 'django.db.backends.mysql',
-#        'NAME': 'tcu_system',
-#        'USER': 'root',
-#        'PASSWORD': '',
-#        'HOST': 'localhost',
-#        'PORT': '3306',
-#    }
-#}
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# Perfil elegido con TCU_CACHE_BACKEND y TCU_CACHE_LOCATION (caches.py)
+CACHES = caches_from_env()
+# Con el cache local cada proceso tiene el suyo: lo que se invalida en uno
+# no llega a los demás
+CACHE_SHARED = cache_is_shared()
+
+# Sesiones: con un cache compartido se leen del cache y cada cambio se
+# escribe también en la base (cached_db), así sobreviven a un reinicio del
+# cache. Con el cache local se leen de la base. Las vencidas se borran por
+# lotes con clean_sessions.
+SESSION_ENGINE = session_engine_from_env()
+SESSION_CACHE_ALIAS = 'sessions'
+SESSION_CLEANUP_BATCH_SIZE = 1000
 
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+PASSWORD_HASHERS = [
+    'tcu_system_app.hashers.TunablePBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Iteraciones de PBKDF2. Al cambiarlas, cada usuario recibe un hash nuevo
+# la próxima vez que inicia sesión.
+PBKDF2_ITERATIONS = int(os.environ.get('TCU_PBKDF2_ITERATIONS', 1_000_000))
+
+# Pool acotado para verificar contraseñas en el login: hilos de cálculo y
+# verificaciones que pueden esperar antes de responder 503
+LOGIN_HASH_WORKERS = int(os.environ.get('TCU_LOGIN_HASH_WORKERS', os.cpu_count() or 1))
+LOGIN_HASH_QUEUE_LIMIT = int(os.environ.get('TCU_LOGIN_HASH_QUEUE_LIMIT', 16))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -139,6 +167,118 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Segundos que cada proceso usa su copia de los estados y roles (catalog.py)
+# cuando el cache es local y la invalidación no le llega desde otros procesos
+CATALOG_LOCAL_TIMEOUT = 60
+
+# Segundos que el usuario de la sesión (con su rol) permanece en cache. Solo
+# se guarda con un cache compartido (CACHE_SHARED), para que la invalidación
+# al editar o eliminar un usuario llegue a todos los procesos; con el local
+# se lee de la base en cada petición.
+CURRENT_USER_CACHE_TIMEOUT = 300
+
+# Segundos que los datos del dashboard permanecen en cache. Las señales los
+# invalidan al cambiar solicitudes, proyectos o usuarios; el tiempo solo
+# acota lo que hagan las escrituras masivas que no pasan por el ORM.
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# Paginación de solicitudes (list_requests)
+REQUESTS_PAGE_SIZE = 25
+REQUESTS_MAX_PAGE_SIZE = 100
+
+# Paginación del directorio de usuarios (list_users)
+USERS_PAGE_SIZE = 50
+USERS_MAX_PAGE_SIZE = 200
+
+# Solicitudes por envío en la revisión masiva (bulk_review)
+BULK_REVIEW_MAX_REQUESTS = 500
+
+# Rollup de horas por semana y mes (rollup.py). Cada actualización repasa
+# también las solicitudes modificadas en los últimos segundos indicados.
+HOURS_ROLLUP_OVERLAP_SECONDS = 300
+# Rango máximo del reporte de horas (hours_analytics, api_hours)
+HOURS_ANALYTICS_MAX_DAYS = 3 * 366
+
+# API JSON (views/api.py)
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 500
+
+# Vistas asíncronas (views/async_views.py) para home, solicitudes y
+# proyectos. Apagadas por defecto también con ASGI: en benchmark_asgi home
+# fue más lento que la versión síncrona. Con WSGI conviene dejarlo apagado
+# porque cada vista asíncrona necesitaría su propio event loop.
+ASYNC_VIEWS = os.environ.get('TCU_ASYNC_VIEWS', '0') == '1'
+
+# Filas leídas por bloque al exportar solicitudes
+EXPORT_CHUNK_SIZE = 2000
+
+# Subida de adjuntos por partes (views/uploads.py). Las partes se guardan en
+# UPLOAD_TEMP_DIR hasta que el archivo se adjunta a una solicitud; las
+# subidas sin terminar se borran con `manage.py clean_uploads`.
+UPLOAD_MAX_SIZE = 10 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_MAX_PENDING = 20
+UPLOAD_SESSION_TTL_HOURS = 24
+UPLOAD_TEMP_DIR = os.environ.get('TCU_UPLOAD_TEMP_DIR', os.path.join(BASE_DIR, 'upload_tmp'))
+
+# Descarga de adjuntos (views/files.py). Los archivos de MEDIA_ROOT solo se
+# sirven por esa vista, que verifica permisos. Si el servidor web sirve
+# MEDIA_ROOT en una ubicación interna (nginx: `location /protected-media/ {
+# internal; alias .../media/; }`), DOWNLOAD_ACCEL_REDIRECT='/protected-media/'
+# le delega el envío con X-Accel-Redirect.
+DOWNLOAD_ACCEL_REDIRECT = os.environ.get('TCU_DOWNLOAD_ACCEL_REDIRECT', '')
+
+# Miniaturas y vistas previas de adjuntos (previews.py). Se guardan en
+# PREVIEW_ROOT por hash del contenido. Las imágenes necesitan Pillow y los
+# PDF el programa pdftoppm de poppler; sin ellos no hay vista previa.
+# Con PREVIEW_WORKERS = 0 solo se generan con `manage.py generate_previews`.
+PREVIEW_ROOT = os.environ.get('TCU_PREVIEW_ROOT', os.path.join(BASE_DIR, 'previews'))
+PREVIEW_SIZES = {'thumb': 240, 'page': 1024}
+PREVIEW_WORKERS = int(os.environ.get('TCU_PREVIEW_WORKERS', 2))
+PREVIEW_QUEUE_LIMIT = 100
+PREVIEW_PDFTOPPM = 'pdftoppm'
+PREVIEW_TIMEOUT = 30
+
+# Presupuesto de consultas SQL por vista (nombre de URL). QueryBudgetMiddleware
+# registra una advertencia cuando una petición lo supera y los tests lo
+# verifican para cada vista. Incluye la lectura de la sesión y del usuario
+# en la base (lo que se hace con el cache local). Las vistas que escriben
+# tienen un presupuesto por método: el POST cuenta las escrituras, el ledger
+# y los savepoints de las transacciones anidadas.
+QUERY_BUDGET_DEFAULT = 10
+QUERY_BUDGETS = {
+    'login': {'GET': 1, 'POST': 4},
+    'logout': 3,
+    'home': 5,
+    'requests': 3,
+    'create_request': {'GET': 3, 'POST': 15},
+    'export_requests': 3,
+    'review_request': {'GET': 4, 'POST': 18},
+    'bulk_review': {'GET': 3, 'POST': 10},
+    'request_detail': 4,
+    'start_upload': 4,
+    'upload_status': 3,
+    'upload_chunk': 4,
+    'file_preview': 3,
+    'download_file': 3,
+    'list_projects': 3,
+    'create_project': {'GET': 3, 'POST': 6},
+    'edit_project': {'GET': 5, 'POST': 9},
+    'delete_project': {'GET': 4, 'POST': 12},
+    'list_users': 4,
+    'create_user': {'GET': 3, 'POST': 5},
+    'edit_user': {'GET': 6, 'POST': 8},
+    'delete_user': {'GET': 5, 'POST': 13},
+    'api_requests': 4,
+    'api_projects': 4,
+    'api_users': 4,
+    'api_hours': 6,
+    'hours_analytics': 5,
+}
+
+# Cabeceras X-Query-Count, X-Query-Time-Ms y X-Query-Duplicates en cada respuesta
+QUERY_BUDGET_HEADERS = DEBUG
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
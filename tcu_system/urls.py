@@ -25,6 +25,7 @@ urlpatterns = [
 ]
 
 
+# Los adjuntos no se sirven desde MEDIA_URL: se descargan por
+# tcu_system_app.views.files.download_file, que verifica permisos
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
\ No newline at end of file
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Role, Status, Project, User, Request, File
+from . import search
+from .models import Role, Status, Project, User, Request, File, HoursLedger, HoursRollup, UploadSession
 
 
 # Register your models here.
@@ -28,11 +29,39 @@ class UserAdmin(admin.ModelAdmin):
 @admin.register(Request)
 class RequestAdmin(admin.ModelAdmin):
     list_display = ('requestId', 'userId_student', 'projectId', 'statusId', 'hoursRequested', 'date', 'revisionDate')
-    search_fields = ('description',)
+    search_fields = ('description', 'professorComent')
     list_filter = ('statusId', 'projectId')
     autocomplete_fields = ('userId_student', 'projectId', 'statusId')
 
+    def get_search_results(self, request, queryset, search_term):
+        # Con SQLite se busca en el índice FTS5 en lugar de LIKE '%...%'
+        if not search_term or not search.fts_available(queryset):
+            return super().get_search_results(request, queryset, search_term)
+        return search.search_requests(queryset, search_term, ranked=False), False
+
 @admin.register(File)
 class FileAdmin(admin.ModelAdmin):
-    list_display = ('fileId', 'requestId', 'filePath')
-    list_filter = ('requestId',)
+    list_display = ('fileId', 'requestId', 'filePath', 'previewStatus')
+    list_filter = ('requestId', 'previewStatus')
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ('uploadId', 'userId_student', 'fileName', 'receivedBytes', 'totalSize', 'createdAt')
+    list_select_related = ('userId_student',)
+    readonly_fields = ('userId_student', 'fileName', 'contentType', 'totalSize', 'receivedBytes')
+
+
+@admin.register(HoursLedger)
+class HoursLedgerAdmin(admin.ModelAdmin):
+    list_display = ('ledgerId', 'userId_student', 'projectId', 'approvedHours', 'pendingHours', 'rejectedHours')
+    list_select_related = ('userId_student', 'projectId')
+    readonly_fields = ('userId_student', 'projectId', 'approvedHours', 'pendingHours', 'rejectedHours')
+
+
+@admin.register(HoursRollup)
+class HoursRollupAdmin(admin.ModelAdmin):
+    list_display = ('rollupId', 'granularity', 'periodStart', 'projectId', 'statusId', 'hours', 'requests')
+    list_filter = ('granularity', 'statusId')
+    list_select_related = ('projectId', 'statusId')
+    readonly_fields = ('granularity', 'periodStart', 'projectId', 'statusId', 'hours', 'requests')
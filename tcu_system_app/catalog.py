@@ -0,0 +1,151 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Role, Status
+
+
+# Nombres canónicos de los estados y roles (ver create_initial_data)
+PENDING = 'Pendiente'
+ACCEPTED = 'Aceptada'
+REJECTED = 'Rechazada'
+
+STUDENT = 'Estudiante'
+PROFESSOR = 'Profesor'
+ADMIN = 'Admin'
+
+# Versión compartida del catálogo: con un cache compartido, la invalidación
+# hecha por un proceso obliga a los demás a recargar. Se revisa una vez por
+# petición (CatalogMiddleware), no en cada consulta al catálogo.
+VERSION_KEY = 'tcu:catalog:version'
+
+_catalog = None
+
+
+class Catalog:
+    '''
+    Copia en memoria de las tablas Status y Role
+    '''
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.statuses = list(Status.objects.order_by('statusId'))
+        self.roles = list(Role.objects.order_by('roleId'))
+        self.statuses_by_id = {status.statusId: status for status in self.statuses}
+        self.roles_by_id = {role.roleId: role for role in self.roles}
+        self.status_ids = {status.name.lower(): status.statusId for status in self.statuses}
+        self.role_ids = {role.name.lower(): role.roleId for role in self.roles}
+
+    def status_id(self, name):
+        return self.status_ids.get(name.lower())
+
+
+def _get_catalog():
+    global _catalog
+    catalog = _catalog
+    if catalog is None:
+        catalog = _catalog = Catalog(cache.get(VERSION_KEY, 0))
+    return catalog
+
+
+def check_version():
+    '''
+    Descarta el catálogo cargado si otro proceso lo invalidó. Con el cache
+    local la versión no llega a los demás procesos, así que el catálogo se
+    recarga cuando tiene más de CATALOG_LOCAL_TIMEOUT segundos.
+    '''
+    global _catalog
+    catalog = _catalog
+    if catalog is None:
+        return
+    if settings.CACHE_SHARED:
+        stale = cache.get(VERSION_KEY, 0) != catalog.version
+    else:
+        stale = time.monotonic() - catalog.loaded_at > settings.CATALOG_LOCAL_TIMEOUT
+    if stale:
+        _catalog = None
+
+
+def current():
+    '''
+    Catálogo cargado; lo carga si hace falta
+    '''
+    return _get_catalog()
+
+
+async def aload():
+    '''
+    current() para las vistas asíncronas: la carga corre en un hilo. Las
+    vistas usan el catálogo devuelto en lugar de las funciones de este
+    módulo, que consultarían la base en el event loop si otro hilo lo
+    invalida entretanto.
+    '''
+    return await sync_to_async(_get_catalog)()
+
+
+def invalidate():
+    '''
+    Descarta el catálogo cargado; se llama al editar estados o roles
+    '''
+    global _catalog
+    _catalog = None
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def version():
+    '''
+    Versión del catálogo cargado; cambia cada vez que se invalida
+    '''
+    return _get_catalog().version
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def statuses():
+    return _get_catalog().statuses
+
+
+def roles():
+    return _get_catalog().roles
+
+
+def status(status_id):
+    '''
+    Estado con ese ID o None si no existe
+    '''
+    return _get_catalog().statuses_by_id.get(_to_int(status_id))
+
+
+def role(role_id):
+    '''
+    Rol con ese ID o None si no existe
+    '''
+    return _get_catalog().roles_by_id.get(_to_int(role_id))
+
+
+def status_id(name):
+    '''
+    ID del estado con ese nombre (sin distinguir mayúsculas) o None
+    '''
+    return _get_catalog().status_id(name)
+
+
+def role_id(name):
+    '''
+    ID del rol con ese nombre (sin distinguir mayúsculas) o None
+    '''
+    return _get_catalog().role_ids.get(name.lower())
+
+
+def role_ids(*names):
+    return [rid for rid in (role_id(name) for name in names) if rid is not None]
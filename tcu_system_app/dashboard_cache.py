@@ -0,0 +1,106 @@
+'''
+Cache de los datos del dashboard (contadores, horas y solicitudes
+recientes) por alcance: cada estudiante, cada profesor (sus proyectos) y
+uno compartido para los administradores. signals.py borra las entradas
+afectadas cuando se guarda o elimina una solicitud, un proyecto o un
+usuario. La clave incluye la versión del catálogo, así que editar estados o
+roles invalida todo. Las escrituras masivas que no disparan señales
+(import_data, generate_data, update()) quedan cubiertas por
+DASHBOARD_CACHE_TIMEOUT o por invalidate() explícito.
+
+Los contadores de aciertos y fallos se guardan en el mismo cache, así que
+dashboard_cache_stats solo puede leerlos con un cache compartido (redis o
+memcached); con el cache local cada proceso tiene los suyos.
+'''
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import catalog
+
+
+KEY_PREFIX = 'tcu:dashboard'
+HITS_KEY = f'{KEY_PREFIX}:hits'
+MISSES_KEY = f'{KEY_PREFIX}:misses'
+
+
+def _key(scope, version=None):
+    if version is None:
+        version = catalog.version()
+    return f'{KEY_PREFIX}:{version}:{scope}'
+
+
+def scope_key(user, user_role_lower, version=None):
+    '''
+    Clave del dashboard del usuario; `version` es la del catálogo ya cargado
+    (las vistas asíncronas la pasan para no tocar el catálogo en el event loop)
+    '''
+    if user_role_lower == 'estudiante':
+        return _key(f'student:{user.pk}', version)
+    if user_role_lower == 'profesor':
+        return _key(f'professor:{user.pk}', version)
+    return _key('all', version)
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+async def _acount(key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, None)
+        await cache.aincr(key)
+
+
+def load(key):
+    '''
+    Datos guardados o None; cuenta el acierto o fallo
+    '''
+    data = cache.get(key)
+    _count(MISSES_KEY if data is None else HITS_KEY)
+    return data
+
+
+async def aload(key):
+    data = await cache.aget(key)
+    await _acount(MISSES_KEY if data is None else HITS_KEY)
+    return data
+
+
+def store(key, data):
+    cache.set(key, data, settings.DASHBOARD_CACHE_TIMEOUT)
+
+
+async def astore(key, data):
+    await cache.aset(key, data, settings.DASHBOARD_CACHE_TIMEOUT)
+
+
+def invalidate(student_ids=(), professor_ids=()):
+    '''
+    Borra los dashboards de esos estudiantes y profesores y el de los
+    administradores. Se borran ya y otra vez al confirmar la transacción,
+    para que una petición concurrente no guarde los datos de antes del
+    commit (el ledger se actualiza en la misma transacción).
+    '''
+    keys = [_key(f'student:{pk}') for pk in student_ids if pk is not None]
+    keys += [_key(f'professor:{pk}') for pk in professor_ids if pk is not None]
+    keys.append(_key('all'))
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def stats():
+    values = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits, misses = values.get(HITS_KEY, 0), values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
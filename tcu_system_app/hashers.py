@@ -0,0 +1,77 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password, verify_password
+
+
+class TunablePBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    '''
+    PBKDF2-SHA256 con el número de iteraciones tomado de PBKDF2_ITERATIONS.
+    Usa el mismo algoritmo que el hasher de Django, así que los hashes
+    existentes siguen siendo válidos y se actualizan al iniciar sesión.
+    '''
+    @property
+    def iterations(self):
+        return settings.PBKDF2_ITERATIONS
+
+
+class PasswordPoolFull(Exception):
+    '''
+    No hay lugar en el pool ni en su cola para otra verificación
+    '''
+
+
+class BoundedPasswordPool:
+    '''
+    Pool de hilos para calcular hashes fuera del hilo de la petición.
+    hashlib libera el GIL durante PBKDF2, así que los hilos corren en paralelo.
+    Admite como máximo `workers` tareas en ejecución más `queue_limit` en espera.
+    '''
+    def __init__(self, workers, queue_limit):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    async def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolFull()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # El lugar se libera cuando termina el cálculo, aunque el cliente se desconecte
+        future.add_done_callback(lambda _: self._slots.release())
+        return await asyncio.wrap_future(future)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_password_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BoundedPasswordPool(settings.LOGIN_HASH_WORKERS, settings.LOGIN_HASH_QUEUE_LIMIT)
+    return _pool
+
+
+def _verify_and_rehash(password, encoded):
+    '''
+    Verifica la contraseña y, si el hash usa parámetros viejos, calcula el nuevo
+    en el mismo hilo. Devuelve (es_correcta, hash_nuevo_o_None).
+    '''
+    is_correct, must_update = verify_password(password, encoded)
+    if is_correct and must_update:
+        return True, make_password(password)
+    return is_correct, None
+
+
+async def acheck_password(password, encoded):
+    '''
+    Verificación asíncrona en el pool acotado. Lanza PasswordPoolFull si está lleno.
+    '''
+    return await get_password_pool().run(_verify_and_rehash, password, encoded)
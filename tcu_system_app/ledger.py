@@ -0,0 +1,177 @@
+from collections import defaultdict
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import DEFERRED, F, Sum
+
+from . import catalog
+from .models import HoursLedger, Request
+
+
+def status_fields():
+    '''
+    Columna del ledger que acumula las horas de cada estado, por ID de estado
+    '''
+    return {
+        catalog.status_id(catalog.PENDING): 'pendingHours',
+        catalog.status_id(catalog.ACCEPTED): 'approvedHours',
+        catalog.status_id(catalog.REJECTED): 'rejectedHours',
+    }
+
+
+def _add_hours(owner, hours_by_field, using=DEFAULT_DB_ALIAS):
+    '''
+    Suma las horas de `hours_by_field` a las columnas de la fila del dueño
+    (estudiante o proyecto), creándola si todavía no existe
+    '''
+    rows = HoursLedger.objects.using(using)
+    changes = {field: F(field) + hours for field, hours in hours_by_field.items()}
+    updated = rows.filter(**owner).update(**changes)
+    if updated:
+        return
+    try:
+        with transaction.atomic(using=using):
+            rows.create(**owner, **hours_by_field)
+    except IntegrityError:
+        # Otra transacción creó la fila primero
+        rows.filter(**owner).update(**changes)
+
+
+def apply_delta(student_id, project_id, status_id, hours, using=DEFAULT_DB_ALIAS):
+    '''
+    Aplica una variación de horas en un estado para el estudiante y el proyecto
+    '''
+    field = status_fields().get(status_id) if status_id is not None else None
+    if field is None or not hours:
+        return
+    if student_id is not None:
+        _add_hours({'userId_student_id': student_id}, {field: hours}, using)
+    if project_id is not None:
+        _add_hours({'projectId_id': project_id}, {field: hours}, using)
+
+
+# Campos de la solicitud que deciden dónde cuentan sus horas, en el orden
+# de los argumentos de apply_delta
+TRACKED_FIELDS = ('userId_student_id', 'projectId_id', 'statusId_id', 'hoursRequested')
+
+
+def tracked_values(request_obj):
+    '''
+    Valores de TRACKED_FIELDS cargados en la instancia, o None si alguno se
+    difirió con only()/defer()
+    '''
+    values = tuple(request_obj.__dict__.get(field, DEFERRED) for field in TRACKED_FIELDS)
+    return None if DEFERRED in values else values
+
+
+def stored_values(request_id, lock=False, using=DEFAULT_DB_ALIAS):
+    '''
+    Valores de TRACKED_FIELDS guardados en la base; con `lock` la fila queda
+    bloqueada hasta el final de la transacción
+    '''
+    queryset = Request.objects.using(using)
+    if lock:
+        queryset = queryset.select_for_update()
+    return queryset.values_list(*TRACKED_FIELDS).filter(pk=request_id).first()
+
+
+def record_change(old_values, new_values, using=DEFAULT_DB_ALIAS):
+    '''
+    Mueve las horas de una solicitud de sus valores anteriores a los actuales
+    (tuplas de TRACKED_FIELDS; None para una solicitud nueva o eliminada).
+    Debe llamarse dentro de la misma transacción que guarda el cambio.
+    '''
+    if old_values == new_values:
+        return
+    if old_values is not None:
+        student_id, project_id, status_id, hours = old_values
+        apply_delta(student_id, project_id, status_id, -hours, using)
+    if new_values is not None:
+        apply_delta(*new_values, using=using)
+
+
+def record_bulk_status_change(rows, new_status_id):
+    '''
+    record_change para varias solicitudes cuyo estado cambió con un solo
+    UPDATE. `rows` trae userId_student_id, projectId_id, statusId_id y
+    hoursRequested de cada solicitud antes del cambio. Las horas se agrupan
+    por dueño: una actualización por estudiante y por proyecto, no por
+    solicitud.
+    '''
+    fields = status_fields()
+    new_field = fields.get(new_status_id)
+    deltas = defaultdict(lambda: defaultdict(int))
+    for row in rows:
+        old_field = fields.get(row['statusId_id'])
+        if old_field == new_field:
+            continue
+        hours = row['hoursRequested']
+        for owner in (('userId_student_id', row['userId_student_id']), ('projectId_id', row['projectId_id'])):
+            if owner[1] is None:
+                continue
+            if old_field:
+                deltas[owner][old_field] -= hours
+            if new_field:
+                deltas[owner][new_field] += hours
+
+    for (owner_field, owner_id), hours_by_field in deltas.items():
+        hours_by_field = {field: hours for field, hours in hours_by_field.items() if hours}
+        if hours_by_field:
+            _add_hours({owner_field: owner_id}, hours_by_field)
+
+
+def rebuild_ledger():
+    '''
+    Recalcula el ledger completo a partir de la tabla de solicitudes
+    '''
+    fields = status_fields()
+    rows = {}
+    for owner_field in ('userId_student', 'projectId'):
+        totals = (
+            Request.objects.filter(**{f'{owner_field}__isnull': False}, statusId__in=fields)
+            .values(owner_field, 'statusId')
+            .annotate(hours=Sum('hoursRequested'))
+            .order_by()
+        )
+        for total in totals:
+            key = (f'{owner_field}_id', total[owner_field])
+            row = rows.setdefault(key, HoursLedger(**{key[0]: key[1]}))
+            setattr(row, fields[total['statusId']], total['hours'])
+
+    with transaction.atomic():
+        HoursLedger.objects.all().delete()
+        HoursLedger.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
+
+
+def student_hours(user):
+    '''
+    Fila del ledger del estudiante (o una vacía si todavía no tiene horas)
+    '''
+    return HoursLedger.objects.filter(userId_student=user).first() or HoursLedger(userId_student=user)
+
+
+async def astudent_hours(user):
+    return await HoursLedger.objects.filter(userId_student=user).afirst() or HoursLedger(userId_student=user)
+
+
+def _project_totals(**filters):
+    return HoursLedger.objects.filter(projectId__isnull=False, **filters), {
+        'approvedHours': Sum('approvedHours'),
+        'pendingHours': Sum('pendingHours'),
+        'rejectedHours': Sum('rejectedHours'),
+    }
+
+
+def project_hours(**filters):
+    '''
+    Totales del ledger sumados sobre las filas de proyecto que cumplen `filters`
+    '''
+    rows, totals = _project_totals(**filters)
+    totals = rows.aggregate(**totals)
+    return HoursLedger(**{field: value or 0 for field, value in totals.items()})
+
+
+async def aproject_hours(**filters):
+    rows, totals = _project_totals(**filters)
+    totals = await rows.aaggregate(**totals)
+    return HoursLedger(**{field: value or 0 for field, value in totals.items()})
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+
+from tcu_system_app import catalog
+from tcu_system_app.models import Request, User
+from .benchmark_views import percentile
+
+
+# Vistas que tienen versión asíncrona (views/async_views.py)
+URL_NAMES = ['home', 'requests', 'request_detail', 'list_projects']
+
+
+class Command(BaseCommand):
+    help = ('Compara peticiones por segundo de las vistas de lectura servidas por la ruta WSGI '
+            '(vistas síncronas en hilos) y por la ruta ASGI (vistas asíncronas) con carga concurrente')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=20, help='Peticiones simultáneas')
+        parser.add_argument('--requests', type=int, default=400, help='Peticiones por vista y modo')
+        parser.add_argument('--urls', nargs='+', default=URL_NAMES, help='Nombres de URL a medir')
+        parser.add_argument('--email', help='Usuario con el que se navega (por defecto el primer administrador)')
+        parser.add_argument('--output', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--mode', choices=['wsgi', 'asgi'], help='Uso interno: mide un solo modo')
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            # Proceso hijo: ASYNC_VIEWS ya quedó fijado por la variable de entorno
+            results = self.run_mode(options)
+            self.stdout.write(json.dumps(results))
+            return
+
+        report = {'concurrency': options['concurrency'], 'requests': options['requests'], 'results': {}}
+        for mode in ['wsgi', 'asgi']:
+            report['results'][mode] = self.spawn(mode, options)
+
+        self.stdout.write(f"{'URL':<16} {'WSGI req/s':>11} {'ASGI req/s':>11} {'ASGI p95 ms':>12} {'cambio':>8}")
+        for name in options['urls']:
+            wsgi, asgi = report['results']['wsgi'].get(name), report['results']['asgi'].get(name)
+            if not wsgi or not asgi:
+                continue
+            if wsgi['statuses'] != [200] or asgi['statuses'] != [200]:
+                self.stderr.write(self.style.WARNING(
+                    f"{name}: respuestas {wsgi['statuses']} (WSGI) y {asgi['statuses']} (ASGI)"
+                ))
+            change = (asgi['rps'] - wsgi['rps']) / wsgi['rps'] * 100 if wsgi['rps'] else 0
+            self.stdout.write(
+                f"{name:<16} {wsgi['rps']:>11.1f} {asgi['rps']:>11.1f} {asgi['p95_ms']:>12.1f} {change:>+7.1f}%"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def spawn(self, mode, options):
+        '''
+        Cada modo corre en su propio proceso porque urls.py elige las vistas
+        al importarse
+        '''
+        env = dict(os.environ, TCU_ASYNC_VIEWS='1' if mode == 'asgi' else '0')
+        command = [
+            sys.executable, str(settings.BASE_DIR / 'manage.py'), 'benchmark_asgi', '--mode', mode,
+            '--concurrency', str(options['concurrency']), '--requests', str(options['requests']),
+            '--urls', *options['urls'],
+        ]
+        if options['email']:
+            command += ['--email', options['email']]
+        self.stderr.write(f"Midiendo {mode.upper()}...")
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(f"Falló la medición {mode}:\n{completed.stderr}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+    # Proceso hijo
+
+    def run_mode(self, options):
+        if (options['mode'] == 'asgi') != settings.ASYNC_VIEWS:
+            raise CommandError("TCU_ASYNC_VIEWS no coincide con --mode")
+
+        user = self.pick_user(options['email'])
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session['user_id'] = user.userId
+        session.create()
+        cookie = {settings.SESSION_COOKIE_NAME: session.session_key}
+
+        results = {}
+        for name in options['urls']:
+            path = self.path_for(name, user)
+            # Los clientes de prueba siempre envían el host "testserver"
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                if options['mode'] == 'wsgi':
+                    timings, elapsed, statuses = self.run_wsgi(path, cookie, options)
+                else:
+                    timings, elapsed, statuses = asyncio.run(self.run_asgi(path, cookie, options))
+            results[name] = {
+                'path': path,
+                'rps': round(len(timings) / elapsed, 1),
+                'p50_ms': round(percentile(timings, 50), 2),
+                'p95_ms': round(percentile(timings, 95), 2),
+                'p99_ms': round(percentile(timings, 99), 2),
+                'statuses': sorted(statuses),
+            }
+        session.delete()
+        return results
+
+    def pick_user(self, email):
+        users = User.objects.select_related('roleId')
+        if email:
+            user = users.filter(email=email).first()
+        else:
+            user = users.filter(roleId=catalog.role_id(catalog.ADMIN)).order_by('userId').first()
+        if user is None:
+            raise CommandError("No se encontró el usuario para la medición")
+        return user
+
+    def path_for(self, name, user):
+        if name == 'request_detail':
+            request_id = Request.objects.visible_to(user).values_list('requestId', flat=True).first()
+            if request_id is None:
+                raise CommandError("El usuario no tiene solicitudes visibles")
+            return reverse(name, args=[request_id])
+        return reverse(name)
+
+    def run_wsgi(self, path, cookie, options):
+        '''
+        Ruta WSGI: un hilo por petición simultánea, como un servidor con hilos
+        '''
+        def worker(count):
+            client = Client()
+            client.cookies.load(cookie)
+            timings, statuses = [], set()
+            for _ in range(count):
+                started = time.perf_counter()
+                response = client.get(path)
+                timings.append((time.perf_counter() - started) * 1000)
+                statuses.add(response.status_code)
+            return timings, statuses
+
+        counts = self.split(options['requests'], options['concurrency'])
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(counts)) as executor:
+            parts = list(executor.map(worker, counts))
+        elapsed = time.perf_counter() - started
+        return [t for timings, _ in parts for t in timings], elapsed, set().union(*(s for _, s in parts))
+
+    async def run_asgi(self, path, cookie, options):
+        '''
+        Ruta ASGI: tareas en un solo event loop; cada petición tiene su propio
+        hilo para el código síncrono, como en el ASGIHandler
+        '''
+        async def worker(count):
+            client = AsyncClient()
+            client.cookies.load(cookie)
+            timings, statuses = [], set()
+            for _ in range(count):
+                async with ThreadSensitiveContext():
+                    started = time.perf_counter()
+                    response = await client.get(path)
+                    timings.append((time.perf_counter() - started) * 1000)
+                statuses.add(response.status_code)
+            return timings, statuses
+
+        counts = self.split(options['requests'], options['concurrency'])
+        started = time.perf_counter()
+        parts = await asyncio.gather(*(worker(count) for count in counts))
+        elapsed = time.perf_counter() - started
+        return [t for timings, _ in parts for t in timings], elapsed, set().union(*(s for _, s in parts))
+
+    def split(self, total, workers):
+        workers = max(1, min(workers, total))
+        return [total // workers + (1 if i < total % workers else 0) for i in range(workers)]
@@ -0,0 +1,187 @@
+import json
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.models import Count, F
+
+from tcu_system import databases
+from tcu_system_app import catalog
+from tcu_system_app.models import HoursLedger, Request, User
+from .benchmark_views import percentile
+
+
+# 'sin-ajustes': SQLite como venía configurado (journal de rollback,
+# transacciones diferidas y una conexión nueva por petición). 'wal': el
+# archivo en modo WAL (enable_sqlite_wal) con el perfil de databases.py y
+# conexiones persistentes.
+PROFILES = ['sin-ajustes', 'wal']
+
+
+class Command(BaseCommand):
+    help = ('Mide escrituras (crear y revisar solicitudes) y lecturas (listado y contadores) '
+            'simultáneas sobre una copia de la base SQLite con cada perfil de conexión')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4, help='Hilos que escriben')
+        parser.add_argument('--readers', type=int, default=8, help='Hilos que leen')
+        parser.add_argument('--duration', type=float, default=10, help='Segundos por perfil')
+        parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=PROFILES)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Archivo JSON donde guardar los resultados')
+
+    def handle(self, *args, **options):
+        source = connections[DEFAULT_DB_ALIAS].settings_dict
+        if source['ENGINE'] != databases.ENGINES['sqlite']:
+            raise CommandError("La comparación de perfiles solo aplica a SQLite (TCU_DB_ENGINE=sqlite)")
+
+        self.students = list(
+            User.objects.filter(roleId=catalog.role_id(catalog.STUDENT), projectId__isnull=False)
+            .values_list('userId', 'projectId')
+        )
+        if not self.students:
+            raise CommandError("No hay estudiantes con proyecto; genere datos con generate_data")
+
+        report = {
+            'writers': options['writers'], 'readers': options['readers'],
+            'duration': options['duration'], 'results': {},
+        }
+        temp_dir = tempfile.mkdtemp(prefix='tcu-bench-')
+        try:
+            for profile in options['profiles']:
+                path = os.path.join(temp_dir, f'{profile}.sqlite3')
+                self.copy_database(source['NAME'], path, wal=profile == 'wal')
+                self.stderr.write(f"Midiendo {profile}...")
+                report['results'][profile] = self.run_profile(profile, path, options)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.stdout.write(
+            f"{'Perfil':<12} {'escr/s':>8} {'lect/s':>8} {'escr p95 ms':>12} {'lect p95 ms':>12} {'bloqueos':>9}"
+        )
+        for profile, result in report['results'].items():
+            self.stdout.write(
+                f"{profile:<12} {result['writes_per_s']:>8.1f} {result['reads_per_s']:>8.1f} "
+                f"{result['write_p95_ms'] or 0:>12.1f} {result['read_p95_ms'] or 0:>12.1f} {result['locked_errors']:>9}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def copy_database(self, source, target, wal):
+        '''
+        Copia consistente aunque haya otras conexiones escribiendo; la copia
+        queda con journal de rollback o en modo WAL según el perfil
+        '''
+        with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+            src.backup(dst)
+            dst.execute('PRAGMA journal_mode=DELETE')
+        if wal:
+            databases.enable_wal(target)
+
+    def profile_settings(self, profile, path):
+        if profile == 'wal':
+            config = {
+                'ENGINE': databases.ENGINES['sqlite'], 'NAME': path, 'CONN_MAX_AGE': 60,
+                'OPTIONS': databases.sqlite_options(databases.sqlite_pragmas()),
+            }
+        else:
+            config = {'ENGINE': databases.ENGINES['sqlite'], 'NAME': path, 'CONN_MAX_AGE': 0}
+        return connections.configure_settings({DEFAULT_DB_ALIAS: config})[DEFAULT_DB_ALIAS]
+
+    def run_profile(self, profile, path, options):
+        alias = f'benchmark_{profile}'
+        connections.settings[alias] = self.profile_settings(profile, path)
+        persistent = connections.settings[alias]['CONN_MAX_AGE'] != 0
+
+        pending = catalog.status_id(catalog.PENDING)
+        accepted = catalog.status_id(catalog.ACCEPTED)
+        review_ids = list(
+            Request.objects.using(alias).filter(statusId=pending).values_list('requestId', flat=True)[:5000]
+        )
+        connections[alias].close()
+
+        deadline = time.perf_counter() + options['duration']
+        review_lock = threading.Lock()
+
+        def write(rng):
+            student_id, project_id = rng.choice(self.students)
+            with review_lock:
+                review_id = review_ids.pop() if review_ids and rng.random() < 0.5 else None
+            with transaction.atomic(using=alias):
+                if review_id is None:
+                    # create_request: solicitud nueva; signals.update_ledger la
+                    # registra en el ledger de la misma base
+                    Request.objects.using(alias).create(
+                        userId_student_id=student_id, projectId_id=project_id, statusId_id=pending,
+                        hoursRequested=rng.randint(1, 8), description='Carga concurrente',
+                        date='2025-06-01', professorComent='', revisionDate=None,
+                    )
+                else:
+                    # review_request: cambio de estado y movimiento de horas
+                    Request.objects.using(alias).filter(pk=review_id).update(statusId=accepted)
+                    HoursLedger.objects.using(alias).filter(userId_student_id=student_id).update(
+                        pendingHours=F('pendingHours') - 1, approvedHours=F('approvedHours') + 1
+                    )
+
+        def read(rng):
+            student_id, project_id = rng.choice(self.students)
+            # list_requests y los contadores del dashboard
+            list(
+                Request.objects.using(alias).filter(userId_student_id=student_id)
+                .select_related('projectId', 'statusId').order_by('-date', '-requestId')[:25]
+            )
+            list(
+                Request.objects.using(alias).filter(projectId_id=project_id)
+                .values('statusId').annotate(total=Count('pk')).order_by()
+            )
+
+        def worker(operation, seed):
+            rng = random.Random(seed)
+            timings, locked = [], 0
+            try:
+                while time.perf_counter() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        operation(rng)
+                    except OperationalError as e:
+                        if 'locked' not in str(e):
+                            raise
+                        locked += 1
+                    else:
+                        timings.append((time.perf_counter() - started) * 1000)
+                    if not persistent:
+                        # Como al terminar cada petición con CONN_MAX_AGE=0
+                        connections[alias].close()
+            finally:
+                connections[alias].close()
+            return timings, locked
+
+        jobs = [(write, options['seed'] + i) for i in range(options['writers'])]
+        jobs += [(read, options['seed'] + 1000 + i) for i in range(options['readers'])]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+            parts = list(executor.map(lambda job: worker(*job), jobs))
+        elapsed = time.perf_counter() - started
+        del connections.settings[alias]
+
+        writes = [t for timings, _ in parts[:options['writers']] for t in timings]
+        reads = [t for timings, _ in parts[options['writers']:] for t in timings]
+        return {
+            'writes_per_s': round(len(writes) / elapsed, 1),
+            'reads_per_s': round(len(reads) / elapsed, 1),
+            'write_p50_ms': round(percentile(writes, 50), 2) if writes else None,
+            'write_p95_ms': round(percentile(writes, 95), 2) if writes else None,
+            'read_p50_ms': round(percentile(reads, 50), 2) if reads else None,
+            'read_p95_ms': round(percentile(reads, 95), 2) if reads else None,
+            'locked_errors': sum(locked for _, locked in parts),
+        }
@@ -0,0 +1,106 @@
+import json
+import time
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tcu_system_app import catalog
+from tcu_system_app.models import User
+from .benchmark_views import percentile
+
+
+# 'db': sesión leída de la base en cada petición (valor por defecto de
+# Django). 'cached_db': leída del cache, escrita en ambos (settings.py)
+PROFILES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+}
+
+
+class Command(BaseCommand):
+    help = ('Cuenta las consultas a la tabla de sesiones por petición (páginas y un '
+            'mensaje con redirección) con cada motor de sesiones')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Recorridos medidos por perfil')
+        parser.add_argument('--profiles', nargs='+', choices=list(PROFILES), default=list(PROFILES))
+        parser.add_argument('--output', help='Archivo JSON donde guardar los resultados')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations debe ser al menos 1")
+        user = User.objects.filter(roleId=catalog.role_id(catalog.ADMIN)).order_by('userId').first()
+        if user is None:
+            raise CommandError("Se necesita un administrador; ejecute create_initial_data")
+
+        results = {}
+        for profile in options['profiles']:
+            self.stderr.write(f"Midiendo {profile}...")
+            with override_settings(SESSION_ENGINE=PROFILES[profile]):
+                results[profile] = self.run_profile(user, options['iterations'])
+
+        self.stdout.write(
+            f"{'Perfil':<10} {'Paso':<20} {'sesión/pet':>10} {'consultas/pet':>13} {'p50 ms':>8}"
+        )
+        for profile, steps in results.items():
+            for step, result in steps.items():
+                self.stdout.write(
+                    f"{profile:<10} {step:<20} {result['session_queries']:>10.2f} "
+                    f"{result['queries']:>13.2f} {result['p50_ms']:>8.2f}"
+                )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def steps(self):
+        '''
+        (nombre, método, ruta, datos) de un recorrido: dos páginas, un
+        formulario que deja un mensaje y la página que lo muestra
+        '''
+        return [
+            ('home', 'get', reverse('home'), None),
+            ('requests', 'get', reverse('requests'), None),
+            ('mensaje (POST)', 'post', reverse('bulk_review'), {'requests': []}),
+            ('mensaje (GET)', 'get', reverse('bulk_review'), None),
+        ]
+
+    def run_profile(self, user, iterations):
+        hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*', '') and not host.startswith('.')]
+        client = Client(HTTP_HOST=hosts[0] if hosts else 'localhost')
+        session = client.session
+        session['user_id'] = user.userId
+        session.save()
+        session_table = f'"{Session._meta.db_table}"'
+
+        totals = {name: {'session': 0, 'queries': 0, 'timings': []} for name, *_ in self.steps()}
+        try:
+            for iteration in range(iterations + 1):
+                for name, method, path, data in self.steps():
+                    with CaptureQueriesContext(connection) as captured:
+                        started = time.perf_counter()
+                        getattr(client, method)(path, data)
+                        elapsed = (time.perf_counter() - started) * 1000
+                    if iteration == 0:
+                        # Primera vuelta sin medir: cache del usuario y del catálogo
+                        continue
+                    totals[name]['session'] += sum(session_table in q['sql'] for q in captured)
+                    totals[name]['queries'] += len(captured)
+                    totals[name]['timings'].append(elapsed)
+        finally:
+            client.session.delete()
+
+        return {
+            name: {
+                'session_queries': total['session'] / iterations,
+                'queries': total['queries'] / iterations,
+                'p50_ms': round(percentile(total['timings'], 50), 3),
+            }
+            for name, total in totals.items()
+        }
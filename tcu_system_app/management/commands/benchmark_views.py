@@ -0,0 +1,269 @@
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tcu_system_app import catalog, urls
+from tcu_system_app.models import File, Project, Request, UploadSession, User
+
+
+# Rutas que no se pueden medir con un GET: solo aceptan POST o cierran la sesión
+EXCLUDED_URLS = {'logout', 'delete_project', 'delete_user', 'start_upload', 'upload_chunk'}
+
+ROLES = [catalog.STUDENT, catalog.PROFESSOR, catalog.ADMIN]
+
+# Métricas comparadas con --compare; en todas, menor es mejor
+COMPARED_METRICS = ['p50_ms', 'p95_ms', 'queries', 'peak_kb']
+
+
+def percentile(values, pct):
+    '''
+    Percentil por interpolación lineal (como numpy.percentile)
+    '''
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def _consume(response):
+    '''
+    Lee el cuerpo completo de la respuesta, también cuando es streaming
+    '''
+    if getattr(response, 'streaming', False):
+        return sum(len(chunk) for chunk in response.streaming_content)
+    return len(response.content)
+
+
+class Command(BaseCommand):
+    help = ('Mide cada URL de la aplicación para cada rol: latencia (percentiles), '
+            'consultas SQL y pico de memoria, en formato JSON')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Peticiones medidas por URL y rol')
+        parser.add_argument('--warmup', type=int, default=2, help='Peticiones previas sin medir')
+        parser.add_argument('--roles', nargs='+', default=ROLES, help='Roles a medir')
+        parser.add_argument('--urls', nargs='+', help='Nombres de URL a medir (por defecto todas)')
+        parser.add_argument('--output', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--compare', help='Resultados JSON de una corrida anterior para comparar')
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=10.0,
+            help='Porcentaje de empeoramiento que se marca como regresión en --compare'
+        )
+        parser.add_argument(
+            '--fail-on-regression',
+            action='store_true',
+            help='Termina con error si --compare encuentra regresiones'
+        )
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations debe ser al menos 1")
+
+        # Los 403/404 esperados de algunos roles no deben ensuciar la salida
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+
+        results = []
+        for role_name in options['roles']:
+            user = self.pick_user(role_name)
+            if user is None:
+                self.stderr.write(f"Sin usuarios con rol {role_name}; se omite")
+                continue
+            client = self.client_for(user)
+            for name, path in self.urls_for(user, options['urls']):
+                result = self.measure(client, path, options['iterations'], options['warmup'])
+                result.update({'url': name, 'path': path, 'role': role_name, 'userId': user.userId})
+                results.append(result)
+                self.stderr.write(
+                    f"{role_name:<11} {name:<16} {result['status']} "
+                    f"p50={result['p50_ms']:.1f}ms p95={result['p95_ms']:.1f}ms "
+                    f"queries={result['queries']} peak={result['peak_kb']:.0f}KB"
+                )
+
+        report = {'meta': self.meta(options), 'results': results}
+        output = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(output)
+            self.stderr.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+        if options['compare']:
+            regressions = self.compare(options['compare'], results, options['threshold'])
+            if regressions and options['fail_on_regression']:
+                raise CommandError(f"{regressions} regresiones por encima de {options['threshold']}%")
+
+    # Preparación
+
+    def pick_user(self, role_name):
+        '''
+        Usuario representativo del rol; para estudiantes y profesores el de
+        más solicitudes, que es el peor caso de las vistas
+        '''
+        role_id = catalog.role_id(role_name)
+        if role_id is None:
+            return None
+        users = User.objects.filter(roleId=role_id).order_by('userId')
+        load = {
+            catalog.STUDENT.lower(): Count('student_requests'),
+            catalog.PROFESSOR.lower(): Count('project__request'),
+        }.get(role_name.lower())
+        if load is not None:
+            users = users.annotate(load=load).order_by('-load', 'userId')
+        return users.first()
+
+    def client_for(self, user):
+        # El host debe estar en ALLOWED_HOSTS; con DEBUG y la lista vacía Django acepta localhost
+        hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('*', '') and not host.startswith('.')]
+        client = Client(HTTP_HOST=hosts[0] if hosts else 'localhost')
+        session = client.session
+        session['user_id'] = user.userId
+        session.save()
+        return client
+
+    def urls_for(self, user, only):
+        '''
+        (nombre, ruta) de cada URL de la aplicación, con parámetros tomados de
+        datos que el usuario puede ver
+        '''
+        user_role = user.roleId.name.lower()
+        visible = Request.objects.visible_to(user)
+        projects = Project.objects.order_by('projectId')
+        if user_role == catalog.PROFESSOR.lower():
+            projects = projects.filter(userId_professor=user)
+        kwargs = {
+            'request_id': visible.order_by('-date').values_list('requestId', flat=True).first(),
+            'project_id': projects.values_list('projectId', flat=True).first(),
+            'user_id': User.objects.filter(roleId=catalog.role_id(catalog.STUDENT))
+                       .values_list('userId', flat=True).first(),
+            'file_id': File.objects.filter(requestId__in=visible).order_by('-fileId')
+                       .values_list('fileId', flat=True).first(),
+            'size': next(iter(settings.PREVIEW_SIZES), None),
+            'upload_id': UploadSession.objects.filter(userId_student=user)
+                         .values_list('uploadId', flat=True).first(),
+        }
+
+        seen = set()
+        for pattern in urls.urlpatterns:
+            name = pattern.name
+            if name in seen or name in EXCLUDED_URLS or (only and name not in only):
+                continue
+            seen.add(name)
+            # Un parámetro sin valor de ejemplo (o uno nuevo) omite la ruta
+            params = {key: kwargs.get(key) for key in pattern.pattern.converters}
+            if None in params.values():
+                self.stderr.write(f"Sin datos para {name} con {user_role}; se omite")
+                continue
+            yield name, reverse(name, kwargs=params)
+
+    # Medición
+
+    def measure(self, client, path, iterations, warmup):
+        for _ in range(warmup):
+            _consume(client.get(path))
+
+        timings, queries, size, status = [], 0, 0, None
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(path)
+                size = _consume(response)
+                timings.append((time.perf_counter() - started) * 1000)
+            queries = len(captured)
+            status = response.status_code
+
+        # La memoria se mide aparte: tracemalloc hace más lentas las peticiones
+        tracemalloc.start()
+        try:
+            tracemalloc.reset_peak()
+            _consume(client.get(path))
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        return {
+            'status': status,
+            'bytes': size,
+            'iterations': iterations,
+            'mean_ms': round(statistics.fmean(timings), 3),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p90_ms': round(percentile(timings, 90), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'max_ms': round(max(timings), 3),
+            'queries': queries,
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+    def meta(self, options):
+        return {
+            'created': timezone.now().isoformat(),
+            'iterations': options['iterations'],
+            'warmup': options['warmup'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'debug': settings.DEBUG,
+            'argv': sys.argv[1:],
+            'rows': {
+                'users': User.objects.count(),
+                'projects': Project.objects.count(),
+                'requests': Request.objects.count(),
+            },
+        }
+
+    # Comparación
+
+    def compare(self, path, results, threshold):
+        '''
+        Compara con una corrida anterior y devuelve la cantidad de regresiones
+        '''
+        try:
+            with open(path, encoding='utf-8') as f:
+                previous = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"No se pudo leer {path}: {e}")
+        baseline = {(r['url'], r['role']): r for r in previous.get('results', [])}
+
+        regressions = 0
+        self.stderr.write(f"\nComparación con {path} (umbral {threshold}%):")
+        for result in results:
+            before = baseline.get((result['url'], result['role']))
+            if before is None:
+                self.stderr.write(f"  {result['role']:<11} {result['url']:<16} nueva")
+                continue
+            changes = []
+            for metric in COMPARED_METRICS:
+                old, new = before.get(metric), result[metric]
+                if old is None:
+                    continue
+                change = (new - old) / old * 100 if old else (0.0 if new == old else 100.0)
+                regressed = change > threshold
+                regressions += regressed
+                text = f"{metric} {old}->{new} ({change:+.1f}%)"
+                changes.append(self.style.ERROR(text) if regressed else text)
+            self.stderr.write(f"  {result['role']:<11} {result['url']:<16} " + '  '.join(changes))
+        if regressions:
+            self.stderr.write(self.style.ERROR(f"{regressions} regresiones"))
+        else:
+            self.stderr.write(self.style.SUCCESS("Sin regresiones"))
+        return regressions
@@ -0,0 +1,107 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from tcu_system_app import catalog
+from tcu_system_app.models import Project, Request, User
+from tcu_system_app.views.home import recent_requests_for, request_counters
+from .benchmark_views import ROLES, percentile
+
+
+def two_steps(user):
+    '''
+    Alcance como se armaba antes en las vistas: para el profesor, primero
+    se consultan sus proyectos y después las solicitudes
+    '''
+    user_role = user.roleId.name.lower()
+    if user_role == 'estudiante':
+        return Request.objects.filter(userId_student=user)
+    if user_role == 'profesor':
+        projects = Project.objects.filter(userId_professor=user)
+        if not projects.exists():
+            return Request.objects.none()
+        return Request.objects.filter(projectId__in=list(projects.values_list('projectId', flat=True)))
+    return Request.objects.all()
+
+
+STRATEGIES = {
+    'dos-pasos': two_steps,
+    'visible_to': lambda user: Request.objects.visible_to(user),
+}
+
+# Consultas de las vistas sobre las solicitudes visibles
+OPERATIONS = {
+    'contadores': request_counters,
+    'recientes': lambda requests: list(recent_requests_for(requests)),
+    'listado': lambda requests: list(
+        requests.select_related('userId_student', 'projectId', 'statusId').order_by('-date', '-requestId')[:25]
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = ('Compara, para cada rol, las consultas y la latencia de las solicitudes visibles '
+            'armadas en dos pasos y con Request.objects.visible_to()')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help='Repeticiones por operación')
+        parser.add_argument('--output', help='Archivo JSON donde guardar los resultados')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError("--iterations debe ser al menos 1")
+
+        results = []
+        for role_name in ROLES:
+            user = self.pick_user(role_name)
+            if user is None:
+                self.stderr.write(f"Sin usuarios con rol {role_name}; se omite")
+                continue
+            for operation, run in OPERATIONS.items():
+                for strategy, scope in STRATEGIES.items():
+                    result = self.measure(lambda: run(scope(user)), options['iterations'])
+                    result.update({'role': role_name, 'operation': operation, 'strategy': strategy})
+                    results.append(result)
+
+        self.stdout.write(f"{'Rol':<11} {'Operación':<11} {'Alcance':<11} {'consultas':>9} {'p50 ms':>8} {'p95 ms':>8}")
+        for result in results:
+            self.stdout.write(
+                f"{result['role']:<11} {result['operation']:<11} {result['strategy']:<11} "
+                f"{result['queries']:>9} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump({'results': results}, f, indent=2, ensure_ascii=False)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def pick_user(self, role_name):
+        '''
+        Usuario del rol con más solicitudes visibles
+        '''
+        users = User.objects.select_related('roleId').filter(roleId=catalog.role_id(role_name))
+        load = {
+            catalog.STUDENT: Count('student_requests'),
+            catalog.PROFESSOR: Count('project__request'),
+        }.get(role_name)
+        if load is not None:
+            users = users.annotate(load=load).order_by('-load', 'userId')
+        return users.first()
+
+    def measure(self, call, iterations):
+        call()
+        timings = []
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                call()
+                timings.append((time.perf_counter() - started) * 1000)
+        return {
+            'queries': len(captured),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+        }
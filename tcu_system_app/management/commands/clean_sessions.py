@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Elimina de la base las sesiones vencidas por lotes, para no bloquear la tabla '
+            'de sesiones con un solo DELETE grande (en el cache vencen solas)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.SESSION_CLEANUP_BATCH_SIZE,
+            help='Sesiones eliminadas por transacción'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("--batch-size debe ser al menos 1")
+
+        self.stdout.write("Eliminando sesiones vencidas...")
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now).order_by('expire_date')
+        deleted = batches = 0
+        while True:
+            # Cada lote es su propia transacción: los logins no esperan a toda la limpieza
+            keys = list(expired.values_list('session_key', flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += Session.objects.filter(session_key__in=keys).delete()[0]
+            batches += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Sesiones eliminadas: {deleted} en {batches} lotes'))
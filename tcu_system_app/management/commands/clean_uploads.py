@@ -0,0 +1,34 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from tcu_system_app import uploads
+from tcu_system_app.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = ('Elimina las subidas por partes que no se adjuntaron a una solicitud '
+            'después de UPLOAD_SESSION_TTL_HOURS, y los archivos temporales sin sesión')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Eliminando subidas vencidas...")
+        expired = 0
+        for session in uploads.expired_sessions().iterator():
+            uploads.discard(session)
+            expired += 1
+
+        # Archivos temporales que quedaron sin sesión (por ejemplo, al borrar un usuario)
+        orphans = 0
+        if os.path.isdir(settings.UPLOAD_TEMP_DIR):
+            # Se lista antes de leer las sesiones para no borrar una subida recién creada
+            names = os.listdir(settings.UPLOAD_TEMP_DIR)
+            known = {f'{upload_id}.part' for upload_id in UploadSession.objects.values_list('uploadId', flat=True)}
+            for name in names:
+                if name.endswith('.part') and name not in known:
+                    os.remove(os.path.join(settings.UPLOAD_TEMP_DIR, name))
+                    orphans += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Subidas eliminadas: {expired} vencidas, {orphans} archivos temporales sin sesión'
+        ))
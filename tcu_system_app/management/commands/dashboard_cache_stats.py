@@ -0,0 +1,28 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from tcu_system_app import dashboard_cache
+
+
+class Command(BaseCommand):
+    help = 'Muestra los aciertos y fallos del cache del dashboard desde el último reinicio de los contadores'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reinicia los contadores después de mostrarlos')
+
+    def handle(self, *args, **options):
+        # Con el cache local los contadores viven en la memoria de cada
+        # proceso del servidor; este comando solo vería los suyos, en cero
+        if isinstance(caches['default'], LocMemCache):
+            raise CommandError(
+                "El cache es local (TCU_CACHE_BACKEND=local): los contadores no se comparten entre "
+                "procesos. Use TCU_CACHE_BACKEND=redis o memcached para consultarlos"
+            )
+        stats = dashboard_cache.stats()
+        self.stdout.write(f"Aciertos: {stats['hits']}")
+        self.stdout.write(f"Fallos: {stats['misses']}")
+        self.stdout.write(self.style.SUCCESS(f"Tasa de aciertos: {stats['hit_rate']:.1%}"))
+        if options['reset']:
+            dashboard_cache.reset_stats()
+            self.stdout.write("Contadores reiniciados")
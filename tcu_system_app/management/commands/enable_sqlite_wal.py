@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from tcu_system import databases
+
+
+class Command(BaseCommand):
+    help = 'Activa el modo WAL en la base SQLite; basta con hacerlo una vez porque queda guardado en el archivo'
+
+    def handle(self, *args, **options):
+        config = connections[DEFAULT_DB_ALIAS].settings_dict
+        if config['ENGINE'] != databases.ENGINES['sqlite']:
+            raise CommandError("El modo WAL solo aplica a SQLite (TCU_DB_ENGINE=sqlite)")
+        # Sin otras conexiones abiertas del proceso sobre el archivo
+        connections[DEFAULT_DB_ALIAS].close()
+        mode = databases.enable_wal(config['NAME'])
+        if mode.lower() != 'wal':
+            raise CommandError(f"SQLite dejó la base en modo {mode}")
+        self.stdout.write(self.style.SUCCESS(f"Modo WAL activo en {config['NAME']}"))
@@ -0,0 +1,231 @@
+import random
+import time
+from datetime import date, timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tcu_system_app import catalog, ledger, rollup
+from tcu_system_app.models import Project, Request, User
+from tcu_system_app.signals import delete_receivers_disconnected
+
+
+FIRST_NAMES = [
+    'Ana', 'Carlos', 'María', 'José', 'Laura', 'Andrés', 'Sofía', 'Diego', 'Valeria', 'Luis',
+    'Camila', 'Daniel', 'Gabriela', 'Javier', 'Fernanda', 'Pablo', 'Natalia', 'Ricardo',
+]
+LAST_NAMES = [
+    'Martínez', 'Rodríguez', 'González', 'Hernández', 'López', 'Jiménez', 'Vargas', 'Rojas',
+    'Mora', 'Castro', 'Solano', 'Araya', 'Chaves', 'Quesada', 'Alfaro', 'Campos',
+]
+ACTIVITIES = [
+    'Taller con la comunidad', 'Reforestación de la zona', 'Limpieza de playa',
+    'Tutorías a estudiantes de escuela', 'Levantamiento de datos en campo',
+    'Capacitación en el uso de computadoras', 'Apoyo en la feria de salud',
+    'Elaboración de material didáctico', 'Reunión de planificación con la asociación',
+]
+COMMENTS = [
+    'Falta evidencia de las horas realizadas',
+    'La descripción no corresponde a las actividades del proyecto',
+    'Las horas exceden lo acordado para la actividad',
+]
+
+
+def parse_mix(value, names):
+    '''
+    Convierte "nombre=peso,nombre=peso" en {nombre: peso}; los nombres deben
+    estar en `names` (sin distinguir mayúsculas)
+    '''
+    weights = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip().lower()
+        if name not in names:
+            raise CommandError(f"Nombre desconocido en la distribución: {name}")
+        try:
+            weights[name] = float(weight)
+        except ValueError:
+            raise CommandError(f"Peso inválido para {name}: {weight}")
+        if weights[name] < 0:
+            raise CommandError(f"El peso de {name} no puede ser negativo")
+    if not sum(weights.values()):
+        raise CommandError("La suma de los pesos debe ser mayor que cero")
+    return weights
+
+
+def split_by_weights(total, weights):
+    '''
+    Reparte `total` elementos según los pesos, sin perder el redondeo
+    '''
+    weight_sum = sum(weights.values())
+    counts = {name: int(total * weight / weight_sum) for name, weight in weights.items()}
+    remainder = total - sum(counts.values())
+    for name in sorted(weights, key=weights.get, reverse=True)[:remainder]:
+        counts[name] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Genera un conjunto de datos sintético (usuarios, proyectos y solicitudes) para pruebas de carga'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000, help='Cantidad total de usuarios')
+        parser.add_argument('--projects', type=int, default=50, help='Cantidad de proyectos')
+        parser.add_argument('--requests', type=int, default=50000, help='Cantidad de solicitudes')
+        parser.add_argument('--seed', type=int, default=42, help='Semilla para obtener siempre los mismos datos')
+        parser.add_argument(
+            '--roles',
+            default='estudiante=90,profesor=8,admin=2',
+            help='Distribución de roles de los usuarios'
+        )
+        parser.add_argument(
+            '--statuses',
+            default='pendiente=20,aceptada=65,rechazada=15',
+            help='Distribución de estados de las solicitudes'
+        )
+        parser.add_argument('--days', type=int, default=730, help='Antigüedad máxima de las solicitudes')
+        parser.add_argument('--prefix', default='bench', help='Prefijo de los emails y códigos generados')
+        parser.add_argument('--password', default='bench123', help='Contraseña de todos los usuarios generados')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Filas por INSERT')
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Elimina antes los datos generados con el mismo prefijo'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        prefix = options['prefix'].lower()
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+
+        roles = {role.name.lower(): role for role in catalog.roles()}
+        statuses = {status.name.lower(): status for status in catalog.statuses()}
+        if not roles or not statuses:
+            raise CommandError("Faltan roles o estados: ejecute primero create_initial_data")
+        role_counts = split_by_weights(options['users'], parse_mix(options['roles'], roles))
+        status_weights = parse_mix(options['statuses'], statuses)
+
+        if options['clear']:
+            self.clear(prefix)
+        elif User.objects.filter(email__startswith=f'{prefix}.').exists():
+            raise CommandError(f"Ya existen datos con el prefijo {prefix}; use --clear para reemplazarlos")
+
+        student_role = catalog.role_id(catalog.STUDENT)
+        professor_role = catalog.role_id(catalog.PROFESSOR)
+        if role_counts.get(catalog.STUDENT.lower()) and options['requests'] and not options['projects']:
+            raise CommandError("Las solicitudes necesitan al menos un proyecto")
+
+        with transaction.atomic():
+            # 1. Usuarios; todos comparten el mismo hash para no pagar PBKDF2 por cada uno
+            password = make_password(options['password'])
+            users = []
+            for role_name, count in role_counts.items():
+                for n in range(count):
+                    users.append(User(
+                        roleId=roles[role_name],
+                        firstName=rng.choice(FIRST_NAMES),
+                        lastName=rng.choice(LAST_NAMES),
+                        email=f'{prefix}.{role_name}.{n}@example.com',
+                        password=password,
+                    ))
+                    users[-1].set_search_keys()
+            User.objects.bulk_create(users, batch_size=batch_size)
+            self.stdout.write(f"Usuarios creados: {len(users)}")
+
+            generated = User.objects.filter(email__startswith=f'{prefix}.')
+            professor_ids = list(generated.filter(roleId=professor_role).values_list('userId', flat=True))
+            student_ids = list(generated.filter(roleId=student_role).values_list('userId', flat=True))
+
+            # 2. Proyectos, repartidos entre los profesores generados
+            Project.objects.bulk_create(
+                [
+                    Project(
+                        code=f'{prefix.upper()}{n:05d}',
+                        name=f'{prefix.upper()} {rng.choice(ACTIVITIES)} #{n}',
+                        userId_professor_id=rng.choice(professor_ids) if professor_ids else None,
+                    )
+                    for n in range(options['projects'])
+                ],
+                batch_size=batch_size,
+            )
+            project_ids = list(
+                Project.objects.filter(code__startswith=prefix.upper()).values_list('projectId', flat=True)
+            )
+            self.stdout.write(f"Proyectos creados: {len(project_ids)}")
+
+            # 3. Cada estudiante queda asignado a un proyecto
+            student_projects = {student_id: rng.choice(project_ids) for student_id in student_ids} if project_ids else {}
+            assigned = [User(userId=student_id, projectId_id=project_id) for student_id, project_id in student_projects.items()]
+            User.objects.bulk_update(assigned, ['projectId'], batch_size=batch_size)
+
+            # 4. Solicitudes; la actividad por estudiante es desigual, como en la realidad
+            created = 0
+            if student_ids and options['requests']:
+                activity = list(accumulate(rng.lognormvariate(0, 1) for _ in student_ids))
+                status_ids = [statuses[name].statusId for name in status_weights]
+                status_cum = list(accumulate(status_weights.values()))
+                pending_id = catalog.status_id(catalog.PENDING)
+                rejected_id = catalog.status_id(catalog.REJECTED)
+                today = date.today()
+                while created < options['requests']:
+                    size = min(batch_size, options['requests'] - created)
+                    batch = []
+                    for student_id, status_id in zip(
+                        rng.choices(student_ids, cum_weights=activity, k=size),
+                        rng.choices(status_ids, cum_weights=status_cum, k=size),
+                    ):
+                        request_date = today - timedelta(days=rng.randrange(options['days'] or 1))
+                        reviewed = status_id != pending_id
+                        batch.append(Request(
+                            userId_student_id=student_id,
+                            projectId_id=student_projects[student_id],
+                            statusId_id=status_id,
+                            hoursRequested=rng.choice((1, 2, 2, 3, 4, 4, 4, 5, 6, 8)),
+                            description=rng.choice(ACTIVITIES),
+                            date=request_date,
+                            professorComent=rng.choice(COMMENTS) if status_id == rejected_id else None,
+                            revisionDate=request_date + timedelta(days=rng.randrange(1, 15)) if reviewed else None,
+                        ))
+                    Request.objects.bulk_create(batch, batch_size=batch_size)
+                    created += size
+                    self.stdout.write(f"Solicitudes creadas: {created}/{options['requests']}")
+
+            # 5. El ledger y el rollup se recalculan una sola vez al final
+            rows = ledger.rebuild_ledger()
+            rollup.refresh(full=True)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Datos generados en {elapsed:.2f}s: {len(users)} usuarios, {len(project_ids)} proyectos, "
+            f"{created} solicitudes ({rows} filas de ledger)"
+        ))
+        self.stdout.write(f"Contraseña de los usuarios generados: {options['password']}")
+
+    def clear(self, prefix):
+        '''
+        Elimina los datos del prefijo sin los receptores por fila: las
+        solicitudes se borran con un DELETE por bloque en lugar de consultas
+        por cada una. El ledger y el rollup se recalculan después en handle()
+        '''
+        users = User.objects.filter(email__startswith=f'{prefix}.')
+        requests = Request.objects.filter(userId_student__in=users)
+        projects = Project.objects.filter(code__startswith=prefix.upper())
+        project_count, user_count = projects.count(), users.count()
+        deleted = 0
+        with delete_receivers_disconnected():
+            # Por bloques, para no cargar en memoria todas las solicitudes a la vez
+            while True:
+                ids = list(requests.values_list('requestId', flat=True)[:10000])
+                if not ids:
+                    break
+                Request.objects.filter(requestId__in=ids).delete()
+                deleted += len(ids)
+            with transaction.atomic():
+                projects.delete()
+                users.delete()
+        self.stdout.write(
+            f"Datos anteriores eliminados: {user_count} usuarios, {project_count} proyectos y {deleted} solicitudes"
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from tcu_system_app import previews
+from tcu_system_app.models import File
+
+
+class Command(BaseCommand):
+    help = ('Genera las vistas previas de los adjuntos pendientes (archivos subidos antes '
+            'de activarlas o que no cupieron en el pool)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry',
+            action='store_true',
+            help='Reintenta también los que fallaron o no tenían con qué generarse'
+        )
+
+    def handle(self, *args, **options):
+        statuses = [File.PREVIEW_PENDING]
+        if options['retry']:
+            statuses += [File.PREVIEW_FAILED, File.PREVIEW_NONE]
+
+        file_ids = list(File.objects.filter(previewStatus__in=statuses).values_list('fileId', flat=True))
+        self.stdout.write(f"Generando vistas previas de {len(file_ids)} archivos...")
+        results = {}
+        for file_id in file_ids:
+            status = previews.generate(file_id)
+            results[status] = results.get(status, 0) + 1
+
+        summary = ', '.join(f'{label}: {results.get(value, 0)}' for value, label in File.PREVIEW_STATUSES)
+        self.stdout.write(self.style.SUCCESS(f'Vistas previas generadas. {summary}'))
@@ -0,0 +1,341 @@
+import csv
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tcu_system_app import catalog, ledger
+from tcu_system_app.models import Project, Request, User
+
+
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+def _init_worker():
+    # Con el método "spawn" los procesos hijos no heredan Django configurado
+    import django
+    django.setup()
+
+
+def read_rows(path):
+    '''
+    Lee un archivo CSV (con encabezado) o JSONL y devuelve (línea, fila)
+    '''
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if path.endswith('.jsonl'):
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    try:
+                        yield line_number, json.loads(line)
+                    except json.JSONDecodeError as e:
+                        yield line_number, {'__error__': f'JSON inválido: {e}'}
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def _clean(row, field):
+    value = row.get(field)
+    return str(value).strip() if value is not None else ''
+
+
+class Command(BaseCommand):
+    help = 'Importa usuarios, proyectos y solicitudes históricas desde archivos CSV o JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--projects', help='Proyectos: code, name, professor_email')
+        parser.add_argument(
+            '--users',
+            help='Usuarios: firstName, lastName, email, role, password, project_code'
+        )
+        parser.add_argument(
+            '--requests',
+            help='Solicitudes: student_email, hoursRequested, description, date, '
+                 'status, project_code, professorComent, revisionDate'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Solo valida los archivos y muestra el reporte, sin escribir'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Filas por INSERT')
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Procesos para calcular los hashes de contraseñas'
+        )
+
+    def handle(self, *args, **options):
+        if not any([options['projects'], options['users'], options['requests']]):
+            raise CommandError("Indique al menos uno de --projects, --users o --requests")
+
+        self.errors = []
+        started = time.perf_counter()
+
+        projects = self.validate_projects(options['projects']) if options['projects'] else []
+        project_codes = set(Project.objects.values_list('code', flat=True)) | {p['code'] for p in projects}
+        users = self.validate_users(options['users'], project_codes) if options['users'] else []
+        user_emails = {u['email']: u['role'] for u in users}
+        requests = (
+            self.validate_requests(options['requests'], project_codes, user_emails)
+            if options['requests'] else []
+        )
+        self.validate_professors(projects, user_emails)
+
+        self.report(projects, users, requests)
+        if self.errors:
+            raise CommandError(f"Se encontraron {len(self.errors)} errores; no se importó nada")
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS("Validación completa (--dry-run): no se escribió nada"))
+            return
+
+        hashes = self.hash_passwords([u['password'] for u in users], options['workers'])
+        with transaction.atomic():
+            created = self.import_rows(projects, users, hashes, requests, options['batch_size'])
+
+        elapsed = time.perf_counter() - started
+        total = sum(created.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Importados {created['projects']} proyectos, {created['users']} usuarios y "
+            f"{created['requests']} solicitudes en {elapsed:.2f}s "
+            f"({total / elapsed if elapsed else total:.0f} filas/s)"
+        ))
+
+    # Validación
+
+    def error(self, path, line, message):
+        self.errors.append(f"{os.path.basename(path)}:{line}: {message}")
+
+    def validate_projects(self, path):
+        existing = set(Project.objects.values_list('code', flat=True))
+        existing_names = set(Project.objects.values_list('name', flat=True))
+        projects, seen_codes, seen_names = [], set(), set()
+        for line, row in read_rows(path):
+            if '__error__' in row:
+                self.error(path, line, row['__error__'])
+                continue
+            code = _clean(row, 'code').upper()
+            name = _clean(row, 'name')
+            if not code or not name:
+                self.error(path, line, "Código y nombre son obligatorios")
+            elif len(code) < 2:
+                self.error(path, line, "El código debe tener al menos 2 caracteres")
+            elif code in existing or code in seen_codes:
+                self.error(path, line, f"El código {code} ya está registrado")
+            elif name in existing_names or name in seen_names:
+                self.error(path, line, f"El nombre {name} ya está registrado")
+            else:
+                seen_codes.add(code)
+                seen_names.add(name)
+                projects.append({
+                    'line': line,
+                    'path': path,
+                    'code': code,
+                    'name': name,
+                    'professor_email': _clean(row, 'professor_email').lower(),
+                })
+        return projects
+
+    def validate_users(self, path, project_codes):
+        existing = set(User.objects.values_list('email', flat=True))
+        users, seen = [], set()
+        for line, row in read_rows(path):
+            if '__error__' in row:
+                self.error(path, line, row['__error__'])
+                continue
+            email = _clean(row, 'email').lower()
+            role = catalog.role(catalog.role_id(_clean(row, 'role')) if _clean(row, 'role') else None)
+            password = _clean(row, 'password')
+            project_code = _clean(row, 'project_code').upper()
+
+            if not all([_clean(row, 'firstName'), _clean(row, 'lastName'), email, password]):
+                self.error(path, line, "Todos los campos obligatorios deben ser completados")
+            elif not EMAIL_RE.match(email):
+                self.error(path, line, f"El formato del email {email} no es válido")
+            elif email in existing or email in seen:
+                self.error(path, line, f"El email {email} ya está registrado")
+            elif role is None:
+                self.error(path, line, f"Rol desconocido: {_clean(row, 'role')}")
+            elif len(password) < 6:
+                self.error(path, line, "La contraseña debe tener al menos 6 caracteres")
+            elif project_code and project_code not in project_codes:
+                self.error(path, line, f"Proyecto desconocido: {project_code}")
+            elif project_code and role.name.lower() != 'estudiante':
+                self.error(path, line, "Solo los estudiantes pueden tener proyectos asignados")
+            else:
+                seen.add(email)
+                users.append({
+                    'firstName': _clean(row, 'firstName'),
+                    'lastName': _clean(row, 'lastName'),
+                    'email': email,
+                    'role': role,
+                    'password': password,
+                    'project_code': project_code,
+                })
+        return users
+
+    def validate_professors(self, projects, new_users):
+        professor_ids = set(catalog.role_ids('Profesor', 'Professor', 'Coordinador', 'Coordinator'))
+        emails = {p['professor_email'] for p in projects if p['professor_email']}
+        existing = dict(User.objects.filter(email__in=emails).values_list('email', 'roleId'))
+        for project in projects:
+            email = project['professor_email']
+            if not email:
+                continue
+            role = new_users[email].roleId if email in new_users else existing.get(email)
+            if role is None:
+                self.error(project['path'], project['line'], f"Profesor desconocido: {email}")
+            elif role not in professor_ids:
+                self.error(project['path'], project['line'], "Solo se pueden asignar profesores a los proyectos")
+
+    def validate_requests(self, path, project_codes, new_users):
+        student_role = catalog.role_id(catalog.STUDENT)
+        students = set(User.objects.filter(roleId=student_role).values_list('email', flat=True))
+        requests = []
+        for line, row in read_rows(path):
+            if '__error__' in row:
+                self.error(path, line, row['__error__'])
+                continue
+            email = _clean(row, 'student_email').lower()
+            project_code = _clean(row, 'project_code').upper()
+            status_name = _clean(row, 'status') or catalog.PENDING
+            status_id = catalog.status_id(status_name)
+            try:
+                hours = int(_clean(row, 'hoursRequested'))
+                date = datetime.strptime(_clean(row, 'date'), '%Y-%m-%d').date()
+                revision = _clean(row, 'revisionDate')
+                revision_date = datetime.strptime(revision, '%Y-%m-%d').date() if revision else None
+            except ValueError:
+                self.error(path, line, "Horas o fechas inválidas (use enteros y YYYY-MM-DD)")
+                continue
+
+            is_student = email in students or (email in new_users and new_users[email].roleId == student_role)
+            if not is_student:
+                self.error(path, line, f"Estudiante desconocido: {email}")
+            elif not _clean(row, 'description'):
+                self.error(path, line, "La descripción es obligatoria")
+            elif not 0 < hours <= 100:
+                self.error(path, line, "Las horas deben estar entre 1 y 100")
+            elif status_id is None:
+                self.error(path, line, f"Estado desconocido: {status_name}")
+            elif project_code and project_code not in project_codes:
+                self.error(path, line, f"Proyecto desconocido: {project_code}")
+            else:
+                requests.append({
+                    'student_email': email,
+                    'project_code': project_code or None,
+                    'statusId_id': status_id,
+                    'hoursRequested': hours,
+                    'description': _clean(row, 'description'),
+                    'date': date,
+                    'professorComent': _clean(row, 'professorComent'),
+                    'revisionDate': revision_date,
+                })
+        return requests
+
+    def report(self, projects, users, requests):
+        self.stdout.write("Reporte de validación:")
+        self.stdout.write(f"  Proyectos válidos: {len(projects)}")
+        self.stdout.write(f"  Usuarios válidos: {len(users)}")
+        self.stdout.write(f"  Solicitudes válidas: {len(requests)}")
+        for message in self.errors[:100]:
+            self.stdout.write(self.style.ERROR(f"  {message}"))
+        if len(self.errors) > 100:
+            self.stdout.write(self.style.ERROR(f"  ... y {len(self.errors) - 100} errores más"))
+
+    # Importación
+
+    def hash_passwords(self, passwords, workers):
+        '''
+        Calcula los hashes PBKDF2 en paralelo en un pool de procesos
+        '''
+        if not passwords:
+            return []
+        started = time.perf_counter()
+        if workers <= 1 or len(passwords) < 2:
+            hashes = [make_password(password) for password in passwords]
+        else:
+            chunksize = max(1, len(passwords) // (workers * 4))
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+                hashes = list(executor.map(make_password, passwords, chunksize=chunksize))
+        self.stdout.write(f"Hashes de {len(hashes)} contraseñas en {time.perf_counter() - started:.2f}s")
+        return hashes
+
+    def import_rows(self, projects, users, hashes, requests, batch_size):
+        created = {'projects': 0, 'users': 0, 'requests': 0}
+
+        # 1. Proyectos (el profesor se asigna cuando existan los usuarios)
+        Project.objects.bulk_create(
+            [Project(code=p['code'], name=p['name']) for p in projects], batch_size=batch_size
+        )
+        created['projects'] = len(projects)
+        project_ids = dict(Project.objects.values_list('code', 'projectId'))
+
+        # 2. Usuarios (bulk_create no llama a save(): las claves de búsqueda se arman aquí)
+        new_users = [
+            User(
+                firstName=u['firstName'],
+                lastName=u['lastName'],
+                email=u['email'],
+                password=password_hash,
+                roleId=u['role'],
+                projectId_id=project_ids.get(u['project_code']),
+            )
+            for u, password_hash in zip(users, hashes)
+        ]
+        for user in new_users:
+            user.set_search_keys()
+        User.objects.bulk_create(new_users, batch_size=batch_size)
+        created['users'] = len(users)
+
+        # 3. Profesores de los proyectos nuevos
+        professor_emails = {p['code']: p['professor_email'] for p in projects if p['professor_email']}
+        user_ids = dict(
+            User.objects.filter(email__in=professor_emails.values()).values_list('email', 'userId')
+        )
+        assigned = list(Project.objects.filter(code__in=professor_emails))
+        for project in assigned:
+            project.userId_professor_id = user_ids[professor_emails[project.code]]
+        Project.objects.bulk_update(assigned, ['userId_professor'], batch_size=batch_size)
+
+        # 4. Solicitudes; el proyecto por defecto es el del estudiante
+        students = {
+            email: (user_id, project_id)
+            for email, user_id, project_id in User.objects.filter(
+                email__in={r['student_email'] for r in requests}
+            ).values_list('email', 'userId', 'projectId')
+        }
+        new_requests = []
+        deltas = defaultdict(int)
+        for r in requests:
+            student_id, student_project_id = students[r['student_email']]
+            project_id = project_ids[r['project_code']] if r['project_code'] else student_project_id
+            new_requests.append(Request(
+                userId_student_id=student_id,
+                projectId_id=project_id,
+                statusId_id=r['statusId_id'],
+                hoursRequested=r['hoursRequested'],
+                description=r['description'],
+                date=r['date'],
+                professorComent=r['professorComent'],
+                revisionDate=r['revisionDate'],
+            ))
+            deltas[(student_id, None, r['statusId_id'])] += r['hoursRequested']
+            deltas[(None, project_id, r['statusId_id'])] += r['hoursRequested']
+        Request.objects.bulk_create(new_requests, batch_size=batch_size)
+        created['requests'] = len(new_requests)
+
+        # 5. Ledger de horas, con una actualización por estudiante/proyecto y estado
+        for (student_id, project_id, status_id), hours in deltas.items():
+            ledger.apply_delta(student_id, project_id, status_id, hours)
+
+        return created
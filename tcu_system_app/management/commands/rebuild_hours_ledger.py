@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+from tcu_system_app.ledger import rebuild_ledger
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde cero el ledger de horas por estudiante y proyecto'
+
+    def handle(self, *args, **options):
+        self.stdout.write("Recalculando ledger de horas...")
+        rows = rebuild_ledger()
+        self.stdout.write(self.style.SUCCESS(f'Ledger recalculado: {rows} filas'))
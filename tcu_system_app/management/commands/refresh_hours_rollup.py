@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from tcu_system_app import rollup
+
+
+class Command(BaseCommand):
+    help = 'Actualiza las horas por semana y por mes de la vista de analítica'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recalcular todos los periodos desde cero')
+
+    def handle(self, *args, **options):
+        self.stdout.write("Actualizando horas por periodo...")
+        rows = rollup.refresh(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(f'Horas por periodo actualizadas: {rows} filas escritas'))
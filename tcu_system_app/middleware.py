@@ -0,0 +1,189 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject
+
+from . import catalog
+from .models import Project, Role, User
+from .query_budget import QueryStats, budget_for, track_queries
+
+
+logger = logging.getLogger('tcu_system_app.queries')
+
+
+def current_user_cache_key(user_id):
+    return f'tcu:current_user:{user_id}'
+
+
+def invalidate_current_user(*user_ids):
+    '''
+    Elimina del cache los usuarios indicados para que se vuelvan a leer
+    '''
+    cache.delete_many([current_user_cache_key(user_id) for user_id in user_ids])
+
+
+# Campos del usuario que se guardan en cache: los que usan las vistas. La
+# contraseña nunca se guarda; los demás quedan diferidos y se leen de la
+# base si alguien los pide.
+CACHED_USER_FIELDS = ('userId', 'roleId_id', 'firstName', 'lastName', 'email', 'projectId_id')
+
+
+def _values(obj, names=None):
+    return {
+        field.attname: getattr(obj, field.attname)
+        for field in type(obj)._meta.concrete_fields
+        if names is None or field.attname in names
+    }
+
+
+def _instance(model, values):
+    # from_db marca como diferidos los campos que no vienen en `values`
+    return model.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+
+
+def user_to_cache(user):
+    '''
+    Datos del usuario, su rol y su proyecto para guardar en cache
+    '''
+    return {
+        'user': _values(user, CACHED_USER_FIELDS),
+        'role': _values(user.roleId),
+        'project': _values(user.projectId) if user.projectId_id else None,
+    }
+
+
+def user_from_cache(entry):
+    user = _instance(User, entry['user'])
+    user.roleId = _instance(Role, entry['role'])
+    user.projectId = _instance(Project, entry['project']) if entry['project'] else None
+    return user
+
+
+def get_current_user(request):
+    '''
+    Usuario de la sesión con su rol y proyecto ya cargados, o None si no hay
+    sesión o el usuario ya no existe. Se resuelve una vez por petición y,
+    con un cache compartido, se guarda en cache entre peticiones: con el
+    local, editar o eliminar un usuario no invalidaría la copia de los demás
+    procesos y seguirían usando su rol anterior.
+    '''
+    if not hasattr(request, '_cached_current_user'):
+        user = None
+        user_id = request.session.get('user_id')
+        if user_id is not None and not settings.CACHE_SHARED:
+            user = User.objects.select_related('roleId', 'projectId').filter(pk=user_id).first()
+        elif user_id is not None:
+            key = current_user_cache_key(user_id)
+            entry = cache.get(key)
+            if entry is not None:
+                user = user_from_cache(entry)
+            else:
+                user = User.objects.select_related('roleId', 'projectId').filter(pk=user_id).first()
+                if user is not None:
+                    cache.set(key, user_to_cache(user), settings.CURRENT_USER_CACHE_TIMEOUT)
+        request._cached_current_user = user
+    return request._cached_current_user
+
+
+async def aget_current_user(request):
+    '''
+    Versión asíncrona de get_current_user. Después de llamarla,
+    `request.current_user` ya no consulta la base de datos.
+    '''
+    if not hasattr(request, '_cached_current_user'):
+        user = None
+        user_id = await request.session.aget('user_id')
+        if user_id is not None and not settings.CACHE_SHARED:
+            user = await User.objects.select_related('roleId', 'projectId').filter(pk=user_id).afirst()
+        elif user_id is not None:
+            key = current_user_cache_key(user_id)
+            entry = await cache.aget(key)
+            if entry is not None:
+                user = user_from_cache(entry)
+            else:
+                user = await User.objects.select_related('roleId', 'projectId').filter(pk=user_id).afirst()
+                if user is not None:
+                    await cache.aset(key, user_to_cache(user), settings.CURRENT_USER_CACHE_TIMEOUT)
+        request._cached_current_user = user
+    return request._cached_current_user
+
+
+class CatalogMiddleware(MiddlewareMixin):
+    '''
+    Revisa la versión del catálogo una sola vez al comenzar cada petición
+    '''
+    def process_request(self, request):
+        catalog.check_version()
+
+
+class CurrentUserMiddleware(MiddlewareMixin):
+    '''
+    Expone `request.current_user` a las vistas y a `login_required`. En las
+    vistas asíncronas se resuelve antes con aget_current_user.
+    '''
+    def process_request(self, request):
+        request.current_user = SimpleLazyObject(lambda: get_current_user(request))
+
+
+class QueryBudgetMiddleware(MiddlewareMixin):
+    '''
+    Cuenta las consultas SQL de cada petición y registra una advertencia
+    cuando la vista supera su presupuesto (QUERY_BUDGETS). Las estadísticas
+    quedan en `response.query_stats` y, si QUERY_BUDGET_HEADERS está activo,
+    en las cabeceras X-Query-*.
+
+    Las conexiones son propias de cada hilo: process_request y
+    process_response corren en el hilo de la petición, que bajo ASGI es
+    también el que usa el ORM asíncrono.
+    '''
+    def process_request(self, request):
+        request._query_stats = QueryStats()
+        request._query_tracking = ExitStack()
+        request._query_tracking.enter_context(track_queries(request._query_stats))
+
+    def process_response(self, request, response):
+        stats = getattr(request, '_query_stats', None)
+        if stats is None:
+            return response
+        request._query_tracking.close()
+
+        response.query_stats = stats
+        if settings.QUERY_BUDGET_HEADERS:
+            response['X-Query-Count'] = str(stats.count)
+            response['X-Query-Time-Ms'] = f'{stats.time_ms:.1f}'
+            response['X-Query-Duplicates'] = str(stats.duplicate_count)
+
+        if response.streaming and not response.is_async:
+            # Las consultas de una respuesta streaming ocurren al enviar el
+            # cuerpo; el presupuesto se revisa cuando termina
+            response.streaming_content = self.tracked_stream(response.streaming_content, stats, request)
+        else:
+            self.check_budget(request, stats)
+        return response
+
+    def tracked_stream(self, content, stats, request):
+        iterator = iter(content)
+        while True:
+            with track_queries(stats):
+                chunk = next(iterator, None)
+            if chunk is None:
+                break
+            yield chunk
+        self.check_budget(request, stats)
+
+    def check_budget(self, request, stats):
+        match = getattr(request, 'resolver_match', None)
+        if match is None or not match.url_name:
+            return
+        budget = budget_for(match.url_name, request.method)
+        if stats.count > budget:
+            repeated = sorted(stats.duplicates.items(), key=lambda item: -item[1])[:3]
+            logger.warning(
+                '%s %s (%s): %d consultas en %.1f ms, presupuesto %d. Repetidas: %s',
+                request.method, request.path, match.url_name, stats.count,
+                stats.time_ms, budget, repeated or 'ninguna',
+            )
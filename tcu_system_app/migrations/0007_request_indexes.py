@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tcu_system_app', '0006_alter_request_revisiondate'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='request',
+            name='projectId',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tcu_system_app.project'),
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='statusId',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tcu_system_app.status'),
+        ),
+        migrations.AlterField(
+            model_name='request',
+            name='userId_student',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='student_requests', to='tcu_system_app.user'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['userId_student', 'date'], name='request_student_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['projectId', 'date'], name='request_project_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['statusId', 'date'], name='request_status_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['date'], name='request_date_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_ledger(apps, schema_editor):
+    Request = apps.get_model('tcu_system_app', 'Request')
+    HoursLedger = apps.get_model('tcu_system_app', 'HoursLedger')
+    Status = apps.get_model('tcu_system_app', 'Status')
+    # Los IDs dependen de la base, se buscan por nombre como en catalog.py
+    fields_by_name = {'pendiente': 'pendingHours', 'aceptada': 'approvedHours', 'rechazada': 'rejectedHours'}
+    status_fields = {
+        status.statusId: fields_by_name[status.name.lower()]
+        for status in Status.objects.all()
+        if status.name.lower() in fields_by_name
+    }
+
+    rows = {}
+    for owner_field in ('userId_student', 'projectId'):
+        totals = (
+            Request.objects.filter(**{f'{owner_field}__isnull': False}, statusId__in=status_fields)
+            .values(owner_field, 'statusId')
+            .annotate(hours=Sum('hoursRequested'))
+            .order_by()
+        )
+        for total in totals:
+            key = (f'{owner_field}_id', total[owner_field])
+            row = rows.setdefault(key, HoursLedger(**{key[0]: key[1]}))
+            setattr(row, status_fields[total['statusId']], total['hours'])
+    HoursLedger.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tcu_system_app', '0007_request_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HoursLedger',
+            fields=[
+                ('ledgerId', models.AutoField(primary_key=True, serialize=False)),
+                ('approvedHours', models.IntegerField(default=0)),
+                ('pendingHours', models.IntegerField(default=0)),
+                ('rejectedHours', models.IntegerField(default=0)),
+                ('projectId', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hours_ledger', to='tcu_system_app.project')),
+                ('userId_student', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hours_ledger', to='tcu_system_app.user')),
+            ],
+            options={
+                'verbose_name_plural': 'Hours ledger',
+                'constraints': [models.UniqueConstraint(condition=models.Q(('userId_student__isnull', False)), fields=('userId_student',), name='ledger_unique_student'), models.UniqueConstraint(condition=models.Q(('projectId__isnull', False)), fields=('projectId',), name='ledger_unique_project'), models.CheckConstraint(condition=models.Q(('userId_student__isnull', True), ('projectId__isnull', True), _connector='OR'), name='ledger_single_owner')],
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
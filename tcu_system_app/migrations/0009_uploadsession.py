@@ -0,0 +1,27 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:59
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tcu_system_app', '0008_hoursledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadSession',
+            fields=[
+                ('uploadId', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('fileName', models.CharField(max_length=255)),
+                ('contentType', models.CharField(blank=True, max_length=100)),
+                ('totalSize', models.BigIntegerField()),
+                ('receivedBytes', models.BigIntegerField(default=0)),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+                ('userId_student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='uploads', to='tcu_system_app.user')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tcu_system_app', '0009_uploadsession'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='contentHash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='previewStatus',
+            field=models.CharField(choices=[('pendiente', 'Pendiente'), ('lista', 'Lista'), ('ninguna', 'Sin vista previa'), ('fallida', 'Fallida')], default='pendiente', max_length=10),
+        ),
+    ]
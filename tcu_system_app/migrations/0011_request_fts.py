@@ -0,0 +1,68 @@
+from django.db import migrations
+
+
+# Índice FTS5 con contenido externo: guarda solo el índice y lee el texto de
+# la tabla de solicitudes. Los triggers lo mantienen al día con cualquier
+# escritura (vistas, admin, bulk_create, import_data).
+CREATE_FTS = [
+    '''
+    CREATE VIRTUAL TABLE tcu_system_app_request_fts USING fts5(
+        description, professorComent,
+        content='tcu_system_app_request', content_rowid='requestId',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    ''',
+    '''
+    CREATE TRIGGER tcu_system_app_request_fts_ai AFTER INSERT ON tcu_system_app_request BEGIN
+        INSERT INTO tcu_system_app_request_fts(rowid, description, professorComent)
+        VALUES (new."requestId", new.description, new."professorComent");
+    END
+    ''',
+    '''
+    CREATE TRIGGER tcu_system_app_request_fts_ad AFTER DELETE ON tcu_system_app_request BEGIN
+        INSERT INTO tcu_system_app_request_fts(tcu_system_app_request_fts, rowid, description, professorComent)
+        VALUES ('delete', old."requestId", old.description, old."professorComent");
+    END
+    ''',
+    '''
+    CREATE TRIGGER tcu_system_app_request_fts_au AFTER UPDATE OF description, "professorComent" ON tcu_system_app_request BEGIN
+        INSERT INTO tcu_system_app_request_fts(tcu_system_app_request_fts, rowid, description, professorComent)
+        VALUES ('delete', old."requestId", old.description, old."professorComent");
+        INSERT INTO tcu_system_app_request_fts(rowid, description, professorComent)
+        VALUES (new."requestId", new.description, new."professorComent");
+    END
+    ''',
+    # Indexa las solicitudes existentes
+    "INSERT INTO tcu_system_app_request_fts(tcu_system_app_request_fts) VALUES ('rebuild')",
+]
+
+DROP_FTS = [
+    'DROP TRIGGER IF EXISTS tcu_system_app_request_fts_ai',
+    'DROP TRIGGER IF EXISTS tcu_system_app_request_fts_ad',
+    'DROP TRIGGER IF EXISTS tcu_system_app_request_fts_au',
+    'DROP TABLE IF EXISTS tcu_system_app_request_fts',
+]
+
+
+def create_fts(apps, schema_editor):
+    # Solo SQLite: en otras bases search.py busca con icontains
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in CREATE_FTS:
+            schema_editor.execute(sql)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for sql in DROP_FTS:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tcu_system_app', '0010_file_preview'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
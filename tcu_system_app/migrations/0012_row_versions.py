@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:13
+
+import importlib
+
+from django.db import migrations, models
+
+# En SQLite, agregar la columna reconstruye la tabla de solicitudes y se
+# pierden los triggers del índice FTS5: se elimina antes y se vuelve a crear
+fts = importlib.import_module('tcu_system_app.migrations.0011_request_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tcu_system_app', '0011_request_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='updatedAt',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(fts.drop_fts, fts.create_fts),
+        migrations.AddField(
+            model_name='request',
+            name='updatedAt',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(fts.create_fts, fts.drop_fts),
+        migrations.AddField(
+            model_name='user',
+            name='updatedAt',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['updatedAt'], name='request_updated_idx'),
+        ),
+    ]
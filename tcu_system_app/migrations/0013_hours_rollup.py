@@ -0,0 +1,44 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tcu_system_app', '0012_row_versions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HoursRollupDirtyDay',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HoursRollupState',
+            fields=[
+                ('stateId', models.AutoField(primary_key=True, serialize=False)),
+                ('lastUpdatedAt', models.DateTimeField(blank=True, null=True)),
+                ('refreshedAt', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HoursRollup',
+            fields=[
+                ('rollupId', models.AutoField(primary_key=True, serialize=False)),
+                ('granularity', models.CharField(choices=[('semana', 'Semana'), ('mes', 'Mes')], max_length=10)),
+                ('periodStart', models.DateField()),
+                ('hours', models.IntegerField(default=0)),
+                ('requests', models.IntegerField(default=0)),
+                ('projectId', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='hours_rollup', to='tcu_system_app.project')),
+                ('statusId', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='tcu_system_app.status')),
+            ],
+            options={
+                'verbose_name_plural': 'Hours rollup',
+                'indexes': [models.Index(fields=['granularity', 'periodStart', 'projectId'], name='rollup_period_project_idx')],
+            },
+        ),
+    ]
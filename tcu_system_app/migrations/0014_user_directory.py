@@ -0,0 +1,45 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:28
+
+import django.db.models.deletion
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tcu_system_app', '0013_hours_rollup'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='projectId',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='tcu_system_app.project'),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='roleId',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, to='tcu_system_app.role'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('lastName'), django.db.models.functions.text.Lower('firstName'), models.F('userId'), name='user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(models.F('roleId'), django.db.models.functions.text.Lower('lastName'), django.db.models.functions.text.Lower('firstName'), models.F('userId'), name='user_role_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(models.F('projectId'), django.db.models.functions.text.Lower('lastName'), django.db.models.functions.text.Lower('firstName'), models.F('userId'), name='user_project_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('firstName'), name='user_first_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='user_email_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tcu_system_app', '0014_user_directory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['projectId', 'statusId'], name='request_project_status_idx'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:44
+
+import unicodedata
+
+from django.db import migrations, models
+
+
+def search_key(text):
+    # Copia de models.search_key: la migración no depende del código actual
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def backfill_search_keys(apps, schema_editor):
+    User = apps.get_model('tcu_system_app', 'User')
+    quote = schema_editor.quote_name
+    update = (
+        f"UPDATE {quote(User._meta.db_table)} SET {quote('firstNameKey')} = %s, "
+        f"{quote('lastNameKey')} = %s, {quote('emailKey')} = %s WHERE {quote('userId')} = %s"
+    )
+    last_id = 0
+    with schema_editor.connection.cursor() as cursor:
+        while True:
+            # Por bloques de userId: en SQLite no conviene escribir la tabla que se está leyendo
+            users = list(
+                User.objects.filter(userId__gt=last_id).order_by('userId')
+                .values_list('userId', 'firstName', 'lastName', 'email')[:2000]
+            )
+            if not users:
+                break
+            cursor.executemany(update, [
+                (search_key(first)[:100], search_key(last)[:100], search_key(email)[:254], user_id)
+                for user_id, first, last, email in users
+            ])
+            last_id = users[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tcu_system_app', '0015_project_stats'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_role_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_project_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_first_name_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_email_lower_idx',
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='emailKey',
+            field=models.CharField(default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='firstNameKey',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='lastNameKey',
+            field=models.CharField(default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(backfill_search_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['lastNameKey', 'firstNameKey', 'userId'], name='user_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['roleId', 'lastNameKey', 'firstNameKey', 'userId'], name='user_role_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['projectId', 'lastNameKey', 'firstNameKey', 'userId'], name='user_project_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['firstNameKey'], name='user_first_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['emailKey'], name='user_email_key_idx'),
+        ),
+    ]
@@ -1,4 +1,8 @@
+import unicodedata
+import uuid
+
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.auth.hashers import make_password
 from django.contrib.auth.hashers import check_password
 from django.utils import timezone
@@ -23,24 +27,107 @@ class Status(models.Model):
         verbose_name_plural = "Statuses"
     
     
+def _count_by_project(queryset):
+    '''
+    COUNT(*) de `queryset` para el proyecto de la fila externa, como subconsulta
+    '''
+    totals = queryset.filter(projectId=models.OuterRef('pk')).order_by().values('projectId')
+    return Coalesce(models.Subquery(totals.annotate(total=models.Count('pk')).values('total')), 0)
+
+
+class ProjectQuerySet(models.QuerySet):
+    def with_stats(self, pending_status_id):
+        '''
+        Proyectos con su profesor y, en la misma consulta, student_count,
+        pending_count, approved_hours (del ledger) y has_requests. Son
+        subconsultas correlacionadas y no JOIN + GROUP BY: estudiantes y
+        solicitudes juntos multiplicarían las filas
+        '''
+        return self.select_related('userId_professor').annotate(
+            student_count=_count_by_project(User.objects.all()),
+            pending_count=_count_by_project(Request.objects.filter(statusId=pending_status_id)),
+            approved_hours=Coalesce(models.Subquery(
+                HoursLedger.objects.filter(projectId=models.OuterRef('pk')).values('approvedHours')[:1]
+            ), 0),
+            has_requests=models.Exists(Request.objects.filter(projectId=models.OuterRef('pk'))),
+        )
+
+
 class Project(models.Model):
     projectId = models.AutoField(primary_key=True)
     code = models.CharField(max_length=50, unique=True, default='NA')
     name = models.CharField(max_length=200, unique=True)
     userId_professor = models.ForeignKey('User', on_delete=models.SET_NULL, null=True)
+    # Versión de la fila: la API JSON arma con ella ETag y Last-Modified
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    objects = ProjectQuerySet.as_manager()
 
     def __str__(self):
         return self.name
+
+    @property
+    def can_be_deleted(self):
+        '''
+        Sin estudiantes asignados ni solicitudes; requiere with_stats()
+        '''
+        return self.student_count == 0 and not self.has_requests
     
     
+def search_key(text):
+    '''
+    Texto en minúsculas y sin tildes para buscar y ordenar: LOWER() de
+    SQLite solo cambia letras ASCII ('Ángel' quedaría después de 'zoe')
+    '''
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
 class User(models.Model):
     userId = models.AutoField(primary_key=True)
-    roleId = models.ForeignKey(Role, on_delete=models.PROTECT)
+    # Las FK no llevan índice propio: los índices de Meta empiezan por ellas
+    roleId = models.ForeignKey(Role, on_delete=models.PROTECT, db_index=False)
     firstName = models.CharField(max_length=100, unique=False)
     lastName = models.CharField(max_length=100, unique=False)
     email = models.EmailField(max_length=254, unique=True)
     password = models.CharField(max_length=128, unique=False)
-    projectId = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True, blank=True)
+    projectId = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True, blank=True, db_index=False)
+    updatedAt = models.DateTimeField(auto_now=True)
+    # search_key() del nombre, el apellido y el email (set_search_keys)
+    firstNameKey = models.CharField(max_length=100, default='', editable=False)
+    lastNameKey = models.CharField(max_length=100, default='', editable=False)
+    emailKey = models.CharField(max_length=254, default='', editable=False)
+
+    SEARCH_KEYS = {'firstName': 'firstNameKey', 'lastName': 'lastNameKey', 'email': 'emailKey'}
+
+    class Meta:
+        # Directorio de usuarios (views/users.py): orden por apellido y
+        # nombre sin distinguir mayúsculas ni tildes, filtrado por rol o por
+        # proyecto, y búsqueda por prefijo del nombre, el apellido o el email
+        indexes = [
+            models.Index(fields=['lastNameKey', 'firstNameKey', 'userId'], name='user_name_idx'),
+            models.Index(fields=['roleId', 'lastNameKey', 'firstNameKey', 'userId'], name='user_role_name_idx'),
+            models.Index(fields=['projectId', 'lastNameKey', 'firstNameKey', 'userId'], name='user_project_name_idx'),
+            models.Index(fields=['firstNameKey'], name='user_first_name_idx'),
+            models.Index(fields=['emailKey'], name='user_email_key_idx'),
+        ]
+
+    def set_search_keys(self):
+        '''
+        Actualiza las columnas de búsqueda. save() lo hace solo; las cargas
+        con bulk_create deben llamarlo antes
+        '''
+        for field, key in self.SEARCH_KEYS.items():
+            setattr(self, key, search_key(getattr(self, field))[:self._meta.get_field(key).max_length])
+
+    def save(self, *args, **kwargs):
+        self.set_search_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {
+                *update_fields, *(key for field, key in self.SEARCH_KEYS.items() if field in update_fields)
+            }
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.firstName} {self.lastName}"
@@ -52,19 +139,179 @@ class User(models.Model):
         return check_password(raw_password, self.password)
     
     
+class RequestQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        '''
+        Solicitudes que el usuario puede ver según su rol, en una sola consulta:
+        el estudiante las suyas, el profesor las de sus proyectos (JOIN con el
+        proyecto, sin consultarlos antes) y el administrador todas
+        '''
+        user_role = user.roleId.name.lower()
+        if user_role == 'estudiante':
+            return self.filter(userId_student=user)
+        if user_role == 'profesor':
+            return self.filter(projectId__userId_professor=user)
+        return self.all()
+
+
 class Request(models.Model):
     requestId = models.AutoField(primary_key=True)
-    userId_student = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='student_requests')
-    projectId = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True)
-    statusId = models.ForeignKey(Status, on_delete=models.SET_NULL, null=True)
+    # Las FK no llevan índice propio: los índices compuestos de Meta empiezan por ellas
+    userId_student = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='student_requests', db_index=False)
+    projectId = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True, db_index=False)
+    statusId = models.ForeignKey(Status, on_delete=models.SET_NULL, null=True, db_index=False)
     hoursRequested = models.IntegerField()
     description = models.TextField()
     date = models.DateField(auto_now_add=False)
     professorComent = models.TextField(null=True, blank=True)
     revisionDate = models.DateField(null=True, blank=True, default=timezone.now)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    objects = RequestQuerySet.as_manager()
+
+    class Meta:
+        # Índices para los accesos de las vistas: filtro por estudiante,
+        # proyecto o estado y orden por fecha descendente
+        indexes = [
+            models.Index(fields=['userId_student', 'date'], name='request_student_date_idx'),
+            models.Index(fields=['projectId', 'date'], name='request_project_date_idx'),
+            # Solicitudes por estado de cada proyecto (Project.objects.with_stats)
+            models.Index(fields=['projectId', 'statusId'], name='request_project_status_idx'),
+            models.Index(fields=['statusId', 'date'], name='request_status_date_idx'),
+            models.Index(fields=['date'], name='request_date_idx'),
+            # MAX(updatedAt) de todas las solicitudes sin recorrer la tabla (api.py)
+            models.Index(fields=['updatedAt'], name='request_updated_idx'),
+        ]
+
+    def is_visible_to(self, user):
+        '''
+        Mismo criterio que visible_to() para una solicitud ya cargada (el
+        profesor necesita projectId en el select_related)
+        '''
+        user_role = user.roleId.name.lower()
+        if user_role == 'estudiante':
+            return self.userId_student_id == user.userId
+        if user_role == 'profesor':
+            return self.projectId_id is not None and self.projectId.userId_professor_id == user.userId
+        return True
     
     
 class File(models.Model):
+    # Estados de la vista previa (previews.py)
+    PREVIEW_PENDING = 'pendiente'
+    PREVIEW_READY = 'lista'
+    PREVIEW_NONE = 'ninguna'
+    PREVIEW_FAILED = 'fallida'
+    PREVIEW_STATUSES = [
+        (PREVIEW_PENDING, 'Pendiente'),
+        (PREVIEW_READY, 'Lista'),
+        (PREVIEW_NONE, 'Sin vista previa'),
+        (PREVIEW_FAILED, 'Fallida'),
+    ]
+
     fileId = models.AutoField(primary_key=True)
     requestId = models.ForeignKey(Request, on_delete=models.CASCADE)
-    filePath = models.FileField(upload_to='uploads/')
\ No newline at end of file
+    filePath = models.FileField(upload_to='uploads/')
+    # SHA-256 del contenido; las vistas previas se guardan con este nombre
+    contentHash = models.CharField(max_length=64, blank=True)
+    previewStatus = models.CharField(max_length=10, choices=PREVIEW_STATUSES, default=PREVIEW_PENDING)
+
+    @property
+    def has_preview(self):
+        return self.previewStatus == self.PREVIEW_READY
+
+
+class UploadSession(models.Model):
+    '''
+    Archivo que un estudiante está subiendo por partes. Las partes se
+    escriben en UPLOAD_TEMP_DIR y el archivo pasa a File al crear la
+    solicitud. El ID es aleatorio porque el cliente lo usa para reanudar.
+    '''
+    uploadId = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    userId_student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='uploads')
+    fileName = models.CharField(max_length=255)
+    contentType = models.CharField(max_length=100, blank=True)
+    totalSize = models.BigIntegerField()
+    receivedBytes = models.BigIntegerField(default=0)
+    createdAt = models.DateTimeField(auto_now_add=True)
+
+    @property
+    def is_complete(self):
+        return self.receivedBytes == self.totalSize
+
+
+class HoursLedger(models.Model):
+    '''
+    Totales de horas por estado, mantenidos de forma incremental. Cada fila
+    pertenece a un estudiante o a un proyecto (la otra FK queda en NULL).
+    Las FK no llevan índice propio: los índices únicos parciales las cubren.
+    '''
+    ledgerId = models.AutoField(primary_key=True)
+    userId_student = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='hours_ledger', db_index=False)
+    projectId = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name='hours_ledger', db_index=False)
+    approvedHours = models.IntegerField(default=0)
+    pendingHours = models.IntegerField(default=0)
+    rejectedHours = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Hours ledger"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['userId_student'],
+                condition=models.Q(userId_student__isnull=False),
+                name='ledger_unique_student',
+            ),
+            models.UniqueConstraint(
+                fields=['projectId'],
+                condition=models.Q(projectId__isnull=False),
+                name='ledger_unique_project',
+            ),
+            models.CheckConstraint(
+                condition=models.Q(userId_student__isnull=True) | models.Q(projectId__isnull=True),
+                name='ledger_single_owner',
+            ),
+        ]
+
+
+class HoursRollup(models.Model):
+    '''
+    Horas y cantidad de solicitudes por periodo (semana o mes, según la
+    fecha de la solicitud), proyecto y estado. rollup.py lo mantiene a
+    partir de las solicitudes que cambiaron desde la última actualización.
+    '''
+    WEEK = 'semana'
+    MONTH = 'mes'
+    GRANULARITIES = [(WEEK, 'Semana'), (MONTH, 'Mes')]
+
+    rollupId = models.AutoField(primary_key=True)
+    granularity = models.CharField(max_length=10, choices=GRANULARITIES)
+    # Lunes de la semana o primer día del mes
+    periodStart = models.DateField()
+    projectId = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name='hours_rollup', db_index=False)
+    statusId = models.ForeignKey(Status, on_delete=models.CASCADE, null=True, blank=True, related_name='+', db_index=False)
+    hours = models.IntegerField(default=0)
+    requests = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "Hours rollup"
+        indexes = [
+            models.Index(fields=['granularity', 'periodStart', 'projectId'], name='rollup_period_project_idx'),
+        ]
+
+
+class HoursRollupState(models.Model):
+    '''
+    Fila única con el punto hasta donde se procesaron las solicitudes
+    (su updatedAt más reciente) y la fecha de la última actualización
+    '''
+    stateId = models.AutoField(primary_key=True)
+    lastUpdatedAt = models.DateTimeField(null=True, blank=True)
+    refreshedAt = models.DateTimeField(null=True, blank=True)
+
+
+class HoursRollupDirtyDay(models.Model):
+    '''
+    Días cuyos periodos hay que recalcular aunque ninguna solicitud de ese
+    día tenga un updatedAt nuevo: solicitudes eliminadas o movidas a otra fecha
+    '''
+    day = models.DateField(primary_key=True)
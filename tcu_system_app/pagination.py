@@ -0,0 +1,153 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    '''
+    Página obtenida con paginación por cursor (keyset). Los cursores apuntan
+    a la primera y a la última fila de la página
+    '''
+    def __init__(self, items, has_next, has_previous, next_cursor, previous_cursor):
+        self.items = items
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _field_value(obj, field):
+    # Filas de values() (API JSON) o instancias del modelo
+    return obj[field] if isinstance(obj, dict) else getattr(obj, field)
+
+
+def encode_cursor(obj, fields):
+    # Los números se guardan como tales para comparar bien columnas calculadas (rank)
+    values = [
+        value if isinstance(value, (int, float)) else str(value)
+        for value in (_field_value(obj, field) for field in fields)
+    ]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def _cursor_field(queryset, name):
+    # Columna del modelo o anotación (rank, claves en minúsculas)
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    return queryset.model._meta.get_field(name)
+
+
+def decode_cursor(cursor, fields, queryset=None):
+    '''
+    Devuelve los valores del cursor o None si el cursor no es válido. Con
+    `queryset` cada valor se convierte con el campo de su columna, así un
+    cursor alterado se ignora en lugar de fallar en la consulta.
+    '''
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, UnicodeError):
+        return None
+    if not isinstance(values, list) or len(values) != len(fields):
+        return None
+    if queryset is None:
+        return values
+    try:
+        values = [_cursor_field(queryset, field).to_python(value) for field, value in zip(fields, values)]
+    except (FieldDoesNotExist, ValidationError, TypeError, ValueError):
+        return None
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+def _keyset_filter(fields, values, descending):
+    '''
+    Construye la condición (f1, f2, ...) < (v1, v2, ...) (o > si es ascendente).
+    La primera columna se acota también con <= / >= para que la base de datos
+    pueda recorrer el índice como un rango.
+    '''
+    strict = 'lt' if descending else 'gt'
+    bound = 'lte' if descending else 'gte'
+    condition = Q()
+    for i, field in enumerate(fields):
+        term = Q(**{f'{field}__{strict}': values[i]})
+        for previous_field, previous_value in zip(fields[:i], values[:i]):
+            term &= Q(**{previous_field: previous_value})
+        condition |= term
+    return Q(**{f'{fields[0]}__{bound}': values[0]}) & condition
+
+
+def _keyset_query(queryset, fields, after, before, descending):
+    def order(reverse):
+        prefix = '-' if descending != reverse else ''
+        return [f'{prefix}{field}' for field in fields]
+
+    backwards = before is not None and after is None
+    cursor = decode_cursor(before if backwards else after, fields, queryset) if (after or before) else None
+    # Sin cursor válido se muestra la primera página
+    backwards = backwards and cursor is not None
+
+    queryset = queryset.order_by(*order(reverse=backwards))
+    if cursor is not None:
+        queryset = queryset.filter(_keyset_filter(fields, cursor, descending != backwards))
+    return queryset, backwards, cursor
+
+
+def _keyset_page(rows, fields, page_size, backwards, cursor):
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if backwards:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, cursor is not None
+
+    return KeysetPage(
+        items=rows,
+        has_next=has_next and bool(rows),
+        has_previous=has_previous and bool(rows),
+        next_cursor=encode_cursor(rows[-1], fields) if rows else None,
+        previous_cursor=encode_cursor(rows[0], fields) if rows else None,
+    )
+
+
+def keyset_paginate(queryset, fields, page_size, after=None, before=None, descending=True):
+    '''
+    Pagina un queryset por las columnas `fields` (la última debe ser única).
+    `after` avanza a la página siguiente y `before` retrocede a la anterior;
+    el costo de cualquier página es el mismo que el de la primera.
+    '''
+    queryset, backwards, cursor = _keyset_query(queryset, fields, after, before, descending)
+    rows = list(queryset[:page_size + 1])
+    return _keyset_page(rows, fields, page_size, backwards, cursor)
+
+
+async def akeyset_paginate(queryset, fields, page_size, after=None, before=None, descending=True):
+    '''
+    Versión asíncrona de keyset_paginate
+    '''
+    queryset, backwards, cursor = _keyset_query(queryset, fields, after, before, descending)
+    rows = [row async for row in queryset[:page_size + 1]]
+    return _keyset_page(rows, fields, page_size, backwards, cursor)
+
+
+def get_page_size(request, default, maximum):
+    '''
+    Lee el tamaño de página de la query string, acotado a [1, maximum]
+    '''
+    try:
+        size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
@@ -0,0 +1,196 @@
+'''
+Miniaturas y vistas previas de la primera página de los adjuntos. Se
+generan en un pool de hilos después de guardar el File (signals.py) y se
+guardan en PREVIEW_ROOT con el hash del contenido como nombre, así que un
+mismo archivo subido varias veces se procesa una sola vez.
+'''
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+from .models import File
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow es opcional, solo se usa para imágenes
+    Image = None
+
+
+logger = logging.getLogger('tcu_system_app.previews')
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+PDF_EXTENSIONS = {'.pdf'}
+
+
+def preview_path(content_hash, size):
+    return os.path.join(settings.PREVIEW_ROOT, content_hash[:2], f'{content_hash}-{size}.jpg')
+
+
+def hash_file(field_file):
+    digest = hashlib.sha256()
+    with field_file.open('rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _pdftoppm():
+    return shutil.which(settings.PREVIEW_PDFTOPPM)
+
+
+def preview_kind(name):
+    '''
+    'image' o 'pdf' si hay con qué generar la vista previa, None si no
+    '''
+    extension = os.path.splitext(name)[1].lower()
+    if extension in IMAGE_EXTENSIONS and Image is not None:
+        return 'image'
+    if extension in PDF_EXTENSIONS and _pdftoppm():
+        return 'pdf'
+    return None
+
+
+def _save_atomic(path, write):
+    '''
+    Escribe en un temporal y lo renombra, para que la vista nunca sirva un
+    archivo a medias
+    '''
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp = tempfile.mkstemp(suffix='.jpg', dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        write(temp)
+        os.replace(temp, path)
+    except BaseException:
+        os.remove(temp)
+        raise
+
+
+def _resize(source, target, size):
+    with Image.open(source) as image:
+        # Con JPEG se decodifica directo a una escala menor
+        image.draft('RGB', (size, size))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        image.convert('RGB').save(target, 'JPEG', quality=80, optimize=True)
+
+
+def _render_pdf_page(source, target, size):
+    # pdftoppm agrega la extensión al prefijo de salida
+    prefix = target[:-len('.jpg')]
+    subprocess.run(
+        [_pdftoppm(), '-f', '1', '-l', '1', '-singlefile', '-jpeg', '-scale-to', str(size), source, prefix],
+        check=True, capture_output=True, timeout=settings.PREVIEW_TIMEOUT,
+    )
+
+
+def _local_copy(field_file):
+    '''
+    Ruta local del archivo y si es una copia temporal que hay que borrar
+    (almacenamientos sin sistema de archivos)
+    '''
+    try:
+        return field_file.path, False
+    except NotImplementedError:
+        fd, temp = tempfile.mkstemp(suffix=os.path.splitext(field_file.name)[1])
+        with os.fdopen(fd, 'wb') as out, field_file.open('rb') as f:
+            shutil.copyfileobj(f, out)
+        return temp, True
+
+
+def render(field_file, content_hash, kind):
+    source, is_copy = _local_copy(field_file)
+    try:
+        for name, size in settings.PREVIEW_SIZES.items():
+            path = preview_path(content_hash, name)
+            if kind == 'pdf':
+                _save_atomic(path, lambda target: _render_pdf_page(source, target, size))
+            else:
+                _save_atomic(path, lambda target: _resize(source, target, size))
+    finally:
+        if is_copy:
+            os.remove(source)
+
+
+def generate(file_id):
+    '''
+    Calcula el hash del archivo y genera sus vistas previas si no estaban
+    ya en disco. Devuelve el estado final.
+    '''
+    file_record = File.objects.filter(pk=file_id).first()
+    if file_record is None:
+        return None
+
+    content_hash = file_record.contentHash
+    try:
+        content_hash = content_hash or hash_file(file_record.filePath)
+        kind = preview_kind(file_record.filePath.name)
+        if kind is None:
+            status = File.PREVIEW_NONE
+        else:
+            cached = all(os.path.exists(preview_path(content_hash, name)) for name in settings.PREVIEW_SIZES)
+            if not cached:
+                render(file_record.filePath, content_hash, kind)
+            status = File.PREVIEW_READY
+    except Exception:
+        logger.exception("No se pudo generar la vista previa del archivo %s", file_id)
+        status = File.PREVIEW_FAILED
+
+    File.objects.filter(pk=file_id).update(contentHash=content_hash, previewStatus=status)
+    return status
+
+
+class PreviewPool:
+    '''
+    Pool de hilos para generar vistas previas fuera de la petición. Pillow y
+    pdftoppm no retienen el GIL mientras trabajan. Admite como máximo
+    `workers` tareas en ejecución más `queue_limit` en espera; lo que no
+    cabe queda pendiente para `manage.py generate_previews`.
+    '''
+    def __init__(self, workers, queue_limit):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='preview')
+        self._slots = threading.BoundedSemaphore(workers + queue_limit)
+
+    def submit(self, file_id):
+        if not self._slots.acquire(blocking=False):
+            return False
+        try:
+            future = self._executor.submit(self._run, file_id)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return True
+
+    def _run(self, file_id):
+        try:
+            generate(file_id)
+        finally:
+            # Cada hilo abre su propia conexión
+            connections.close_all()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_preview_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PreviewPool(settings.PREVIEW_WORKERS, settings.PREVIEW_QUEUE_LIMIT)
+    return _pool
+
+
+def schedule(file_id):
+    if not get_preview_pool().submit(file_id):
+        logger.warning("Pool de vistas previas lleno; el archivo %s queda pendiente", file_id)
@@ -0,0 +1,81 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+
+# Listas de parámetros de largo variable (IN (...), VALUES ...) se reducen a
+# una sola forma para que dos consultas iguales cuenten como duplicadas
+_PARAM_LIST_RE = re.compile(r'%s(?:\s*,\s*%s)+')
+_VALUES_LIST_RE = re.compile(r'\(%s\.\.\.\)(?:\s*,\s*\(%s\.\.\.\))+')
+
+
+def sql_shape(sql):
+    '''
+    Forma de la consulta, sin importar cuántos parámetros lleve
+    '''
+    shape = _PARAM_LIST_RE.sub('%s...', sql)
+    return _VALUES_LIST_RE.sub('(%s...)...', shape)
+
+
+class QueryStats:
+    '''
+    Consultas ejecutadas durante una petición: cantidad, tiempo total y
+    cuántas veces se repitió cada forma de consulta
+    '''
+    def __init__(self):
+        self.count = 0
+        self.time = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - started
+            self.count += 1
+            self.shapes[sql_shape(sql)] += 1
+
+    @property
+    def time_ms(self):
+        return self.time * 1000
+
+    @property
+    def duplicates(self):
+        '''
+        {forma: repeticiones} de las consultas ejecutadas más de una vez;
+        suelen indicar un N+1
+        '''
+        return {shape: count for shape, count in self.shapes.items() if count > 1}
+
+    @property
+    def duplicate_count(self):
+        return sum(count - 1 for count in self.duplicates.values())
+
+
+@contextmanager
+def track_queries(stats=None):
+    '''
+    Registra en `stats` las consultas de todas las conexiones mientras dure el bloque
+    '''
+    stats = stats if stats is not None else QueryStats()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        yield stats
+
+
+def budget_for(url_name, method='GET'):
+    '''
+    Máximo de consultas permitido para la vista con ese nombre de URL. El
+    presupuesto puede ser un número o uno por método ({'GET': 3, 'POST': 8});
+    los métodos que no aparecen usan el de GET
+    '''
+    budget = settings.QUERY_BUDGETS.get(url_name, settings.QUERY_BUDGET_DEFAULT)
+    if isinstance(budget, dict):
+        return budget.get(method, budget.get('GET', settings.QUERY_BUDGET_DEFAULT))
+    return budget
@@ -0,0 +1,229 @@
+'''
+Horas por semana y por mes precalculadas en HoursRollup. refresh() recalcula
+solo los periodos de las solicitudes con updatedAt posterior a la última
+ejecución y los de los días marcados en HoursRollupDirtyDay (señales). Las
+consultas de un rango suman los periodos completos y leen de Request solo
+los días sueltos de los extremos.
+'''
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from . import ledger
+from .models import HoursRollup, HoursRollupDirtyDay, HoursRollupState, Project, Request, User
+
+
+TRUNC = {HoursRollup.WEEK: TruncWeek, HoursRollup.MONTH: TruncMonth}
+
+PERIODS_PER_QUERY = 100
+
+# Agrupaciones del reporte
+GROUP_PROJECT = 'proyecto'
+GROUP_PROFESSOR = 'profesor'
+GROUP_TOTAL = 'total'
+GROUPS = [GROUP_PROJECT, GROUP_PROFESSOR, GROUP_TOTAL]
+
+
+def period_start(granularity, day):
+    if granularity == HoursRollup.WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def next_period(granularity, start):
+    if granularity == HoursRollup.WEEK:
+        return start + timedelta(days=7)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def _totals(requests, granularity):
+    '''
+    Horas y cantidad por (periodo, proyecto, estado) de las solicitudes dadas
+    '''
+    return (
+        requests.annotate(period=TRUNC[granularity]('date'))
+        .values('period', 'projectId', 'statusId')
+        .annotate(hours=Sum('hoursRequested'), count=Count('pk'))
+        .order_by()
+    )
+
+
+def _rebuild_periods(granularity, starts):
+    '''
+    Reemplaza las filas de los periodos indicados (None: todos)
+    '''
+    if starts is None:
+        HoursRollup.objects.filter(granularity=granularity).delete()
+        return _insert_totals(granularity, Request.objects.all())
+
+    rows = 0
+    # Por bloques, para no armar condiciones OR enormes
+    for i in range(0, len(starts), PERIODS_PER_QUERY):
+        chunk = starts[i:i + PERIODS_PER_QUERY]
+        HoursRollup.objects.filter(granularity=granularity, periodStart__in=chunk).delete()
+        ranges = Q()
+        for start in chunk:
+            ranges |= Q(date__gte=start, date__lt=next_period(granularity, start))
+        rows += _insert_totals(granularity, Request.objects.filter(ranges))
+    return rows
+
+
+def _insert_totals(granularity, requests):
+    rows = [
+        HoursRollup(
+            granularity=granularity, periodStart=total['period'], projectId_id=total['projectId'],
+            statusId_id=total['statusId'], hours=total['hours'], requests=total['count'],
+        )
+        for total in _totals(requests, granularity)
+    ]
+    HoursRollup.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def mark_dirty(*days):
+    '''
+    Marca días para recalcular en la próxima actualización
+    '''
+    days = {day for day in days if day is not None}
+    if days:
+        HoursRollupDirtyDay.objects.bulk_create(
+            [HoursRollupDirtyDay(day=day) for day in days], ignore_conflicts=True
+        )
+
+
+def refresh(full=False):
+    '''
+    Actualiza el rollup. La primera vez (o con full=True) lo arma desde cero.
+    Devuelve la cantidad de filas escritas.
+    '''
+    with transaction.atomic():
+        state = HoursRollupState.objects.select_for_update().first() or HoursRollupState.objects.create()
+        dirty_days = list(HoursRollupDirtyDay.objects.values_list('day', flat=True))
+
+        if full or state.lastUpdatedAt is None:
+            changed = Request.objects.all()
+            days = None
+        else:
+            # Se repasa un margen antes del último punto: una transacción que
+            # tomó su updatedAt antes pero confirmó después no se pierde
+            since = state.lastUpdatedAt - timedelta(seconds=settings.HOURS_ROLLUP_OVERLAP_SECONDS)
+            changed = Request.objects.filter(updatedAt__gt=since)
+            days = set(changed.values_list('date', flat=True).distinct().order_by()) | set(dirty_days)
+
+        last_updated = changed.aggregate(last=Max('updatedAt'))['last']
+        rows = 0
+        for granularity in TRUNC:
+            starts = None if days is None else sorted({period_start(granularity, day) for day in days})
+            rows += _rebuild_periods(granularity, starts)
+
+        HoursRollupDirtyDay.objects.filter(day__in=dirty_days).delete()
+        state.lastUpdatedAt = max(filter(None, [state.lastUpdatedAt, last_updated]), default=None)
+        state.refreshedAt = timezone.now()
+        state.save()
+    return rows
+
+
+def last_refresh():
+    state = HoursRollupState.objects.first()
+    return state.refreshedAt if state else None
+
+
+def hours_by_period(granularity, start, end, project_ids=None):
+    '''
+    {(inicio del periodo, projectId, statusId): [horas, solicitudes]} para
+    las solicitudes con fecha entre `start` y `end` (inclusive). Los periodos
+    completos salen del rollup; los extremos incompletos, de Request.
+    `project_ids` limita a esos proyectos (None: todos).
+    '''
+    first_full = period_start(granularity, start)
+    if first_full < start:
+        first_full = next_period(granularity, first_full)
+    last_full = period_start(granularity, end)
+    if next_period(granularity, last_full) > end + timedelta(days=1):
+        last_full = period_start(granularity, last_full - timedelta(days=1))
+
+    totals = {}
+
+    def add(period, project_id, status_id, hours, count):
+        bucket = totals.setdefault((period, project_id, status_id), [0, 0])
+        bucket[0] += hours
+        bucket[1] += count
+
+    # Días sueltos al inicio y al final del rango
+    edges = Q()
+    if first_full > last_full:
+        edges = Q(date__gte=start, date__lte=end)
+    else:
+        if start < first_full:
+            edges |= Q(date__gte=start, date__lt=first_full)
+        end_of_full = next_period(granularity, last_full)
+        if end_of_full <= end:
+            edges |= Q(date__gte=end_of_full, date__lte=end)
+
+    if edges:
+        requests = Request.objects.filter(edges)
+        if project_ids is not None:
+            requests = requests.filter(projectId__in=project_ids)
+        for total in _totals(requests, granularity):
+            add(total['period'], total['projectId'], total['statusId'], total['hours'], total['count'])
+
+    if first_full <= last_full:
+        buckets = HoursRollup.objects.filter(
+            granularity=granularity, periodStart__gte=first_full, periodStart__lte=last_full
+        )
+        if project_ids is not None:
+            buckets = buckets.filter(projectId__in=project_ids)
+        for bucket in buckets.values_list('periodStart', 'projectId', 'statusId', 'hours', 'requests'):
+            add(*bucket)
+
+    return totals
+
+
+def report(granularity, start, end, group, professor=None):
+    '''
+    Filas del reporte ordenadas por periodo: horas enviadas (todas),
+    aprobadas, pendientes y rechazadas por proyecto, por profesor o en
+    total. Con `professor` solo se cuentan sus proyectos.
+    '''
+    projects = Project.objects.all()
+    if professor is not None:
+        projects = projects.filter(userId_professor=professor)
+    projects = {
+        project_id: (name, professor_id)
+        for project_id, name, professor_id in projects.values_list('projectId', 'name', 'userId_professor_id')
+    }
+    totals = hours_by_period(granularity, start, end, None if professor is None else list(projects))
+
+    if group == GROUP_PROFESSOR:
+        names = {
+            user_id: f'{first} {last}'
+            for user_id, first, last in User.objects.filter(
+                pk__in={professor_id for _, professor_id in projects.values()}
+            ).values_list('userId', 'firstName', 'lastName')
+        }
+
+    status_fields = ledger.status_fields()
+    rows = {}
+    for (period, project_id, status_id), (hours, count) in totals.items():
+        if group == GROUP_PROJECT:
+            key, name = project_id, projects.get(project_id, ('Sin proyecto', None))[0]
+        elif group == GROUP_PROFESSOR:
+            key = projects.get(project_id, (None, None))[1]
+            name = names.get(key, 'Sin profesor')
+        else:
+            key, name = None, 'Total'
+        row = rows.setdefault((period, key), {
+            'period': period, 'id': key, 'name': name, 'submittedHours': 0,
+            'approvedHours': 0, 'pendingHours': 0, 'rejectedHours': 0, 'requests': 0,
+        })
+        row['submittedHours'] += hours
+        row['requests'] += count
+        field = status_fields.get(status_id)
+        if field:
+            row[field] += hours
+
+    return sorted(rows.values(), key=lambda row: (row['period'], row['name']))
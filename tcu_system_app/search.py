@@ -0,0 +1,80 @@
+'''
+Búsqueda de texto en la descripción y el comentario del profesor de las
+solicitudes. En SQLite usa el índice FTS5 tcu_system_app_request_fts
+(migración 0011) y ordena por relevancia (bm25); en otras bases filtra con
+icontains y se mantiene el orden por fecha.
+'''
+import re
+
+from django.db import connections, router
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Request
+
+
+FTS_TABLE = 'tcu_system_app_request_fts'
+
+# Orden de las páginas de resultados: (campos, descendente)
+RANKED_ORDER = (('rank', 'requestId'), False)
+DATE_ORDER = (('date', 'requestId'), True)
+
+_TERM_RE = re.compile(r'\w+')
+
+
+def terms(text):
+    return _TERM_RE.findall(text or '')[:10]
+
+
+def fts_available(queryset=None):
+    alias = queryset.db if queryset is not None else router.db_for_read(Request)
+    return connections[alias].vendor == 'sqlite'
+
+
+def match_expression(text):
+    '''
+    Consulta MATCH de FTS5 a partir de lo que escribió el usuario: cada
+    palabra entre comillas (así no se interpretan operadores) y como
+    prefijo, todas obligatorias
+    '''
+    return ' '.join(f'"{term}"*' for term in terms(text))
+
+
+def search_requests(queryset, text, ranked=True):
+    '''
+    Filtra el queryset a las solicitudes que coinciden con `text`. Con FTS5
+    y `ranked` agrega la anotación `rank` (menor es más relevante).
+    '''
+    words = terms(text)
+    if not words:
+        return queryset.none()
+
+    if not fts_available(queryset):
+        condition = Q()
+        for word in words:
+            condition &= Q(description__icontains=word) | Q(professorComent__icontains=word)
+        return queryset.filter(condition)
+
+    match = match_expression(text)
+    if not ranked:
+        return queryset.filter(
+            requestId__in=RawSQL(f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s', (match,))
+        )
+
+    # bm25() solo se puede calcular en la consulta que hace el MATCH, así que
+    # el índice se une a la tabla de solicitudes (no tiene modelo propio).
+    # Una subconsulta por fila repetiría el MATCH para cada solicitud.
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = "{Request._meta.db_table}"."requestId"', f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+    ).annotate(rank=RawSQL(f'bm25({FTS_TABLE})', (), output_field=FloatField()))
+
+
+def result_order(text, queryset=None):
+    '''
+    Campos y sentido de la paginación por cursor para los resultados
+    '''
+    if text and terms(text) and fts_available(queryset):
+        return RANKED_ORDER
+    return DATE_ORDER
@@ -0,0 +1,204 @@
+from contextlib import contextmanager
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import catalog, dashboard_cache, ledger, previews, rollup
+from .middleware import invalidate_current_user
+from .models import File, Project, Request, Role, Status, User
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    # edit_user, delete_user y el admin pasan por aquí
+    invalidate_current_user(instance.pk)
+
+
+@receiver(post_save, sender=Project)
+def invalidate_project_members(sender, instance, **kwargs):
+    # El usuario en cache lleva su proyecto cargado
+    invalidate_current_user(*User.objects.filter(projectId=instance.pk).values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Project)
+def remember_project_members(sender, instance, **kwargs):
+    # En post_delete la FK de los miembros ya quedó en NULL (SET_NULL)
+    instance._member_ids = list(User.objects.filter(projectId=instance.pk).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Project)
+def invalidate_deleted_project_members(sender, instance, **kwargs):
+    invalidate_current_user(*getattr(instance, '_member_ids', ()))
+
+
+@receiver([post_save, post_delete], sender=Role)
+def invalidate_role_members(sender, instance, **kwargs):
+    invalidate_current_user(*User.objects.filter(roleId=instance.pk).values_list('pk', flat=True))
+
+
+@receiver([post_save, post_delete], sender=Status)
+@receiver([post_save, post_delete], sender=Role)
+def invalidate_catalog(sender, **kwargs):
+    # Ediciones de estados o roles desde el admin
+    catalog.invalidate()
+
+
+@receiver(post_save, sender=File)
+def schedule_preview(sender, instance, created, **kwargs):
+    # El worker lee el archivo con otra conexión: se espera al commit
+    if created and settings.PREVIEW_WORKERS:
+        transaction.on_commit(partial(previews.schedule, instance.pk))
+
+
+# Al eliminar un usuario o un proyecto, Django deja en NULL las FK que lo
+# apuntan con update(), que no actualiza updatedAt. Se marca antes para que
+# la API JSON (views/api.py) cambie de ETag.
+
+@receiver(pre_delete, sender=User)
+def touch_user_references(sender, instance, **kwargs):
+    now = timezone.now()
+    Request.objects.filter(userId_student=instance.pk).update(updatedAt=now)
+    Project.objects.filter(userId_professor=instance.pk).update(updatedAt=now)
+
+
+@receiver(pre_delete, sender=Project)
+def touch_project_references(sender, instance, **kwargs):
+    now = timezone.now()
+    Request.objects.filter(projectId=instance.pk).update(updatedAt=now)
+    User.objects.filter(projectId=instance.pk).update(updatedAt=now)
+
+
+# Dashboards (dashboard_cache.py). Se recuerda a quién pertenecía cada
+# solicitud o proyecto al cargarlo, para invalidar también al dueño anterior
+# si se reasigna desde el admin.
+
+@receiver(post_init, sender=Request)
+def remember_request_owners(sender, instance, **kwargs):
+    # Sin leer los campos diferidos: cargarlos crea otra instancia y vuelve aquí
+    instance._dashboard_owners = (instance.__dict__.get('userId_student_id'), instance.__dict__.get('projectId_id'))
+
+
+@receiver(post_init, sender=Project)
+def remember_project_professor(sender, instance, **kwargs):
+    instance._dashboard_professor = instance.userId_professor_id
+
+
+@receiver([post_save, post_delete], sender=Request)
+def invalidate_request_dashboards(sender, instance, **kwargs):
+    old_student, old_project = getattr(instance, '_dashboard_owners', (None, None))
+    project_ids = {old_project, instance.projectId_id} - {None}
+    professor_ids = Project.objects.filter(pk__in=project_ids).values_list('userId_professor_id', flat=True)
+    dashboard_cache.invalidate(
+        student_ids={old_student, instance.userId_student_id},
+        professor_ids=set(professor_ids),
+    )
+    instance._dashboard_owners = (instance.userId_student_id, instance.projectId_id)
+
+
+@receiver([post_save, pre_delete], sender=Project)
+def invalidate_project_dashboards(sender, instance, **kwargs):
+    # El nombre del proyecto aparece en las solicitudes recientes de sus
+    # estudiantes; antes de eliminarlo todavía se pueden consultar
+    student_ids = Request.objects.filter(projectId=instance.pk).values_list('userId_student_id', flat=True).distinct()
+    dashboard_cache.invalidate(
+        student_ids=set(student_ids),
+        professor_ids={getattr(instance, '_dashboard_professor', None), instance.userId_professor_id},
+    )
+    instance._dashboard_professor = instance.userId_professor_id
+
+
+@receiver([post_save, pre_delete], sender=User)
+def invalidate_user_dashboards(sender, instance, **kwargs):
+    # El nombre del estudiante aparece en los dashboards de los profesores
+    # de sus solicitudes; el rol o el proyecto cambian el alcance del propio
+    professor_ids = Project.objects.filter(
+        request__userId_student=instance.pk
+    ).values_list('userId_professor_id', flat=True).distinct()
+    dashboard_cache.invalidate(student_ids={instance.pk}, professor_ids={instance.pk, *professor_ids})
+
+
+# Rollup de horas (rollup.py). Las solicitudes nuevas o editadas se detectan
+# por updatedAt; aquí se marcan los días que dejan de tener una solicitud.
+
+@receiver(post_init, sender=Request)
+def remember_request_date(sender, instance, **kwargs):
+    # Sin leer el campo si se difirió con only()/defer()
+    instance._rollup_date = instance.__dict__.get('date')
+
+
+@receiver(post_save, sender=Request)
+def mark_moved_request_day(sender, instance, created, **kwargs):
+    old_date = instance._rollup_date
+    if not created and old_date is not None and old_date != instance.date:
+        rollup.mark_dirty(old_date)
+    instance._rollup_date = instance.date
+
+
+@receiver(post_delete, sender=Request)
+def mark_deleted_request_day(sender, instance, **kwargs):
+    rollup.mark_dirty(instance._rollup_date)
+
+
+# Ledger de horas (ledger.py). Cada solicitud guardada o eliminada una por
+# una (vistas, admin, shell) mueve sus horas aquí; las escrituras masivas
+# (bulk_review, import_data, generate_data) lo actualizan por su cuenta.
+
+@receiver(post_init, sender=Request)
+def remember_ledger_values(sender, instance, **kwargs):
+    instance._ledger_values = ledger.tracked_values(instance)
+
+
+@receiver(pre_save, sender=Request)
+def load_deferred_ledger_values(sender, instance, using, **kwargs):
+    # Cargada con only()/defer(): se leen los valores anteriores de la base
+    if instance._ledger_values is None and not instance._state.adding:
+        instance._ledger_values = ledger.stored_values(instance.pk, using=using)
+
+
+@receiver(post_save, sender=Request)
+def update_ledger(sender, instance, created, using, **kwargs):
+    # El ledger está en la misma base que la solicitud
+    new_values = ledger.tracked_values(instance) or ledger.stored_values(instance.pk, using=using)
+    ledger.record_change(None if created else instance._ledger_values, new_values, using)
+    instance._ledger_values = new_values
+
+
+@receiver(post_delete, sender=Request)
+def remove_from_ledger(sender, instance, using, **kwargs):
+    ledger.record_change(instance._ledger_values, None, using)
+
+
+# Receptores que corren por cada fila eliminada. Mientras están conectados,
+# Django no puede borrar con un solo DELETE y cada fila hace sus consultas.
+# generate_data --clear los desconecta y recalcula ledger y rollup al final.
+DELETE_RECEIVERS = [
+    (post_delete, invalidate_user, User),
+    (pre_delete, touch_user_references, User),
+    (pre_delete, invalidate_user_dashboards, User),
+    (pre_delete, remember_project_members, Project),
+    (post_delete, invalidate_deleted_project_members, Project),
+    (pre_delete, touch_project_references, Project),
+    (pre_delete, invalidate_project_dashboards, Project),
+    (post_delete, invalidate_request_dashboards, Request),
+    (post_delete, mark_deleted_request_day, Request),
+    (post_delete, remove_from_ledger, Request),
+]
+
+
+@contextmanager
+def delete_receivers_disconnected():
+    '''
+    Eliminaciones masivas sin los receptores por fila; quien lo usa debe
+    recalcular lo que ellos mantienen (ledger, rollup, caches)
+    '''
+    for signal, handler, sender in DELETE_RECEIVERS:
+        signal.disconnect(handler, sender=sender)
+    try:
+        yield
+    finally:
+        for signal, handler, sender in DELETE_RECEIVERS:
+            signal.connect(handler, sender=sender)
@@ -0,0 +1,29 @@
+document.addEventListener("DOMContentLoaded", function () {
+  // Selección de solicitudes para la revisión masiva
+  const selectAll = document.getElementById("select-all");
+  const checkboxes = document.querySelectorAll(".bulk-select");
+  const counter = document.getElementById("selected-count");
+  if (!selectAll || !counter) {
+    return;
+  }
+
+  function updateCount() {
+    const selected = document.querySelectorAll(".bulk-select:checked").length;
+    counter.textContent = selected;
+    selectAll.checked = selected === checkboxes.length;
+    selectAll.indeterminate = selected > 0 && selected < checkboxes.length;
+  }
+
+  selectAll.addEventListener("change", function () {
+    checkboxes.forEach((checkbox) => {
+      checkbox.checked = selectAll.checked;
+    });
+    updateCount();
+  });
+
+  checkboxes.forEach((checkbox) => {
+    checkbox.addEventListener("change", updateCount);
+  });
+
+  updateCount();
+});
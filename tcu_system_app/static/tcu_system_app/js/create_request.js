@@ -308,6 +308,37 @@ document.addEventListener("DOMContentLoaded", function () {
         '<i class="bi bi-hourglass-split"></i> Creando solicitud...';
       submitBtn.classList.add("loading");
 
+      // Los archivos se suben por partes antes de enviar el formulario
+      if (fileInput && fileInput.files.length > 0 && window.fetch) {
+        e.preventDefault();
+        uploadFiles(Array.from(fileInput.files))
+          .then(function (uploadIds) {
+            uploadIds.forEach(function (uploadId) {
+              const hidden = document.createElement("input");
+              hidden.type = "hidden";
+              hidden.name = "uploads";
+              hidden.value = uploadId;
+              form.appendChild(hidden);
+            });
+            // Ya no se envían en el formulario
+            fileInput.value = "";
+            form.submit();
+          })
+          .catch(function (error) {
+            submitBtn.disabled = false;
+            submitBtn.innerHTML = originalText;
+            submitBtn.classList.remove("loading");
+            errorContainer.innerHTML = `
+                <div class="alert alert-error">
+                    <i class="bi bi-x-circle"></i>
+                    <strong>${error.message}</strong>
+                </div>
+            `;
+            errorContainer.scrollIntoView({ behavior: "smooth", block: "start" });
+          });
+        return;
+      }
+
       setTimeout(() => {
         submitBtn.disabled = false;
         submitBtn.innerHTML = originalText;
@@ -316,6 +347,119 @@ document.addEventListener("DOMContentLoaded", function () {
     });
   }
 
+  // Subida por partes (views/uploads.py)
+  const csrfToken = form
+    ? form.querySelector("[name=csrfmiddlewaretoken]").value
+    : "";
+  const maxRetries = 5;
+
+  // data-upload-url trae un ID de ejemplo que se reemplaza por el real
+  function uploadUrl(uploadId, suffix) {
+    return (
+      form.dataset.uploadUrl.replace(
+        "00000000-0000-0000-0000-000000000000",
+        uploadId
+      ) + (suffix || "")
+    );
+  }
+
+  async function uploadRequest(url, options) {
+    const response = await fetch(url, {
+      credentials: "same-origin",
+      ...options,
+      headers: { "X-CSRFToken": csrfToken, ...(options.headers || {}) },
+    });
+    const data = await response.json().catch(() => ({}));
+    return { response, data };
+  }
+
+  function wait(ms) {
+    return new Promise((resolve) => setTimeout(resolve, ms));
+  }
+
+  function showProgress(sent, total) {
+    const percent = total ? Math.floor((sent / total) * 100) : 100;
+    submitBtn.innerHTML = `<i class="bi bi-cloud-upload"></i> Subiendo archivos... ${percent}%`;
+  }
+
+  async function uploadFiles(files) {
+    const total = files.reduce((sum, file) => sum + file.size, 0);
+    let done = 0;
+    const uploadIds = [];
+    for (const file of files) {
+      uploadIds.push(
+        await uploadFile(file, (sent) => showProgress(done + sent, total))
+      );
+      done += file.size;
+    }
+    return uploadIds;
+  }
+
+  async function uploadFile(file, onProgress) {
+    const body = new FormData();
+    body.append("name", file.name);
+    body.append("size", file.size);
+    const { response, data } = await uploadRequest(form.dataset.uploadsStartUrl, {
+      method: "POST",
+      body,
+    });
+    if (!response.ok) {
+      throw new Error(data.error || `No se pudo subir ${file.name}`);
+    }
+
+    const uploadId = data.uploadId;
+    const chunkSize = data.chunkSize;
+    let offset = data.offset;
+    let retries = 0;
+
+    while (offset < file.size) {
+      try {
+        const { response, data } = await uploadRequest(
+          uploadUrl(uploadId, "chunk/"),
+          {
+            method: "POST",
+            headers: {
+              "Content-Type": "application/octet-stream",
+              "X-Upload-Offset": String(offset),
+            },
+            body: file.slice(offset, offset + chunkSize),
+          }
+        );
+        if (response.ok) {
+          offset = data.offset;
+          retries = 0;
+          onProgress(offset);
+          continue;
+        }
+        if (response.status === 409) {
+          // El servidor tiene otro offset: se continúa desde ahí
+          offset = data.offset;
+          continue;
+        }
+        if (response.status < 500) {
+          throw new Error(data.error || `No se pudo subir ${file.name}`);
+        }
+      } catch (error) {
+        if (!(error instanceof TypeError)) throw error;
+        // Error de red: se reintenta más abajo
+      }
+
+      retries += 1;
+      if (retries > maxRetries) {
+        throw new Error(`Se perdió la conexión al subir ${file.name}`);
+      }
+      await wait(1000 * retries);
+      // Reanudar desde lo que el servidor confirmó
+      const status = await uploadRequest(uploadUrl(uploadId), { method: "GET" }).catch(
+        () => null
+      );
+      if (status && status.response.ok) {
+        offset = status.data.offset;
+      }
+    }
+    return uploadId;
+  }
+
   // Inicializar validación
   updateSubmitButton();
 });
@@ -1,18 +1,4 @@
 document.addEventListener("DOMContentLoaded", function () {
-  // Búsqueda de usuarios
-  const searchInput = document.getElementById("search-users");
-  if (searchInput) {
-    searchInput.addEventListener("input", function (e) {
-      const searchTerm = e.target.value.toLowerCase();
-      const rows = document.querySelectorAll("#users-table tbody tr");
-
-      rows.forEach((row) => {
-        const text = row.textContent.toLowerCase();
-        row.style.display = text.includes(searchTerm) ? "" : "none";
-      });
-    });
-  }
-
   // Manejo de eliminación de usuarios
   const deleteButtons = document.querySelectorAll(".btn-delete[data-user-id]");
   const deleteModal = document.getElementById("deleteModal");
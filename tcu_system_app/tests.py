@@ -1,3 +1,2015 @@
-from django.test import TestCase
+import base64
+import csv
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
+import uuid
+from importlib import import_module
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.sessions.models import Session
+from django.core.cache import caches as cache_aliases
+from django.core.management import CommandError, call_command
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.models import Sum
+from django.db.models.signals import post_delete, pre_delete
+from django.db.models.sql.constants import GET_ITERATOR_CHUNK_SIZE
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from tcu_system import caches, databases
+
+from . import catalog, dashboard_cache, hashers, ledger, previews, rollup, search, urls
+from .admin import RequestAdmin
+from .middleware import current_user_cache_key, get_current_user, invalidate_current_user
+from .models import File, HoursLedger, HoursRollup, HoursRollupDirtyDay, Project, Request, Role, Status, UploadSession, User
+from .views import async_views, exports, home
+from .query_budget import budget_for, sql_shape
+from .signals import delete_receivers_disconnected
+
+
+class TcuTestCase(TestCase):
+    '''
+    Datos base: roles, estados, un profesor con dos proyectos,
+    dos estudiantes y un administrador
+    '''
+    @classmethod
+    def setUpTestData(cls):
+        roles = {name: Role.objects.create(name=name) for name in ['Estudiante', 'Profesor', 'Admin']}
+        cls.statuses = {name: Status.objects.create(name=name) for name in ['Pendiente', 'Aceptada', 'Rechazada']}
+
+        cls.admin = User.objects.create(
+            roleId=roles['Admin'], firstName='Admin', lastName='System',
+            email='admin@example.com', password='!'
+        )
+        cls.professor = User.objects.create(
+            roleId=roles['Profesor'], firstName='Carlos', lastName='Rodríguez',
+            email='profesor@example.com', password='!'
+        )
+        cls.project = Project.objects.create(code='TCU001', name='Reforestación', userId_professor=cls.professor)
+        cls.other_project = Project.objects.create(code='TCU002', name='Alfabetización', userId_professor=cls.professor)
+        cls.student = User.objects.create(
+            roleId=roles['Estudiante'], firstName='Ana', lastName='Martínez',
+            email='estudiante@example.com', password='!', projectId=cls.project
+        )
+        cls.other_student = User.objects.create(
+            roleId=roles['Estudiante'], firstName='Luis', lastName='Mora',
+            email='otro@example.com', password='!', projectId=cls.other_project
+        )
+
+        statuses = list(cls.statuses.values())
+        start = datetime.date(2025, 1, 1)
+        Request.objects.bulk_create([
+            Request(
+                userId_student=student,
+                projectId=student.projectId,
+                statusId=statuses[i % 3],
+                hoursRequested=(i % 8) + 1,
+                description=f'Actividad {i}',
+                date=start + datetime.timedelta(days=i // 2),
+            )
+            for student in [cls.student, cls.other_student]
+            for i in range(40)
+        ])
+        cls.sample_request = Request.objects.filter(userId_student=cls.student).first()
+
+    def login_as(self, user):
+        session = self.client.session
+        session['user_id'] = user.userId
+        session.save()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN es específico de SQLite')
+class RequestIndexUsageTests(TcuTestCase):
+    '''
+    Verifica con EXPLAIN QUERY PLAN que las consultas sobre Request de las
+    vistas usan los índices compuestos y nunca recorren la tabla completa
+    '''
+    table = Request._meta.db_table
+
+    def request_plans(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        plans = []
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                sql = query['sql']
+                if not sql.startswith('SELECT') or f'FROM "{self.table}"' not in sql:
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                plans.append((sql, [row[3] for row in cursor.fetchall()]))
+        self.assertTrue(plans, f'{url} no consultó la tabla de solicitudes')
+        return plans
+
+    def assertUsesIndexes(self, url):
+        for sql, plan in self.request_plans(url):
+            request_steps = [step for step in plan if f' {self.table} ' in f'{step} ']
+            self.assertTrue(request_steps, sql)
+            for step in request_steps:
+                # SCAN sin índice es un recorrido completo de la tabla
+                self.assertTrue(
+                    step.startswith('SEARCH') or 'USING' in step and 'INDEX' in step,
+                    f'{step}\n{sql}'
+                )
+            if any('TEMP B-TREE' in step for step in plan):
+                self.assertTrue(
+                    all(step.startswith('SEARCH') for step in request_steps),
+                    f'Ordenamiento temporal sobre un recorrido completo:\n{plan}\n{sql}'
+                )
+
+    def test_student_queries_use_indexes(self):
+        self.login_as(self.student)
+        self.assertUsesIndexes(reverse('home'))
+        self.assertUsesIndexes(reverse('requests'))
+        self.assertUsesIndexes(reverse('request_detail', args=[self.sample_request.requestId]))
+
+    def test_professor_queries_use_indexes(self):
+        self.login_as(self.professor)
+        self.assertUsesIndexes(reverse('home'))
+        self.assertUsesIndexes(reverse('requests'))
+        self.assertUsesIndexes(reverse('request_detail', args=[self.sample_request.requestId]))
+
+    def test_admin_queries_use_indexes(self):
+        self.login_as(self.admin)
+        self.assertUsesIndexes(reverse('home'))
+        self.assertUsesIndexes(reverse('requests'))
+        self.assertUsesIndexes(reverse('request_detail', args=[self.sample_request.requestId]))
+
+    def test_student_list_is_served_in_index_order(self):
+        self.login_as(self.student)
+        for sql, plan in self.request_plans(reverse('requests')):
+            if 'ORDER BY' in sql:
+                self.assertIn('request_student_date_idx', ' '.join(plan))
+                self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+
+
+class QueryBudgetTests(TcuTestCase):
+    '''
+    Cada vista de urls.py debe mantenerse dentro de su presupuesto de
+    consultas (QUERY_BUDGETS) y sin consultas repetidas por fila
+    '''
+    def setUp(self):
+        # Sin el usuario de la sesión ni el dashboard en cache se mide el peor caso
+        user_ids = list(User.objects.values_list('userId', flat=True))
+        invalidate_current_user(*user_ids)
+        dashboard_cache.invalidate(student_ids=user_ids, professor_ids=user_ids)
+        # El catálogo de estados y roles vive en memoria del proceso
+        catalog.statuses()
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        upload_settings = override_settings(UPLOAD_TEMP_DIR=temp_dir, PREVIEW_ROOT=temp_dir, MEDIA_ROOT=temp_dir)
+        upload_settings.enable()
+        self.addCleanup(upload_settings.disable)
+        self.file = File(requestId=self.sample_request, contentHash='ab' * 32, previewStatus=File.PREVIEW_READY)
+        self.file.filePath.save('comprobante.pdf', ContentFile(b'%PDF-1.4'))
+
+    def assertWithinQueryBudget(self, response, allow_duplicates=False):
+        stats = response.query_stats
+        url_name = response.resolver_match.url_name
+        method = response.request['REQUEST_METHOD']
+        self.visited.add(url_name)
+        budget = budget_for(url_name, method)
+        self.assertLessEqual(
+            stats.count, budget,
+            f'{method} {url_name}: {stats.count} consultas, presupuesto {budget}\n' + '\n'.join(stats.shapes)
+        )
+        if not allow_duplicates:
+            self.assertEqual(stats.duplicates, {}, f'{url_name}: consultas repetidas')
+
+    def check_views(self, user):
+        self.login_as(user)
+        request_id = self.sample_request.requestId
+        for url in [
+            reverse('login'),
+            reverse('home'),
+            reverse('requests'),
+            reverse('requests') + '?page_size=100',
+            reverse('requests') + '?q=actividad',
+            reverse('create_request'),
+            reverse('export_requests'),
+            reverse('review_request', args=[request_id]),
+            reverse('bulk_review'),
+            reverse('request_detail', args=[request_id]),
+            reverse('file_preview', args=[self.file.fileId, 'thumb']),
+            reverse('download_file', args=[self.file.fileId]),
+            reverse('list_projects'),
+            reverse('create_project'),
+            reverse('edit_project', args=[self.project.projectId]),
+            reverse('list_users'),
+            reverse('list_users') + '?q=mar&project=0',
+            reverse('create_user'),
+            reverse('edit_user', args=[self.student.userId]),
+            reverse('api_requests'),
+            reverse('api_requests') + '?fields=id,status,hoursRequested&page_size=500',
+            reverse('api_projects'),
+            reverse('api_users'),
+            reverse('hours_analytics'),
+            reverse('api_hours') + '?start=2025-01-01&end=2025-01-31',
+        ]:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                self.assertWithinQueryBudget(response)
+
+        # Subida por partes; para profesores y administradores se rechaza
+        response = self.client.post(reverse('start_upload'), {'name': 'nota.txt', 'size': 5})
+        self.assertWithinQueryBudget(response)
+        upload_id = response.json().get('uploadId', uuid.uuid4())
+        for response in [
+            self.client.post(
+                reverse('upload_chunk', args=[upload_id]), b'hola\n',
+                content_type='application/octet-stream', HTTP_X_UPLOAD_OFFSET='0'
+            ),
+            self.client.get(reverse('upload_status', args=[upload_id])),
+        ]:
+            self.assertWithinQueryBudget(response)
+
+        # Las eliminaciones se rechazan porque hay datos asociados
+        for url in [
+            reverse('delete_project', args=[self.project.projectId]),
+            reverse('delete_user', args=[self.student.userId]),
+        ]:
+            with self.subTest(url=url):
+                self.assertWithinQueryBudget(self.client.post(url))
+
+        self.assertWithinQueryBudget(self.client.get(reverse('logout')))
+
+    def post_within_budget(self, name, args=(), data=None, allow_duplicates=False, **extra):
+        with self.subTest(url=name, method='POST'):
+            response = self.client.post(reverse(name, args=args), data or {}, **extra)
+            self.assertLess(response.status_code, 400, response.content[:200])
+            self.assertWithinQueryBudget(response, allow_duplicates)
+        return response
+
+    def test_student_writes(self):
+        self.visited = set()
+        self.login_as(self.student)
+        data = {'hoursRequested': 4, 'description': 'Siembra de árboles', 'date': '2025-03-01'}
+        # La primera solicitud crea las filas del ledger del estudiante y del proyecto
+        self.post_within_budget('create_request', data=data, allow_duplicates=True)
+
+        upload = self.client.post(reverse('start_upload'), {'name': 'nota.txt', 'size': 5}).json()['uploadId']
+        self.client.post(
+            reverse('upload_chunk', args=[upload]), b'hola\n',
+            content_type='application/octet-stream', HTTP_X_UPLOAD_OFFSET='0'
+        )
+        self.post_within_budget('create_request', data={**data, 'uploads': [upload]})
+        self.assertEqual(Request.objects.filter(description='Siembra de árboles').count(), 2)
+
+    def test_review_writes(self):
+        accepted = self.statuses['Aceptada'].statusId
+        pending = Request.objects.filter(projectId=self.project, statusId=self.statuses['Pendiente'])
+        for user in [self.professor, self.admin]:
+            self.visited = set()
+            self.login_as(user)
+            self.post_within_budget(
+                'review_request', args=[pending.first().requestId],
+                data={'status': accepted, 'professorComment': 'Bien'}, allow_duplicates=True,
+            )
+            ids = list(pending.values_list('requestId', flat=True)[:5])
+            self.post_within_budget(
+                'bulk_review', data={'requests': ids, 'status': accepted}, allow_duplicates=True
+            )
+            self.assertFalse(Request.objects.filter(requestId__in=ids).exclude(statusId=accepted).exists())
+
+    def test_admin_writes(self):
+        self.visited = set()
+        self.login_as(self.admin)
+        self.post_within_budget(
+            'create_project', data={'code': 'TCU100', 'name': 'Huertas', 'professorId': self.professor.userId}
+        )
+        project = Project.objects.get(code='TCU100')
+        self.post_within_budget(
+            'edit_project', args=[project.projectId],
+            data={'code': 'TCU100', 'name': 'Huertas escolares', 'professorId': self.professor.userId},
+        )
+        self.post_within_budget('create_user', data={
+            'firstName': 'Eva', 'lastName': 'Solís', 'email': 'eva@example.com', 'roleId': self.student.roleId_id,
+            'password': 'secreto1', 'confirmPassword': 'secreto1', 'projectId': project.projectId,
+        })
+        new_user = User.objects.get(email='eva@example.com')
+        self.post_within_budget('edit_user', args=[new_user.userId], data={
+            'firstName': 'Eva', 'lastName': 'Solís Mora', 'email': 'eva@example.com',
+            'roleId': self.student.roleId_id, 'projectId': project.projectId,
+        })
+        self.post_within_budget('delete_user', args=[new_user.userId])
+        self.post_within_budget('delete_project', args=[project.projectId])
+        self.assertFalse(Project.objects.filter(code='TCU100').exists())
+        self.assertFalse(User.objects.filter(email='eva@example.com').exists())
+
+    @override_settings(PBKDF2_ITERATIONS=1000)
+    def test_login_post(self):
+        self.visited = set()
+        self.admin.set_password('secreto1')
+        self.admin.save()
+        self.post_within_budget('login', data={'email': self.admin.email, 'password': 'secreto1'})
+        self.post_within_budget('login', data={'email': self.admin.email, 'password': 'otra'})
+
+    def test_every_url_has_a_budget(self):
+        names = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(names - set(settings.QUERY_BUDGETS), set())
+
+    def test_student_views(self):
+        self.visited = set()
+        self.check_views(self.student)
+        self.assertEqual({pattern.name for pattern in urls.urlpatterns} - self.visited, set())
+
+    def test_professor_views(self):
+        self.visited = set()
+        self.check_views(self.professor)
+
+    def test_admin_views(self):
+        self.visited = set()
+        self.check_views(self.admin)
+
+    def test_budget_does_not_grow_with_rows(self):
+        self.visited = set()
+        self.login_as(self.admin)
+        for i in range(30):
+            User.objects.create(
+                roleId=self.student.roleId, firstName='Extra', lastName=str(i),
+                email=f'extra{i}@example.com', password='!', projectId=self.other_project
+            )
+            Project.objects.create(code=f'X{i:03d}', name=f'Extra {i}', userId_professor=self.professor)
+        for name in ['home', 'requests', 'list_projects', 'list_users']:
+            with self.subTest(name=name):
+                self.assertWithinQueryBudget(self.client.get(reverse(name)))
+
+    @override_settings(QUERY_BUDGETS={'home': 1})
+    def test_over_budget_is_logged(self):
+        self.login_as(self.admin)
+        with self.assertLogs('tcu_system_app.queries', 'WARNING') as logs:
+            self.client.get(reverse('home'))
+        self.assertIn('(home)', logs.output[0])
+
+    @override_settings(QUERY_BUDGETS={'home': 2, 'bulk_review': {'GET': 3, 'POST': 8}}, QUERY_BUDGET_DEFAULT=10)
+    def test_budget_per_method(self):
+        self.assertEqual(budget_for('home', 'POST'), 2)
+        self.assertEqual(budget_for('bulk_review'), 3)
+        self.assertEqual(budget_for('bulk_review', 'HEAD'), 3)
+        self.assertEqual(budget_for('bulk_review', 'POST'), 8)
+        self.assertEqual(budget_for('otra'), 10)
+
+    @override_settings(QUERY_BUDGET_HEADERS=True)
+    def test_debug_headers(self):
+        self.login_as(self.admin)
+        response = self.client.get(reverse('home'))
+        self.assertEqual(int(response['X-Query-Count']), response.query_stats.count)
+        self.assertIn('X-Query-Time-Ms', response)
+        self.assertEqual(response['X-Query-Duplicates'], '0')
+
+    def test_sql_shape_ignores_parameter_count(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            sql_shape('SELECT * FROM t WHERE id IN (%s)'.replace('(%s)', '(%s, %s)')),
+        )
+
+
+class AsyncViewTests(TcuTestCase):
+    '''
+    Las vistas asíncronas (ASYNC_VIEWS) deben producir la misma página que
+    sus versiones síncronas
+    '''
+    def call_async(self, view, path, *args):
+        request = RequestFactory().get(path)
+        request.session = self.client.session
+        return async_to_sync(view)(request, *args)
+
+    def assertSameAsSync(self, view, url_name, *args):
+        path = reverse(url_name, args=args)
+        expected = self.client.get(path)
+        response = self.call_async(view, path, *args)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content.decode(), expected.content.decode())
+
+    def test_views_match_sync_versions(self):
+        request_id = self.sample_request.requestId
+        for user in [self.student, self.professor, self.admin]:
+            self.login_as(user)
+            with self.subTest(user=user.email):
+                self.assertSameAsSync(async_views.home, 'home')
+                self.assertSameAsSync(async_views.list_requests, 'requests')
+                self.assertSameAsSync(async_views.request_detail, 'request_detail', request_id)
+                self.assertSameAsSync(async_views.list_projects, 'list_projects')
+
+    def test_student_cannot_see_other_requests(self):
+        self.login_as(self.student)
+        other = Request.objects.filter(userId_student=self.other_student).first()
+        path = reverse('request_detail', args=[other.requestId])
+        self.assertEqual(self.call_async(async_views.request_detail, path, other.requestId).status_code, 403)
+
+    def test_catalog_invalidated_after_load(self):
+        # Otro hilo invalida el catálogo entre aload() y su uso: la vista no
+        # debe recargarlo con una consulta síncrona en el event loop
+        real_aload = catalog.aload
+
+        async def aload_then_invalidate():
+            loaded = await real_aload()
+            catalog.invalidate()
+            return loaded
+
+        self.login_as(self.admin)
+        catalog.invalidate()
+        with mock.patch.object(catalog, 'aload', aload_then_invalidate):
+            self.assertEqual(self.call_async(async_views.home, reverse('home')).status_code, 200)
+            self.assertEqual(self.call_async(async_views.list_projects, reverse('list_projects')).status_code, 200)
+
+    def test_login_required(self):
+        response = self.call_async(async_views.home, reverse('home'))
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.url, reverse('login'))
+
+
+class ChunkedUploadTests(TcuTestCase):
+    '''
+    Subida de adjuntos por partes (views/uploads.py)
+    '''
+    PDF = b'%PDF-1.4\n' + b'x' * 2500
+
+    def setUp(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        paths = override_settings(
+            UPLOAD_TEMP_DIR=os.path.join(temp_dir, 'tmp'),
+            MEDIA_ROOT=os.path.join(temp_dir, 'media'),
+            UPLOAD_CHUNK_SIZE=1024,
+        )
+        paths.enable()
+        self.addCleanup(paths.disable)
+        self.login_as(self.student)
+
+    def start(self, name='comprobante.pdf', size=len(PDF)):
+        return self.client.post(reverse('start_upload'), {'name': name, 'size': size})
+
+    def send(self, upload_id, data, offset):
+        return self.client.post(
+            reverse('upload_chunk', args=[upload_id]), data,
+            content_type='application/octet-stream', HTTP_X_UPLOAD_OFFSET=str(offset)
+        )
+
+    def upload(self, data=PDF, name='comprobante.pdf'):
+        upload_id = self.start(name, len(data)).json()['uploadId']
+        for offset in range(0, len(data), 1024):
+            self.assertEqual(self.send(upload_id, data[offset:offset + 1024], offset).status_code, 200)
+        return upload_id
+
+    def create_request(self, upload_ids):
+        return self.client.post(reverse('create_request'), {
+            'hoursRequested': '4',
+            'description': 'Siembra de árboles',
+            'date': '2025-03-01',
+            'uploads': upload_ids,
+        })
+
+    def test_upload_and_attach(self):
+        upload_id = self.upload()
+        status = self.client.get(reverse('upload_status', args=[upload_id])).json()
+        self.assertEqual((status['offset'], status['complete']), (len(self.PDF), True))
+
+        self.create_request([upload_id])
+        file_record = File.objects.get(requestId__description='Siembra de árboles')
+        with file_record.filePath.open('rb') as f:
+            self.assertEqual(f.read(), self.PDF)
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertEqual(os.listdir(settings.UPLOAD_TEMP_DIR), [])
+
+    def test_resume_after_wrong_offset(self):
+        upload_id = self.start().json()['uploadId']
+        self.send(upload_id, self.PDF[:1024], 0)
+        # Un reintento de la primera parte recibe el offset real
+        response = self.send(upload_id, self.PDF[:1024], 0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 1024)
+        self.assertEqual(self.send(upload_id, self.PDF[1024:2048], 1024).json()['offset'], 2048)
+
+    def test_incomplete_upload_is_not_attached(self):
+        upload_id = self.start().json()['uploadId']
+        self.send(upload_id, self.PDF[:1024], 0)
+        self.create_request([upload_id, 'no-es-un-id'])
+        self.assertFalse(File.objects.exists())
+        self.assertTrue(UploadSession.objects.filter(pk=upload_id).exists())
+
+    def test_content_must_match_extension(self):
+        upload_id = self.start('foto.png', 1000).json()['uploadId']
+        response = self.send(upload_id, b'MZ\x90\x00' + b'\x00' * 996, 0)
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_size_limits(self):
+        self.assertEqual(self.start(size=settings.UPLOAD_MAX_SIZE + 1).status_code, 413)
+        self.assertEqual(self.start('programa.exe', 10).status_code, 415)
+        upload_id = self.start(size=1500).json()['uploadId']
+        # Una parte más grande que UPLOAD_CHUNK_SIZE o que el archivo declarado
+        self.assertEqual(self.send(upload_id, self.PDF[:1025], 0).status_code, 413)
+        self.send(upload_id, self.PDF[:1024], 0)
+        self.assertEqual(self.send(upload_id, self.PDF[1024:2048], 1024).status_code, 413)
+
+    def test_only_owner_can_continue(self):
+        upload_id = self.start().json()['uploadId']
+        self.login_as(self.other_student)
+        self.assertEqual(self.send(upload_id, self.PDF[:1024], 0).status_code, 404)
+        self.login_as(self.professor)
+        self.assertEqual(self.start().status_code, 403)
+
+
+class PreviewTests(TcuTestCase):
+    '''
+    Miniaturas y vistas previas de los adjuntos (previews.py)
+    '''
+    PDF = b'%PDF-1.4\n' + b'x' * 100
+
+    def setUp(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        paths = override_settings(
+            MEDIA_ROOT=os.path.join(temp_dir, 'media'),
+            PREVIEW_ROOT=os.path.join(temp_dir, 'previews'),
+        )
+        paths.enable()
+        self.addCleanup(paths.disable)
+
+    def attach(self, name, content):
+        file_record = File(requestId=self.sample_request)
+        file_record.filePath.save(name, ContentFile(content), save=True)
+        return file_record
+
+    def cache_previews(self, content_hash):
+        for size in settings.PREVIEW_SIZES:
+            path = previews.preview_path(content_hash, size)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'\xff\xd8\xff' + size.encode())
+
+    def test_new_file_is_scheduled_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.attach('nota.txt', b'hola')
+        self.assertEqual(len(callbacks), 1)
+
+    def test_unsupported_type_has_no_preview(self):
+        file_record = self.attach('nota.txt', b'hola')
+        self.assertEqual(previews.generate(file_record.fileId), File.PREVIEW_NONE)
+        file_record.refresh_from_db()
+        self.assertEqual(file_record.contentHash, hashlib.sha256(b'hola').hexdigest())
+
+    def test_previews_are_cached_by_content_hash(self):
+        file_record = self.attach('comprobante.pdf', self.PDF)
+        # Si pdftoppm se ejecutara fallaría: la vista previa sale del cache
+        self.cache_previews(hashlib.sha256(self.PDF).hexdigest())
+        with mock.patch.object(previews, '_pdftoppm', return_value='/bin/false'):
+            self.assertEqual(previews.generate(file_record.fileId), File.PREVIEW_READY)
+
+    def test_render_failure_is_recorded(self):
+        file_record = self.attach('comprobante.pdf', self.PDF)
+        with mock.patch.object(previews, '_pdftoppm', return_value='/bin/false'), \
+                self.assertLogs('tcu_system_app.previews', 'ERROR'):
+            self.assertEqual(previews.generate(file_record.fileId), File.PREVIEW_FAILED)
+
+    @skipUnless(previews.Image, 'Pillow no está instalado')
+    def test_image_thumbnail(self):
+        from io import BytesIO
+        image = BytesIO()
+        previews.Image.new('RGB', (2000, 1000), 'green').save(image, 'PNG')
+        file_record = self.attach('foto.png', image.getvalue())
+        self.assertEqual(previews.generate(file_record.fileId), File.PREVIEW_READY)
+        file_record.refresh_from_db()
+        with previews.Image.open(previews.preview_path(file_record.contentHash, 'thumb')) as thumb:
+            self.assertEqual(thumb.size, (240, 120))
+
+    def test_preview_view(self):
+        file_record = self.attach('comprobante.pdf', self.PDF)
+        with mock.patch.object(previews, '_pdftoppm', return_value='/bin/false'):
+            self.cache_previews(hashlib.sha256(self.PDF).hexdigest())
+            previews.generate(file_record.fileId)
+
+        self.login_as(self.student)
+        response = self.client.get(reverse('request_detail', args=[self.sample_request.requestId]))
+        self.assertContains(response, 'loading="lazy"')
+
+        response = self.client.get(reverse('file_preview', args=[file_record.fileId, 'thumb']))
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(b''.join(response.streaming_content), b'\xff\xd8\xffthumb')
+        self.assertEqual(self.client.get(reverse('file_preview', args=[file_record.fileId, 'huge'])).status_code, 404)
+
+        self.login_as(self.other_student)
+        self.assertEqual(self.client.get(reverse('file_preview', args=[file_record.fileId, 'thumb'])).status_code, 403)
+
+
+class DownloadTests(TcuTestCase):
+    '''
+    Descarga de adjuntos con permisos, rangos y peticiones condicionales
+    '''
+    CONTENT = bytes(range(256)) * 40
+
+    def setUp(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        media = override_settings(MEDIA_ROOT=temp_dir, DOWNLOAD_ACCEL_REDIRECT='')
+        media.enable()
+        self.addCleanup(media.disable)
+        self.file = File(requestId=self.sample_request)
+        self.file.filePath.save('comprobante.pdf', ContentFile(self.CONTENT))
+        self.url = reverse('download_file', args=[self.file.fileId])
+        self.login_as(self.student)
+
+    def get(self, **headers):
+        response = self.client.get(self.url, headers=headers)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_full_download(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.CONTENT)
+        self.assertEqual(response['Content-Length'], str(len(self.CONTENT)))
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        self.assertTrue(response['Content-Disposition'].startswith('attachment;'))
+
+    def test_ranges(self):
+        response, body = self.get(Range='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(body, self.CONTENT[100:200])
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.CONTENT)}')
+
+        response, body = self.get(Range='bytes=-10')
+        self.assertEqual(body, self.CONTENT[-10:])
+
+        response, _ = self.get(Range=f'bytes={len(self.CONTENT)}-')
+        self.assertEqual(response.status_code, 416)
+
+        # Varios rangos: se responde el archivo completo
+        response, body = self.get(Range='bytes=0-1,5-6')
+        self.assertEqual((response.status_code, body), (200, self.CONTENT))
+
+    def test_conditional_requests(self):
+        response, _ = self.get()
+        etag, last_modified = response['ETag'], response['Last-Modified']
+        self.assertEqual(self.get(If_None_Match=etag)[0].status_code, 304)
+        self.assertEqual(self.get(If_Modified_Since=last_modified)[0].status_code, 304)
+        self.assertEqual(self.get(If_Match='"otro"')[0].status_code, 412)
+
+        # If-Range con otra versión: el rango se ignora
+        self.assertEqual(self.get(Range='bytes=0-9', If_Range=etag)[0].status_code, 206)
+        self.assertEqual(self.get(Range='bytes=0-9', If_Range='"otro"')[0].status_code, 200)
+
+    def test_same_permissions_as_request_detail(self):
+        self.login_as(self.other_student)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.login_as(self.professor)
+        self.assertEqual(self.get()[0].status_code, 200)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 302)
+
+    def test_head(self):
+        response = self.client.head(self.url, headers={'Range': 'bytes=0-9'})
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Length'], '10')
+
+    def test_accel_redirect(self):
+        with self.settings(DOWNLOAD_ACCEL_REDIRECT='/protected-media/'):
+            response, body = self.get()
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.file.filePath.name)
+        self.assertEqual(body, b'')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'El índice FTS5 es específico de SQLite')
+class SearchTests(TcuTestCase):
+    '''
+    Búsqueda de texto sobre el índice FTS5 (search.py)
+    '''
+    def add(self, student, description, comment=''):
+        return Request.objects.create(
+            userId_student=student, projectId=student.projectId, statusId=self.statuses['Pendiente'],
+            hoursRequested=2, description=description, professorComent=comment, date=datetime.date(2025, 6, 1),
+        )
+
+    def found(self, text, queryset=None):
+        queryset = queryset if queryset is not None else Request.objects.all()
+        return set(search.search_requests(queryset, text).values_list('requestId', flat=True))
+
+    def test_index_follows_writes(self):
+        request_obj = self.add(self.student, 'Siembra de árboles en la escuela')
+        self.assertEqual(self.found('arboles'), {request_obj.requestId})
+        self.assertEqual(self.found('siem escu'), {request_obj.requestId})
+
+        request_obj.professorComent = 'Falta la lista de asistencia'
+        request_obj.save()
+        self.assertEqual(self.found('asistencia'), {request_obj.requestId})
+
+        request_obj.description = 'Limpieza de playa'
+        request_obj.save()
+        self.assertEqual(self.found('arboles'), set())
+
+        request_obj.delete()
+        self.assertEqual(self.found('playa'), set())
+
+    def test_results_are_ranked(self):
+        weak = self.add(self.student, 'Reunión de coordinación y luego reciclaje')
+        strong = self.add(self.student, 'Reciclaje: clasificación de reciclaje en el centro de reciclaje')
+        ranked = search.search_requests(Request.objects.all(), 'reciclaje').order_by('rank')
+        self.assertEqual(list(ranked.values_list('requestId', flat=True)), [strong.requestId, weak.requestId])
+
+    def test_operators_are_not_interpreted(self):
+        self.add(self.student, 'Taller NEAR la comunidad')
+        self.assertEqual(len(self.found('"taller NEAR* (')), 1)
+        self.assertEqual(self.found('***'), set())
+
+    def test_list_is_scoped_and_paginated(self):
+        for i in range(5):
+            self.add(self.student, f'Huerta comunitaria, semana {i}')
+        self.add(self.other_student, 'Huerta de la escuela')
+
+        self.login_as(self.student)
+        url = reverse('requests') + '?q=huerta&page_size=2'
+        seen = []
+        while url:
+            page = self.client.get(url).context['page']
+            seen += [r.requestId for r in page.items]
+            url = reverse('requests') + f'?q=huerta&page_size=2&after={page.next_cursor}' if page.has_next else None
+        own = set(Request.objects.filter(userId_student=self.student, description__startswith='Huerta')
+                  .values_list('requestId', flat=True))
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen), own)
+
+    def test_admin_uses_the_index(self):
+        request_obj = self.add(self.student, 'Inventario de la biblioteca')
+        model_admin = RequestAdmin(Request, admin.site)
+        with CaptureQueriesContext(connection) as captured:
+            results, _ = model_admin.get_search_results(None, Request.objects.all(), 'biblioteca')
+            ids = list(results.values_list('requestId', flat=True))
+        self.assertEqual(ids, [request_obj.requestId])
+        self.assertIn('MATCH', captured[0]['sql'])
+        self.assertNotIn('LIKE', captured[0]['sql'])
+
+
+class CatalogTests(TcuTestCase):
+    '''
+    Estados y roles en memoria: la versión se revisa una vez por petición
+    '''
+    def setUp(self):
+        catalog.invalidate()
+        catalog.statuses()
+
+    def test_lookups_do_not_read_the_cache(self):
+        with mock.patch('tcu_system_app.catalog.cache') as fake_cache:
+            for _ in range(80):
+                catalog.status(self.statuses['Aceptada'].statusId)
+                catalog.status_id(catalog.PENDING)
+        fake_cache.get.assert_not_called()
+
+    @override_settings(CACHE_SHARED=True)
+    def test_request_checks_shared_version_once(self):
+        self.login_as(self.admin)
+        with mock.patch('tcu_system_app.catalog.cache', wraps=catalog.cache) as spy:
+            self.assertEqual(self.client.get(reverse('export_requests')).status_code, 200)
+        version_reads = [call for call in spy.get.call_args_list if call.args[0] == catalog.VERSION_KEY]
+        self.assertEqual(len(version_reads), 1)
+
+    @override_settings(CACHE_SHARED=True)
+    def test_other_process_invalidation_is_seen_on_next_check(self):
+        loaded = catalog._get_catalog()
+        # Otro proceso incrementa la versión en el cache compartido
+        catalog.cache.set(catalog.VERSION_KEY, loaded.version + 1, None)
+        self.assertIs(catalog._get_catalog(), loaded)
+        catalog.check_version()
+        self.assertEqual(catalog._get_catalog().version, loaded.version + 1)
+
+    @override_settings(CACHE_SHARED=False, CATALOG_LOCAL_TIMEOUT=60)
+    def test_local_cache_reloads_after_timeout(self):
+        loaded = catalog._get_catalog()
+        catalog.check_version()
+        self.assertIs(catalog._get_catalog(), loaded)
+        loaded.loaded_at -= 61
+        catalog.check_version()
+        self.assertIsNot(catalog._get_catalog(), loaded)
+
+
+class DashboardCacheTests(TcuTestCase):
+    '''
+    Cache del dashboard por usuario e invalidación por señales
+    '''
+    def setUp(self):
+        user_ids = list(User.objects.values_list('userId', flat=True))
+        dashboard_cache.invalidate(student_ids=user_ids, professor_ids=user_ids)
+        dashboard_cache.reset_stats()
+        catalog.statuses()
+
+    def dashboard(self, user):
+        self.login_as(user)
+        return self.client.get(reverse('home')).context
+
+    def assertCached(self, user):
+        with CaptureQueriesContext(connection) as captured:
+            self.dashboard(user)
+        self.assertFalse(
+            [q for q in captured if 'tcu_system_app_request' in q['sql']],
+            'El dashboard se volvió a calcular'
+        )
+
+    def assertRecomputed(self, user):
+        hits = dashboard_cache.stats()['hits']
+        self.dashboard(user)
+        self.assertEqual(dashboard_cache.stats()['hits'], hits)
+
+    def test_second_visit_is_a_hit(self):
+        first = self.dashboard(self.student)
+        self.assertCached(self.student)
+        second = self.dashboard(self.student)
+        self.assertEqual(second['pending_count'], first['pending_count'])
+        self.assertEqual(
+            [r.requestId for r in second['recent_requests']], [r.requestId for r in first['recent_requests']]
+        )
+        self.assertEqual(dashboard_cache.stats(), {'hits': 2, 'misses': 1, 'hit_rate': 2 / 3})
+
+    def test_missing_status_counts_zero(self):
+        # Al eliminar el estado, sus solicitudes quedan con statusId NULL
+        Status.objects.filter(pk=self.statuses['Rechazada'].pk).delete()
+        counters = home.request_counters(Request.objects.all())
+        self.assertEqual(counters['rejected_count'], 0)
+        self.assertEqual(counters['pending_count'], Request.objects.filter(statusId=self.statuses['Pendiente']).count())
+        self.assertEqual(counters['total_count'], counters['approved_count'] + counters['pending_count'])
+        self.assertEqual(async_to_sync(home.arequest_counters)(Request.objects.all(), catalog.current()), counters)
+
+    def test_cached_requests_leave_out_passwords(self):
+        User.objects.filter(pk=self.student.pk).update(password='pbkdf2_sha256$1000$sal$hash-estudiante')
+        User.objects.filter(pk=self.professor.pk).update(password='pbkdf2_sha256$1000$sal$hash-profesor')
+        self.login_as(self.professor)
+        self.assertContains(self.client.get(reverse('home')), 'Ana Martínez')
+
+        cached = dashboard_cache.load(dashboard_cache.scope_key(self.professor, 'profesor'))
+        self.assertTrue(cached['recent_requests'])
+        self.assertFalse(b'hash-' in pickle.dumps(cached), 'El cache del dashboard guarda contraseñas')
+
+    def test_new_request_invalidates_owner_professor_and_admin(self):
+        for user in [self.student, self.other_student, self.professor, self.admin]:
+            self.dashboard(user)
+        before = self.dashboard(self.student)['total_count']
+
+        Request.objects.create(
+            userId_student=self.student, projectId=self.project, statusId=self.statuses['Pendiente'],
+            hoursRequested=3, description='Nueva', date=datetime.date(2025, 7, 1),
+        )
+        self.assertEqual(self.dashboard(self.student)['total_count'], before + 1)
+        self.assertRecomputed(self.professor)
+        self.assertRecomputed(self.admin)
+        self.assertCached(self.other_student)
+
+    def test_review_updates_counters(self):
+        pending = self.dashboard(self.student)['pending_count']
+        request_obj = Request.objects.filter(userId_student=self.student, statusId=self.statuses['Pendiente']).first()
+        request_obj.statusId = self.statuses['Aceptada']
+        request_obj.save()
+        self.assertEqual(self.dashboard(self.student)['pending_count'], pending - 1)
+
+    def test_reassigned_request_invalidates_previous_owner(self):
+        request_obj = Request.objects.filter(userId_student=self.student).first()
+        total = self.dashboard(self.student)['total_count']
+        request_obj.userId_student = self.other_student
+        request_obj.save()
+        self.assertEqual(self.dashboard(self.student)['total_count'], total - 1)
+
+    def test_project_and_user_changes(self):
+        for user in [self.student, self.other_student, self.professor]:
+            self.dashboard(user)
+
+        self.project.name = 'Reforestación urbana'
+        self.project.save()
+        self.assertEqual(
+            self.dashboard(self.student)['recent_requests'][0].projectId.name, 'Reforestación urbana'
+        )
+        self.assertCached(self.other_student)
+
+        self.dashboard(self.professor)
+        self.other_student.firstName = 'Luisa'
+        self.other_student.save()
+        self.assertRecomputed(self.professor)
+
+    def test_catalog_change_invalidates_everything(self):
+        self.dashboard(self.student)
+        catalog.invalidate()
+        self.assertRecomputed(self.student)
+
+    def test_stats_command_needs_shared_cache(self):
+        # Con el cache local cada proceso cuenta por separado
+        with self.assertRaisesMessage(CommandError, 'TCU_CACHE_BACKEND=redis o memcached'):
+            call_command('dashboard_cache_stats', stdout=StringIO())
+
+
+class ApiTests(TcuTestCase):
+    '''
+    API JSON de solo lectura: permisos, campos, paginación y ETag
+    '''
+    def setUp(self):
+        invalidate_current_user(*User.objects.values_list('userId', flat=True))
+        catalog.statuses()
+
+    def get(self, name, params='', **headers):
+        return self.client.get(reverse(name) + params, headers=headers)
+
+    def test_same_permissions_as_html_views(self):
+        self.assertEqual(self.get('api_requests').status_code, 401)
+
+        self.login_as(self.student)
+        ids = {row['studentId'] for row in self.get('api_requests', '?page_size=500').json()['results']}
+        self.assertEqual(ids, {self.student.userId})
+        self.assertEqual(self.get('api_projects').status_code, 403)
+        self.assertEqual(self.get('api_users').status_code, 403)
+
+        self.login_as(self.admin)
+        self.assertEqual(len(self.get('api_projects').json()['results']), 2)
+        users = self.get('api_users').json()['results']
+        self.assertEqual(len(users), 4)
+        self.assertNotIn('password', users[0])
+        self.assertEqual(self.client.post(reverse('api_users')).status_code, 405)
+
+    def test_field_projection(self):
+        self.login_as(self.student)
+        row = self.get('api_requests', '?fields=id,status').json()['results'][0]
+        self.assertEqual(set(row), {'id', 'status'})
+        self.assertIn(row['status'], self.statuses)
+
+        with CaptureQueriesContext(connection) as captured:
+            self.get('api_requests', '?fields=hoursRequested')
+        self.assertNotIn('description', captured[-1]['sql'])
+
+        self.assertEqual(self.get('api_requests', '?fields=password').status_code, 400)
+
+    def test_pagination(self):
+        self.login_as(self.student)
+        page = self.get('api_requests', '?fields=id&page_size=30').json()
+        self.assertIsNone(page['previous'])
+        second = self.client.get(page['next']).json()
+        self.assertIsNone(second['next'])
+        self.assertTrue(second['previous'].startswith(reverse('api_requests') + '?'))
+
+        ids = [row['id'] for row in page['results'] + second['results']]
+        expected = Request.objects.filter(userId_student=self.student).order_by('-date', '-requestId')
+        self.assertEqual(ids, list(expected.values_list('requestId', flat=True)))
+
+    def test_not_modified_reads_no_rows(self):
+        self.login_as(self.student)
+        response = self.get('api_requests')
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with CaptureQueriesContext(connection) as captured:
+            response = self.get('api_requests', If_None_Match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        request_queries = [q['sql'] for q in captured if 'tcu_system_app_request' in q['sql']]
+        self.assertEqual(len(request_queries), 1)
+        self.assertIn('MAX(', request_queries[0])
+
+        self.assertEqual(self.get('api_requests', If_Modified_Since=last_modified).status_code, 304)
+        # Otra proyección es otra representación
+        self.assertEqual(self.get('api_requests', '?fields=id', If_None_Match=etag).status_code, 200)
+
+    def test_etag_changes_with_rows(self):
+        self.login_as(self.student)
+        etag = self.get('api_requests')['ETag']
+
+        request_obj = Request.objects.filter(userId_student=self.student).first()
+        request_obj.hoursRequested += 1
+        request_obj.save()
+        etag_after_edit = self.get('api_requests', If_None_Match=etag)
+        self.assertEqual(etag_after_edit.status_code, 200)
+
+        request_obj.delete()
+        self.assertEqual(self.get('api_requests', If_None_Match=etag_after_edit['ETag']).status_code, 200)
+
+    def test_deleted_reference_changes_etag(self):
+        # La FK pasa a NULL con update(): la señal marca las filas afectadas
+        self.login_as(self.admin)
+        etag = self.get('api_users')['ETag']
+        past = timezone.now() - datetime.timedelta(days=1)
+        User.objects.update(updatedAt=past)
+        Project.objects.update(updatedAt=past)
+        etag = self.get('api_users')['ETag']
+
+        Project.objects.create(code='TCU003', name='Huertas')
+        self.other_project.delete()
+        self.assertEqual(self.get('api_users', If_None_Match=etag).status_code, 200)
+
+
+class CursorTests(TcuTestCase):
+    '''
+    Un cursor alterado se ignora: se muestra la primera página
+    '''
+    def cursor(self, values):
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def test_malformed_cursor(self):
+        pages = [('requests', self.student), ('api_requests', self.student), ('list_users', self.admin)]
+        for name, user in pages:
+            self.login_as(user)
+            first = self.client.get(reverse(name))
+            for values in [['x', 'y'], ['2024-01-01', 'abc'], [1, 2], [None, None, None], ['a', 'b', 'c'], 'x']:
+                for param in ['after', 'before']:
+                    with self.subTest(name=name, values=values, param=param):
+                        response = self.client.get(reverse(name) + f'?{param}={self.cursor(values)}')
+                        self.assertEqual(response.status_code, 200)
+                        if name == 'api_requests':
+                            self.assertEqual(response.json()['results'], first.json()['results'])
+                        else:
+                            self.assertEqual(list(response.context['page']), list(first.context['page']))
+
+
+class BenchmarkCommandTests(TcuTestCase):
+    '''
+    benchmark_views recorre todas las rutas con parámetros de ejemplo
+    '''
+    def test_every_route_is_measured_or_skipped(self):
+        upload = UploadSession.objects.create(userId_student=self.student, fileName='a.pdf', totalSize=10)
+        out, err = StringIO(), StringIO()
+        call_command('benchmark_views', iterations=1, warmup=0, stdout=out, stderr=err)
+        results = json.loads(out.getvalue())['results']
+
+        measured = {(result['role'], result['url']) for result in results}
+        self.assertIn((catalog.STUDENT, 'upload_status'), measured)
+        self.assertIn(reverse('upload_status', args=[upload.uploadId]), {result['path'] for result in results})
+        self.assertIn((catalog.ADMIN, 'request_detail'), measured)
+        self.assertFalse({'start_upload', 'upload_chunk', 'logout'} & {url for _, url in measured})
+        # Sin adjuntos no hay ruta de descarga que medir
+        self.assertIn('Sin datos para download_file', err.getvalue())
+
+
+@override_settings(CACHE_SHARED=True)
+class CurrentUserCacheTests(TcuTestCase):
+    '''
+    Usuario de la sesión guardado en cache entre peticiones
+    '''
+    def setUp(self):
+        invalidate_current_user(*User.objects.values_list('userId', flat=True))
+
+    def request_for(self, user):
+        request = RequestFactory().get('/')
+        request.session = {'user_id': user.userId}
+        return get_current_user(request)
+
+    def test_cache_has_no_password(self):
+        self.request_for(self.student)
+        entry = cache_aliases['default'].get(current_user_cache_key(self.student.userId))
+        self.assertNotIn('password', entry['user'])
+        self.assertNotIn(self.student.password, str(entry))
+
+        with CaptureQueriesContext(connection) as captured:
+            user = self.request_for(self.student)
+            self.assertEqual((user.userId, user.email), (self.student.userId, self.student.email))
+            self.assertEqual(user.roleId.name, 'Estudiante')
+            self.assertEqual(user.projectId.name, self.project.name)
+        self.assertEqual(len(captured), 0)
+        # Los campos que no se guardan se leen de la base al pedirlos
+        self.assertEqual(user.password, self.student.password)
+
+    def test_deleting_project_refreshes_members(self):
+        self.assertEqual(self.request_for(self.student).projectId_id, self.project.pk)
+        Request.objects.filter(projectId=self.project).delete()
+        self.project.delete()
+        self.assertIsNone(self.request_for(self.student).projectId)
+
+    def test_editing_project_refreshes_members(self):
+        self.request_for(self.student)
+        self.project.name = 'Reforestación costera'
+        self.project.save()
+        self.assertEqual(self.request_for(self.student).projectId.name, 'Reforestación costera')
+
+    @override_settings(CACHE_SHARED=False)
+    def test_local_cache_reads_user_every_request(self):
+        # La invalidación no llegaría a los demás procesos
+        self.request_for(self.admin)
+        self.assertIsNone(cache_aliases['default'].get(current_user_cache_key(self.admin.userId)))
+        User.objects.filter(pk=self.admin.pk).update(roleId=self.student.roleId)
+        self.assertEqual(self.request_for(self.admin).roleId.name, 'Estudiante')
+
+
+@override_settings(PBKDF2_ITERATIONS=1000)
+class LoginTests(TcuTestCase):
+    '''
+    Inicio de sesión asíncrono con la verificación en el pool acotado
+    '''
+    def setUp(self):
+        self.student.set_password('secreto1')
+        self.student.save()
+        # Cada test arma su pool con los settings vigentes
+        pool = mock.patch.object(hashers, '_pool', None)
+        pool.start()
+        self.addCleanup(pool.stop)
+
+    def login(self, password, email='estudiante@example.com'):
+        return self.client.post(reverse('login'), {'email': email, 'password': password})
+
+    async def test_async_login(self):
+        response = await self.async_client.post(reverse('login'), {'email': self.student.email, 'password': 'secreto1'})
+        self.assertRedirects(response, reverse('home'), fetch_redirect_response=False)
+        session = await self.async_client.asession()
+        self.assertEqual(await session.aget('user_id'), self.student.userId)
+
+        for email, password in [(self.student.email, 'otra'), ('nadie@example.com', 'secreto1')]:
+            with self.subTest(email=email):
+                response = await self.async_client.post(reverse('login'), {'email': email, 'password': password})
+                self.assertEqual(response.status_code, 200)
+                self.assertContains(response, 'Correo o contraseña incorrectos.')
+
+    def test_failed_login_keeps_session_empty(self):
+        response = self.login('otra')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('user_id', self.client.session)
+
+    def test_hash_is_updated_when_iterations_change(self):
+        old_hash = self.student.password
+        with override_settings(PBKDF2_ITERATIONS=1200):
+            self.assertEqual(self.login('secreto1').status_code, 302)
+        self.student.refresh_from_db()
+        self.assertNotEqual(self.student.password, old_hash)
+        self.assertTrue(self.student.password.startswith('pbkdf2_sha256$1200$'))
+
+        # Con las mismas iteraciones no se vuelve a escribir
+        with override_settings(PBKDF2_ITERATIONS=1200), CaptureQueriesContext(connection) as captured:
+            self.login('secreto1')
+        self.assertFalse([q for q in captured if q['sql'].startswith('UPDATE "tcu_system_app_user"')])
+
+    @override_settings(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE_LIMIT=0)
+    def test_full_pool_returns_503(self):
+        started, release = threading.Event(), threading.Event()
+
+        def busy():
+            started.set()
+            release.wait(5)
+
+        # Un inicio de sesión en curso ocupa el único lugar del pool
+        worker = threading.Thread(target=async_to_sync(hashers.get_password_pool().run), args=[busy])
+        worker.start()
+        self.addCleanup(worker.join)
+        self.addCleanup(release.set)
+        self.assertTrue(started.wait(5))
+
+        response = self.login('secreto1')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertNotIn('user_id', self.client.session)
+
+        # Al terminar se libera el lugar
+        release.set()
+        worker.join()
+        self.assertEqual(self.login('secreto1').status_code, 302)
+
+
+@override_settings(PBKDF2_ITERATIONS=1000)
+class ImportDataTests(TcuTestCase):
+    '''
+    import_data: validación, --dry-run e importación con el ledger
+    '''
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def write(self, name, text):
+        path = os.path.join(self.dir, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def files(self):
+        return {
+            'projects': self.write('projects.csv', 'code,name,professor_email\ntcu200,Huertas urbanas,profesor@example.com\n'),
+            'users': self.write('users.jsonl', json.dumps({
+                'firstName': 'Eva', 'lastName': 'Solís', 'email': 'Eva@example.com', 'role': 'Estudiante',
+                'password': 'secreto1', 'project_code': 'TCU200',
+            }) + '\n'),
+            'requests': self.write('requests.csv', (
+                'student_email,hoursRequested,description,date,status,project_code\n'
+                'eva@example.com,5,Siembra,2025-02-01,Aceptada,\n'
+                'eva@example.com,3,Riego,2025-02-02,,\n'
+                'eva@example.com,2,Poda,2025-02-03,Rechazada,\n'
+                'estudiante@example.com,4,Abono,2025-02-04,Aceptada,TCU200\n'
+            )),
+        }
+
+    def run_import(self, **options):
+        out = StringIO()
+        call_command('import_data', workers=1, stdout=out, **options)
+        return out.getvalue()
+
+    def ledger_row(self, **owner):
+        row = HoursLedger.objects.get(**owner)
+        return row.approvedHours, row.pendingHours, row.rejectedHours
+
+    def test_import(self):
+        output = self.run_import(**self.files())
+        self.assertIn('Importados 1 proyectos, 1 usuarios y 4 solicitudes', output)
+
+        project = Project.objects.get(code='TCU200')
+        self.assertEqual(project.userId_professor, self.professor)
+        eva = User.objects.get(email='eva@example.com')
+        self.assertEqual((eva.projectId, eva.roleId.name, eva.lastNameKey), (project, 'Estudiante', 'solis'))
+        self.assertTrue(eva.check_password('secreto1'))
+        self.assertEqual(Request.objects.filter(userId_student=eva, projectId=project).count(), 3)
+
+        self.assertEqual(self.ledger_row(userId_student=eva), (5, 3, 2))
+        self.assertEqual(self.ledger_row(userId_student=self.student), (4, 0, 0))
+        self.assertEqual(self.ledger_row(projectId=project), (9, 3, 2))
+
+    def test_dry_run_writes_nothing(self):
+        counts = [model.objects.count() for model in (Project, User, Request, HoursLedger)]
+        output = self.run_import(dry_run=True, **self.files())
+        self.assertIn('Solicitudes válidas: 4', output)
+        self.assertIn('no se escribió nada', output)
+        self.assertEqual([model.objects.count() for model in (Project, User, Request, HoursLedger)], counts)
+
+    def test_invalid_rows_are_reported(self):
+        users = self.write('users.jsonl', '\n'.join([
+            json.dumps({'firstName': 'Eva', 'lastName': 'Solís', 'email': 'eva@example.com', 'role': 'Estudiante', 'password': 'secreto1'}),
+            json.dumps({'firstName': 'Ana', 'lastName': 'Mora', 'email': 'estudiante@example.com', 'role': 'Estudiante', 'password': 'secreto1'}),
+            json.dumps({'firstName': 'Leo', 'lastName': 'Vega', 'email': 'leo@example', 'role': 'Estudiante', 'password': 'secreto1'}),
+            json.dumps({'firstName': 'Sol', 'lastName': 'Ruiz', 'email': 'sol@example.com', 'role': 'Decano', 'password': 'secreto1'}),
+            '{"firstName": ',
+        ]) + '\n')
+        requests = self.write('requests.csv', (
+            'student_email,hoursRequested,description,date\n'
+            'eva@example.com,5,Siembra,01/02/2025\n'
+            'nadie@example.com,5,Siembra,2025-02-01\n'
+            'eva@example.com,500,Siembra,2025-02-01\n'
+        ))
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '7 errores; no se importó nada'):
+            call_command('import_data', users=users, requests=requests, workers=1, stdout=out)
+
+        report = out.getvalue()
+        for message in [
+            'users.jsonl:2: El email estudiante@example.com ya está registrado',
+            'users.jsonl:3: El formato del email leo@example no es válido',
+            'users.jsonl:4: Rol desconocido: Decano',
+            'users.jsonl:5: JSON inválido',
+            'requests.csv:2: Horas o fechas inválidas',
+            'requests.csv:3: Estudiante desconocido: nadie@example.com',
+            'requests.csv:4: Las horas deben estar entre 1 y 100',
+        ]:
+            self.assertIn(message, report)
+        self.assertIn('Usuarios válidos: 1', report)
+        # Ni siquiera las filas válidas se importan
+        self.assertFalse(User.objects.filter(email='eva@example.com').exists())
+
+
+class ExportTests(TcuTestCase):
+    '''
+    Exportación de solicitudes en CSV (streaming) y XLSX
+    '''
+    def setUp(self):
+        other_professor = User.objects.create(
+            roleId=self.professor.roleId, firstName='Marta', lastName='Quesada',
+            email='marta@example.com', password='!'
+        )
+        self.foreign_project = Project.objects.create(code='TCU900', name='Costas', userId_professor=other_professor)
+        Request.objects.create(
+            userId_student=self.student, projectId=self.foreign_project, statusId=self.statuses['Pendiente'],
+            hoursRequested=3, description='Limpieza de playa', date=datetime.date(2025, 6, 1),
+        )
+
+    def export_csv(self, user):
+        self.login_as(user)
+        response = self.client.get(reverse('export_requests'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment; filename="solicitudes_', response['Content-Disposition'])
+        content = b''.join(response.streaming_content).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff'))
+        return list(csv.reader(content[1:].splitlines()))
+
+    def test_csv_rows_are_scoped(self):
+        header, *rows = self.export_csv(self.professor)
+        self.assertEqual(header, exports.EXPORT_HEADER)
+        expected = Request.objects.filter(projectId__userId_professor=self.professor).order_by('-date', '-requestId')
+        self.assertEqual([int(row[0]) for row in rows], list(expected.values_list('requestId', flat=True)))
+        self.assertNotIn('TCU900', {row[4] for row in rows})
+
+        first = expected.select_related('userId_student', 'projectId', 'statusId').first()
+        self.assertEqual(rows[0][1:9], [
+            str(first.userId_student), first.userId_student.email, first.projectId.name, first.projectId.code,
+            first.statusId.name, str(first.hoursRequested), first.date.isoformat(),
+            first.revisionDate.isoformat() if first.revisionDate else '',
+        ])
+
+        _, *rows = self.export_csv(self.admin)
+        self.assertEqual(len(rows), Request.objects.count())
+
+    def test_formulas_are_escaped(self):
+        User.objects.filter(pk=self.student.pk).update(firstName='=HYPERLINK("http://x")', lastName='')
+        Request.objects.create(
+            userId_student=self.student, projectId=self.project, statusId=self.statuses['Pendiente'],
+            hoursRequested=2, description='+1+1', professorComent='@SUM(A1)', date=datetime.date(2030, 1, 1),
+        )
+        Request.objects.create(
+            userId_student=self.student, projectId=self.project, statusId=self.statuses['Pendiente'],
+            hoursRequested=2, description='-2', professorComent='\tx', date=datetime.date(2029, 1, 1),
+        )
+        _, first, second, *rows = self.export_csv(self.professor)
+        self.assertEqual(first[1], '\'=HYPERLINK("http://x")')
+        self.assertEqual(first[9:], ["'+1+1", "'@SUM(A1)"])
+        self.assertEqual(second[9:], ["'-2", "'\tx"])
+        self.assertEqual(second[5], 'Pendiente')
+
+    def test_students_cannot_export(self):
+        self.login_as(self.student)
+        self.assertEqual(self.client.get(reverse('export_requests')).status_code, 403)
+
+    def test_xlsx_without_openpyxl(self):
+        self.login_as(self.admin)
+        with mock.patch.object(exports, 'Workbook', None):
+            response = self.client.get(reverse('export_requests') + '?format=xlsx')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b'openpyxl', response.content)
+
+    @skipUnless(exports.Workbook, 'openpyxl no está instalado')
+    def test_xlsx(self):
+        from openpyxl import load_workbook
+        self.login_as(self.professor)
+        response = self.client.get(reverse('export_requests') + '?format=xlsx')
+        self.assertEqual(response.status_code, 200)
+        sheet = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        rows = list(sheet.values)
+        self.assertEqual(list(rows[0]), exports.EXPORT_HEADER)
+        self.assertEqual(len(rows) - 1, Request.objects.filter(projectId__userId_professor=self.professor).count())
+
+
+@override_settings(PBKDF2_ITERATIONS=1000)
+class GenerateDataTests(TcuTestCase):
+    '''
+    generate_data --clear elimina sin consultas por fila y recalcula al final
+    '''
+    def generate(self, requests):
+        with CaptureQueriesContext(connection) as captured:
+            call_command(
+                'generate_data', users=20, projects=3, requests=requests, clear=True,
+                prefix='prueba', batch_size=50, stdout=StringIO(),
+            )
+        return [q['sql'] for q in captured]
+
+    def test_clear_does_not_query_per_row(self):
+        self.generate(requests=100)
+        small = self.generate(requests=300)
+        large = self.generate(requests=300)
+        self.assertEqual(Request.objects.filter(userId_student__email__startswith='prueba.').count(), 300)
+        # Un DELETE por cada 100 ids (GET_ITERATOR_CHUNK_SIZE), no uno por solicitud
+        deletes = [sql for sql in large if sql.startswith('DELETE FROM "tcu_system_app_request"')]
+        self.assertEqual(len(deletes), 300 // GET_ITERATOR_CHUNK_SIZE)
+        self.assertLessEqual(len(large), len(small) + 6)
+
+        # Ledger y rollup quedan como si se hubieran recalculado desde cero
+        totals = Request.objects.filter(statusId=self.statuses['Aceptada'])
+        self.assertEqual(
+            HoursLedger.objects.filter(projectId__isnull=False).aggregate(hours=Sum('approvedHours'))['hours'],
+            totals.exclude(projectId=None).aggregate(hours=Sum('hoursRequested'))['hours'],
+        )
+        self.assertEqual(
+            HoursRollup.objects.filter(granularity=HoursRollup.MONTH, statusId=self.statuses['Aceptada'])
+            .aggregate(hours=Sum('hours'))['hours'],
+            totals.aggregate(hours=Sum('hoursRequested'))['hours'],
+        )
+
+    def test_every_delete_receiver_is_disconnected(self):
+        with delete_receivers_disconnected():
+            for model in (User, Project, Request):
+                for signal in (pre_delete, post_delete):
+                    self.assertFalse(signal.has_listeners(model), (signal, model))
+        self.assertTrue(post_delete.has_listeners(Request))
+
+
+class HoursLedgerTests(TcuTestCase):
+    '''
+    El ledger sigue a las solicitudes al crearlas y revisarlas, y la migración
+    que lo llena busca los estados por nombre
+    '''
+    def setUp(self):
+        ledger.rebuild_ledger()
+        catalog.statuses()
+
+    def totals(self, **owner):
+        row = HoursLedger.objects.get(**owner)
+        return row.pendingHours, row.approvedHours, row.rejectedHours
+
+    def expected(self, **owner):
+        hours = dict(
+            Request.objects.filter(**owner).values_list('statusId__name').annotate(hours=Sum('hoursRequested'))
+        )
+        return tuple(hours.get(name, 0) for name in ['Pendiente', 'Aceptada', 'Rechazada'])
+
+    def assertLedgerMatches(self, request_obj):
+        for owner in ({'userId_student': request_obj.userId_student_id}, {'projectId': request_obj.projectId_id}):
+            self.assertEqual(self.totals(**owner), self.expected(**owner), owner)
+
+    def review(self, request_obj, status):
+        response = self.client.post(
+            reverse('review_request', args=[request_obj.requestId]),
+            {'status': self.statuses[status].statusId},
+        )
+        self.assertEqual(response.status_code, 302)
+        request_obj.refresh_from_db()
+
+    def test_create(self):
+        before = self.totals(userId_student=self.student)
+        self.login_as(self.student)
+        self.client.post(reverse('create_request'), {
+            'hoursRequested': '5', 'description': 'Siembra', 'date': '2025-03-01',
+        })
+        created = Request.objects.get(userId_student=self.student, description='Siembra')
+        self.assertEqual(self.totals(userId_student=self.student), (before[0] + 5, before[1], before[2]))
+        self.assertLedgerMatches(created)
+
+    def test_approve_and_reject(self):
+        request_obj = Request.objects.filter(
+            userId_student=self.student, statusId=self.statuses['Pendiente']
+        ).first()
+        hours = request_obj.hoursRequested
+        pending, approved, rejected = self.totals(userId_student=self.student)
+        self.login_as(self.professor)
+
+        self.review(request_obj, 'Aceptada')
+        self.assertEqual(self.totals(userId_student=self.student), (pending - hours, approved + hours, rejected))
+        self.assertLedgerMatches(request_obj)
+
+        self.review(request_obj, 'Rechazada')
+        self.assertEqual(self.totals(userId_student=self.student), (pending - hours, approved, rejected + hours))
+        self.assertLedgerMatches(request_obj)
+
+        # Repetir el mismo estado no mueve horas
+        self.review(request_obj, 'Rechazada')
+        self.assertLedgerMatches(request_obj)
+
+    def test_edit_hours_status_and_project(self):
+        # Lo que permite el admin de solicitudes
+        request_obj = Request.objects.filter(userId_student=self.student, statusId=self.statuses['Aceptada']).first()
+        request_obj.hoursRequested += 10
+        request_obj.statusId = self.statuses['Rechazada']
+        request_obj.projectId = self.other_project
+        request_obj.save()
+        self.assertLedgerMatches(request_obj)
+        self.assertEqual(self.totals(projectId=self.project), self.expected(projectId=self.project))
+
+        # Cargada sin los campos del ledger
+        deferred = Request.objects.only('requestId', 'description').get(pk=request_obj.pk)
+        deferred.description = 'Editada'
+        deferred.save()
+        self.assertLedgerMatches(request_obj)
+
+    def test_delete(self):
+        request_obj = Request.objects.filter(userId_student=self.student, statusId=self.statuses['Aceptada']).first()
+        request_obj.delete()
+        self.assertLedgerMatches(request_obj)
+
+        # Acción "eliminar seleccionadas" del admin (delete_queryset)
+        selected = list(Request.objects.filter(userId_student=self.student).values_list('pk', flat=True)[:5])
+        Request.objects.filter(pk__in=selected).delete()
+        self.assertLedgerMatches(request_obj)
+
+    def test_backfill_looks_up_statuses_by_name(self):
+        # Con los IDs intercambiados un mapeo fijo contaría las horas en la columna equivocada
+        pending, accepted = self.statuses['Pendiente'], self.statuses['Aceptada']
+        Status.objects.filter(pk=pending.pk).update(name='Temporal')
+        Status.objects.filter(pk=accepted.pk).update(name='Pendiente')
+        Status.objects.filter(pk=pending.pk).update(name='Aceptada')
+        catalog.invalidate()
+
+        HoursLedger.objects.all().delete()
+        import_module('tcu_system_app.migrations.0008_hoursledger').backfill_ledger(apps, None)
+        self.assertEqual(self.totals(userId_student=self.student), self.expected(userId_student=self.student))
+        self.assertEqual(self.totals(projectId=self.other_project), self.expected(projectId=self.other_project))
+
+
+class BulkReviewTests(TcuTestCase):
+    '''
+    Revisión masiva: pertenencia, un solo UPDATE, ledger y dashboards
+    '''
+    def setUp(self):
+        ledger.rebuild_ledger()
+        catalog.statuses()
+        self.login_as(self.professor)
+
+    def pending_ids(self, student, count):
+        return list(
+            Request.objects.filter(userId_student=student, statusId=self.statuses['Pendiente'])
+            .values_list('requestId', flat=True)[:count]
+        )
+
+    def review(self, request_ids, status='Aceptada', comment=''):
+        return self.client.post(reverse('bulk_review'), {
+            'requests': request_ids,
+            'status': self.statuses[status].statusId,
+            'professorComment': comment,
+        })
+
+    def ledger_rows(self):
+        return sorted(HoursLedger.objects.values_list(
+            'userId_student_id', 'projectId_id', 'approvedHours', 'pendingHours', 'rejectedHours'
+        ), key=repr)
+
+    def test_screen_lists_pending_requests(self):
+        response = self.client.get(reverse('bulk_review'))
+        pending = Request.objects.filter(statusId=self.statuses['Pendiente']).count()
+        self.assertEqual(len(response.context['pending_requests']), pending)
+
+        self.login_as(self.student)
+        self.assertRedirects(self.client.get(reverse('bulk_review')), reverse('home'))
+
+    def test_applies_status_comment_and_revision_date(self):
+        request_ids = self.pending_ids(self.student, 5) + self.pending_ids(self.other_student, 5)
+        response = self.review(request_ids, comment='Revisado al cierre')
+        self.assertRedirects(response, reverse('bulk_review'))
+
+        reviewed = Request.objects.filter(requestId__in=request_ids)
+        self.assertEqual(set(reviewed.values_list('statusId', flat=True)), {self.statuses['Aceptada'].statusId})
+        self.assertEqual(set(reviewed.values_list('professorComent', flat=True)), {'Revisado al cierre'})
+        self.assertEqual(set(reviewed.values_list('revisionDate', flat=True)), {timezone.now().date()})
+
+        # El ledger queda igual que si se recalculara desde cero
+        rows = self.ledger_rows()
+        ledger.rebuild_ledger()
+        self.assertEqual(rows, self.ledger_rows())
+
+    def test_one_update_regardless_of_count(self):
+        def updates(request_ids):
+            with CaptureQueriesContext(connection) as captured:
+                self.review(request_ids)
+            return [q['sql'] for q in captured if q['sql'].startswith('UPDATE "tcu_system_app_request"')]
+
+        self.assertEqual(len(updates(self.pending_ids(self.student, 2))), 1)
+        self.assertEqual(len(updates(self.pending_ids(self.student, 10))), 1)
+
+    def test_rejects_requests_of_other_professors(self):
+        other_professor = User.objects.create(
+            roleId=self.professor.roleId, firstName='Elena', lastName='Soto',
+            email='otro.profesor@example.com', password='!'
+        )
+        self.login_as(other_professor)
+        request_ids = self.pending_ids(self.student, 3)
+        self.assertEqual(self.review(request_ids).status_code, 403)
+        self.assertFalse(
+            Request.objects.filter(requestId__in=request_ids).exclude(statusId=self.statuses['Pendiente']).exists()
+        )
+
+    def test_invalid_input(self):
+        before = self.ledger_rows()
+        self.review([])
+        self.review(['abc'])
+        response = self.client.post(reverse('bulk_review'), {'requests': self.pending_ids(self.student, 1)})
+        self.assertEqual(
+            [str(m) for m in response.wsgi_request._messages],
+            ['Seleccione al menos una solicitud', 'Seleccione al menos una solicitud', 'Seleccione el nuevo estado'],
+        )
+        self.assertEqual(self.ledger_rows(), before)
+
+    def test_invalidates_dashboards_and_api_versions(self):
+        dashboard_cache.invalidate(student_ids=[self.student.userId], professor_ids=[self.professor.userId])
+        self.login_as(self.student)
+        pending = self.client.get(reverse('home')).context['pending_count']
+        etag = self.client.get(reverse('api_requests'))['ETag']
+
+        self.login_as(self.professor)
+        self.review(self.pending_ids(self.student, 4))
+
+        self.login_as(self.student)
+        self.assertEqual(self.client.get(reverse('home')).context['pending_count'], pending - 4)
+        response = self.client.get(reverse('api_requests'), headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+
+class HoursRollupTests(TcuTestCase):
+    '''
+    Horas por semana y por mes: actualización incremental y rangos
+    '''
+    def setUp(self):
+        catalog.statuses()
+
+    def raw(self, granularity, start, end, professor=None):
+        requests = Request.objects.filter(date__gte=start, date__lte=end)
+        if professor is not None:
+            requests = requests.filter(projectId__userId_professor=professor)
+        return {
+            (row['period'], row['projectId'], row['statusId']): [row['hours'], row['count']]
+            for row in rollup._totals(requests, granularity)
+        }
+
+    def assertMatchesRaw(self, start=datetime.date(2024, 12, 1), end=datetime.date(2025, 3, 31)):
+        for granularity in [HoursRollup.WEEK, HoursRollup.MONTH]:
+            with self.subTest(granularity=granularity, start=start, end=end):
+                self.assertEqual(
+                    rollup.hours_by_period(granularity, start, end), self.raw(granularity, start, end)
+                )
+
+    def test_full_refresh_matches_raw_totals(self):
+        self.assertGreater(rollup.refresh(), 0)
+        self.assertMatchesRaw()
+        self.assertEqual(
+            sum(HoursRollup.objects.filter(granularity=HoursRollup.MONTH).values_list('hours', flat=True)),
+            sum(Request.objects.values_list('hoursRequested', flat=True)),
+        )
+
+    def test_partial_edges_come_from_requests(self):
+        rollup.refresh()
+        # Sin el rollup, solo los días sueltos: el rango completo debe seguir cuadrando
+        HoursRollup.objects.update(hours=0, requests=0)
+        self.assertNotEqual(
+            rollup.hours_by_period(HoursRollup.WEEK, datetime.date(2025, 1, 1), datetime.date(2025, 1, 20)),
+            self.raw(HoursRollup.WEEK, datetime.date(2025, 1, 1), datetime.date(2025, 1, 20)),
+        )
+        rollup.refresh(full=True)
+        for start, end in [
+            (datetime.date(2025, 1, 1), datetime.date(2025, 1, 20)),
+            (datetime.date(2025, 1, 3), datetime.date(2025, 1, 4)),
+            (datetime.date(2025, 1, 6), datetime.date(2025, 1, 12)),
+            (datetime.date(2024, 12, 30), datetime.date(2025, 1, 15)),
+        ]:
+            self.assertMatchesRaw(start, end)
+
+    def test_incremental_refresh_picks_up_changes(self):
+        rollup.refresh()
+        Request.objects.create(
+            userId_student=self.student, projectId=self.project, statusId=self.statuses['Pendiente'],
+            hoursRequested=5, description='Nueva', date=datetime.date(2025, 2, 10),
+        )
+        edited = Request.objects.filter(userId_student=self.student).first()
+        edited.statusId = self.statuses['Aceptada']
+        edited.hoursRequested = 8
+        edited.save()
+        moved = Request.objects.filter(userId_student=self.other_student).last()
+        moved.date = datetime.date(2025, 3, 3)
+        moved.save()
+        Request.objects.filter(userId_student=self.other_student).first().delete()
+        self.assertEqual(HoursRollupDirtyDay.objects.count(), 2)
+
+        with CaptureQueriesContext(connection) as captured:
+            rollup.refresh()
+        self.assertMatchesRaw()
+        self.assertFalse(HoursRollupDirtyDay.objects.exists())
+        # Solo se reescriben los periodos afectados
+        deletes = [q['sql'] for q in captured if q['sql'].startswith('DELETE FROM "tcu_system_app_hoursrollup"')]
+        self.assertTrue(all('IN' in sql for sql in deletes), deletes)
+
+    def test_professor_sees_own_projects_only(self):
+        rollup.refresh()
+        other_professor = User.objects.create(
+            roleId=self.professor.roleId, firstName='Elena', lastName='Soto',
+            email='otro.profesor@example.com', password='!'
+        )
+        start, end = datetime.date(2025, 1, 1), datetime.date(2025, 1, 31)
+        self.assertEqual(rollup.report(HoursRollup.WEEK, start, end, rollup.GROUP_PROJECT, professor=other_professor), [])
+
+        rows = rollup.report(HoursRollup.MONTH, start, end, rollup.GROUP_PROFESSOR, professor=self.professor)
+        self.assertEqual([row['name'] for row in rows], ['Carlos Rodríguez'])
+        self.assertEqual(rows[0]['submittedHours'], sum(Request.objects.values_list('hoursRequested', flat=True)))
+        self.assertEqual(
+            rows[0]['submittedHours'],
+            rows[0]['approvedHours'] + rows[0]['pendingHours'] + rows[0]['rejectedHours'],
+        )
+
+    def test_views_permissions(self):
+        rollup.refresh()
+        self.login_as(self.student)
+        self.assertRedirects(self.client.get(reverse('hours_analytics')), reverse('home'))
+        self.assertEqual(self.client.get(reverse('api_hours')).status_code, 403)
+
+        self.login_as(self.professor)
+        response = self.client.get(reverse('hours_analytics'), {'start': '2025-01-01', 'end': '2025-01-31'})
+        self.assertEqual({row['name'] for row in response.context['rows']}, {'Reforestación', 'Alfabetización'})
+        response = self.client.get(reverse('api_hours'), {'start': '2025-01-01', 'end': '2025-01-31', 'group': 'total'})
+        results = response.json()['results']
+        self.assertEqual(
+            sum(row['submittedHours'] for row in results),
+            sum(Request.objects.values_list('hoursRequested', flat=True)),
+        )
+
+        response = self.client.get(reverse('api_hours'), {'start': '2025-02-01', 'end': '2025-01-01'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+        response = self.client.get(reverse('hours_analytics'), {'granularity': 'dia'})
+        self.assertEqual(response.context['error'], 'Granularidad inválida')
+
+
+class VisibilityTests(TcuTestCase):
+    '''
+    Request.objects.visible_to() y Request.is_visible_to() aplican el mismo
+    criterio por rol, en una sola consulta
+    '''
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_professor = User.objects.create(
+            roleId=cls.professor.roleId, firstName='Elena', lastName='Soto',
+            email='otro.profesor@example.com', password='!'
+        )
+        cls.foreign_project = Project.objects.create(
+            code='TCU003', name='Huertas', userId_professor=cls.other_professor
+        )
+        cls.foreign_request = Request.objects.create(
+            userId_student=cls.student, projectId=cls.foreign_project, statusId=cls.statuses['Pendiente'],
+            hoursRequested=3, description='Otro proyecto', date=datetime.date(2025, 2, 1),
+        )
+
+    def setUp(self):
+        invalidate_current_user(*User.objects.values_list('userId', flat=True))
+
+    def test_one_query_per_role(self):
+        for user in [self.student, self.professor, self.admin]:
+            user = User.objects.select_related('roleId').get(pk=user.pk)
+            with self.subTest(user=user.email), CaptureQueriesContext(connection) as captured:
+                list(Request.objects.visible_to(user))
+            self.assertEqual(len(captured), 1)
+
+    def test_matches_instance_check(self):
+        requests = list(Request.objects.select_related('projectId'))
+        for user in [self.student, self.other_student, self.professor, self.other_professor, self.admin]:
+            user = User.objects.select_related('roleId').get(pk=user.pk)
+            with self.subTest(user=user.email):
+                self.assertEqual(
+                    set(Request.objects.visible_to(user).values_list('pk', flat=True)),
+                    {request_obj.pk for request_obj in requests if request_obj.is_visible_to(user)},
+                )
+        self.assertEqual(list(Request.objects.visible_to(self.other_professor)), [self.foreign_request])
+
+    def test_professor_limited_to_own_projects(self):
+        self.login_as(self.professor)
+        request_id = self.foreign_request.requestId
+        self.assertEqual(self.client.get(reverse('request_detail', args=[request_id])).status_code, 403)
+        self.assertEqual(self.client.get(reverse('review_request', args=[request_id])).status_code, 403)
+        response = self.client.post(reverse('review_request', args=[request_id]), {
+            'status': self.statuses['Aceptada'].statusId,
+        })
+        self.assertEqual(response.status_code, 403)
+        self.foreign_request.refresh_from_db()
+        self.assertEqual(self.foreign_request.statusId, self.statuses['Pendiente'])
+
+        self.login_as(self.other_professor)
+        self.assertEqual(self.client.get(reverse('request_detail', args=[request_id])).status_code, 200)
+
+
+class UserDirectoryTests(TcuTestCase):
+    '''
+    Directorio de usuarios: filtros, búsqueda por prefijo y paginación
+    '''
+    def setUp(self):
+        self.login_as(self.admin)
+
+    def names(self, params='', **extra):
+        response = self.client.get(reverse('list_users') + params, extra)
+        return [user.email for user in response.context['users']]
+
+    def test_filters_and_prefix_search(self):
+        self.assertEqual(
+            self.names(),
+            ['estudiante@example.com', 'otro@example.com', 'profesor@example.com', 'admin@example.com'],
+        )
+        self.assertEqual(self.names(role=self.student.roleId_id), ['estudiante@example.com', 'otro@example.com'])
+        self.assertEqual(self.names(project=self.other_project.projectId), ['otro@example.com'])
+        self.assertEqual(
+            self.names(project=0), ['profesor@example.com', 'admin@example.com']
+        )
+        # Prefijo del apellido, del nombre o del email, sin distinguir mayúsculas
+        self.assertEqual(self.names(q='MART'), ['estudiante@example.com'])
+        self.assertEqual(self.names(q='lu'), ['otro@example.com'])
+        self.assertEqual(self.names(q='profesor@'), ['profesor@example.com'])
+        self.assertEqual(self.names(q='ana mar'), ['estudiante@example.com'])
+        self.assertEqual(self.names(q='artínez'), [])
+        # Un filtro inválido se ignora
+        self.assertEqual(len(self.names(role='x', project='y')), 4)
+
+    def test_accents_and_case_are_ignored(self):
+        for first, last, email in [('Ángel', 'Óscarson', 'angel@example.com'), ('Úrsula', 'Núñez', 'ursula@example.com')]:
+            User.objects.create(roleId=self.student.roleId, firstName=first, lastName=last, email=email, password='!')
+        for term in ['áng', 'Áng', 'ANG', 'óscar', 'oscar']:
+            with self.subTest(term=term):
+                self.assertEqual(self.names(q=term), ['angel@example.com'])
+        self.assertEqual(self.names(q='úrsula nuñ'), ['ursula@example.com'])
+        # Se ordenan como si no tuvieran tilde, no después de la 'z'
+        self.assertEqual(
+            self.names(role=self.student.roleId_id),
+            ['estudiante@example.com', 'otro@example.com', 'ursula@example.com', 'angel@example.com'],
+        )
+
+        user = User.objects.get(email='angel@example.com')
+        user.lastName = 'Éxito'
+        user.save(update_fields=['lastName'])
+        self.assertEqual(self.names(q='exito'), ['angel@example.com'])
+
+    def test_pages_cover_every_user_once(self):
+        for i in range(23):
+            User.objects.create(
+                roleId=self.student.roleId, firstName='Extra', lastName=f'mora {i:02d}',
+                email=f'extra{i}@example.com', password='!', projectId=self.project
+            )
+        seen, params = [], '?page_size=5&q=mora'
+        while True:
+            response = self.client.get(reverse('list_users') + params)
+            seen += [user.userId for user in response.context['users']]
+            page = response.context['page']
+            if not page.has_next:
+                break
+            params = f"?{response.context['filters']}&after={page.next_cursor}"
+        self.assertEqual(len(seen), 24)
+        self.assertEqual(set(seen), set(User.objects.filter(lastName__istartswith='mora').values_list('pk', flat=True)))
+
+    @skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN es específico de SQLite')
+    def test_pages_use_indexes(self):
+        from .views.users import USER_ORDER, user_directory
+        for args in [('', None, None), ('', self.student.roleId_id, None), ('', None, self.project.pk), ('mar', None, None)]:
+            sql, params = user_directory(*args).order_by(*USER_ORDER)[:51].query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+                plan = [row[3] for row in cursor.fetchall()]
+            with self.subTest(args=args):
+                user_steps = [step for step in plan if 'tcu_system_app_user ' in f'{step} ']
+                self.assertTrue(user_steps, plan)
+                self.assertTrue(all('INDEX user_' in step for step in user_steps), plan)
+                # Sin búsqueda, el índice ya entrega las filas en orden
+                if not args[0]:
+                    self.assertFalse(any('TEMP B-TREE' in step for step in plan), plan)
+
+
+class ProjectStatsTests(TcuTestCase):
+    '''
+    Estadísticas por proyecto en la lista y en la eliminación
+    '''
+    def setUp(self):
+        ledger.rebuild_ledger()
+        catalog.statuses()
+        self.login_as(self.admin)
+
+    def test_list_shows_stats_from_one_query(self):
+        response = self.client.get(reverse('list_projects'))
+        projects = {project.pk: project for project in response.context['all_projects']}
+        for project in [self.project, self.other_project]:
+            requests = Request.objects.filter(projectId=project)
+            with self.subTest(project=project.name):
+                stats = projects[project.pk]
+                self.assertEqual(stats.student_count, User.objects.filter(projectId=project).count())
+                self.assertEqual(stats.pending_count, requests.filter(statusId=self.statuses['Pendiente']).count())
+                self.assertEqual(
+                    stats.approved_hours,
+                    sum(requests.filter(statusId=self.statuses['Aceptada']).values_list('hoursRequested', flat=True)),
+                )
+                self.assertFalse(stats.can_be_deleted)
+
+        # Agregar proyectos no agrega consultas
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(reverse('list_projects'))
+        for i in range(5):
+            Project.objects.create(code=f'S{i}', name=f'Sin datos {i}')
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(reverse('list_projects'))
+        self.assertEqual(len(before), len(after))
+        empty = [project for project in response.context['all_projects'] if project.code.startswith('S')]
+        self.assertTrue(all(project.can_be_deleted and project.approved_hours == 0 for project in empty))
+
+    def test_delete_uses_same_annotations(self):
+        def delete(project):
+            with CaptureQueriesContext(connection) as captured:
+                response = self.client.post(reverse('delete_project', args=[project.pk]))
+            # exists() compila a SELECT 1 AS "a" ... LIMIT 1
+            return response, [q['sql'] for q in captured if q['sql'].startswith('SELECT 1 AS')]
+
+        response, exists_queries = delete(self.project)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('estudiantes', response.json()['error'])
+        self.assertEqual(exists_queries, [])
+
+        # Sin estudiantes pero con solicitudes
+        User.objects.filter(projectId=self.other_project).update(projectId=None)
+        response, _ = delete(self.other_project)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('solicitudes', response.json()['error'])
+
+        empty = Project.objects.create(code='TCU009', name='Vacío')
+        response, _ = delete(empty)
+        self.assertTrue(response.json()['success'])
+        self.assertFalse(Project.objects.filter(pk=empty.pk).exists())
+
+
+class DatabaseProfileTests(SimpleTestCase):
+    '''
+    Configuración de DATABASES según las variables TCU_DB_*
+    '''
+    def test_sqlite_profile(self):
+        config = databases.database_from_env(Path('/srv/tcu'), env={})
+        self.assertEqual(config['NAME'], '/srv/tcu/db.sqlite3')
+        self.assertEqual(config['CONN_MAX_AGE'], 0)
+        self.assertEqual(config['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        init_command = config['OPTIONS']['init_command']
+        for pragma in ['synchronous=NORMAL', 'busy_timeout=5000', 'cache_size=-20000']:
+            self.assertIn(f'PRAGMA {pragma}', init_command)
+        # WAL se activa una vez en el archivo, no en cada conexión
+        self.assertNotIn('journal_mode', init_command)
+
+    def test_server_profile(self):
+        config = databases.database_from_env(Path('/srv/tcu'), env={
+            'TCU_DB_ENGINE': 'postgresql', 'TCU_DB_HOST': 'db', 'TCU_DB_PASSWORD': 'secreto',
+            'TCU_DB_CONN_MAX_AGE': '300',
+        })
+        self.assertEqual(config['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual((config['HOST'], config['PORT'], config['PASSWORD']), ('db', '5432', 'secreto'))
+        self.assertEqual(config['CONN_MAX_AGE'], 300)
+        self.assertNotIn('OPTIONS', config)
+
+        mysql = databases.database_from_env(Path('/srv/tcu'), env={'TCU_DB_ENGINE': 'MySQL'})
+        self.assertEqual(mysql['OPTIONS']['charset'], 'utf8mb4')
+
+        with self.assertRaises(ValueError):
+            databases.database_from_env(Path('/srv/tcu'), env={'TCU_DB_ENGINE': 'oracle'})
+
+    def test_pragmas_are_applied(self):
+        config = databases.database_from_env(Path('/srv/tcu'), env={})
+        connection = sqlite3.connect(':memory:')
+        for command in config['OPTIONS']['init_command'].split(';'):
+            connection.execute(command)
+        self.assertEqual(connection.execute('PRAGMA busy_timeout').fetchone(), (5000,))
+        self.assertEqual(connection.execute('PRAGMA cache_size').fetchone(), (-20000,))
+        connection.close()
+
+    def test_enable_wal(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'db.sqlite3')
+            sqlite3.connect(path).close()
+            self.assertEqual(databases.enable_wal(path), 'wal')
+            connection = sqlite3.connect(path)
+            self.assertEqual(connection.execute('PRAGMA journal_mode').fetchone(), ('wal',))
+            connection.close()
+
+
+class SessionStoreTests(TcuTestCase):
+    '''
+    Sesiones leídas del cache con escritura también en la base
+    '''
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_session_read_from_cache(self):
+        self.login_as(self.admin)
+        self.assertTrue(Session.objects.filter(session_key=self.client.session.session_key).exists())
+        self.client.get(reverse('home'))
+
+        with CaptureQueriesContext(connection) as captured:
+            self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+        self.assertFalse([q['sql'] for q in captured if 'django_session' in q['sql']])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_session_survives_cache_clear(self):
+        self.login_as(self.admin)
+        cache_aliases[settings.SESSION_CACHE_ALIAS].clear()
+        self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+
+    def test_clean_sessions_deletes_only_expired(self):
+        now = timezone.now()
+        Session.objects.bulk_create(
+            [Session(session_key=f'vencida{i:03}', session_data='', expire_date=now - datetime.timedelta(days=1)) for i in range(5)]
+            + [Session(session_key='vigente', session_data='', expire_date=now + datetime.timedelta(days=1))]
+        )
+        out = StringIO()
+        call_command('clean_sessions', batch_size=2, stdout=out)
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['vigente'])
+        self.assertIn('5 en 3 lotes', out.getvalue())
+
+
+class CacheProfileTests(SimpleTestCase):
+    '''
+    Configuración de CACHES según las variables TCU_CACHE_*
+    '''
+    def test_local_profile(self):
+        config = caches.caches_from_env(env={})
+        self.assertEqual(set(config), {'default', 'sessions'})
+        self.assertEqual(config['default']['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
+        self.assertNotEqual(config['default']['LOCATION'], config['sessions']['LOCATION'])
+        self.assertEqual(config['sessions']['OPTIONS']['MAX_ENTRIES'], 10000)
+
+    def test_shared_profiles(self):
+        redis = caches.caches_from_env(env={'TCU_CACHE_BACKEND': 'redis', 'TCU_CACHE_LOCATION': 'redis://cache:6379/'})
+        self.assertEqual(redis['default']['LOCATION'], 'redis://cache:6379/0')
+        self.assertEqual(redis['sessions']['LOCATION'], 'redis://cache:6379/1')
+
+        memcached = caches.caches_from_env(env={'TCU_CACHE_BACKEND': 'Memcached'})
+        self.assertEqual(memcached['sessions']['LOCATION'], '127.0.0.1:11211')
+        self.assertNotEqual(memcached['default']['KEY_PREFIX'], memcached['sessions']['KEY_PREFIX'])
+
+        with self.assertRaises(ValueError):
+            caches.caches_from_env(env={'TCU_CACHE_BACKEND': 'database'})
+
+    def test_session_engine(self):
+        db, cached_db = 'django.contrib.sessions.backends.db', 'django.contrib.sessions.backends.cached_db'
+        self.assertEqual(caches.session_engine_from_env(env={}), db)
+        self.assertEqual(caches.session_engine_from_env(env={'TCU_CACHE_BACKEND': 'redis'}), cached_db)
+        self.assertEqual(
+            caches.session_engine_from_env(env={'TCU_CACHE_BACKEND': 'redis', 'TCU_SESSION_ENGINE': db}), db
+        )
+        # Sesiones en el cache de cada proceso: un logout no llegaría a los demás
+        with self.assertRaisesMessage(ValueError, 'necesita un cache compartido'):
+            caches.session_engine_from_env(env={'TCU_SESSION_ENGINE': cached_db})
@@ -0,0 +1,201 @@
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File as DjangoFile
+from django.utils import timezone
+
+from .models import File, UploadSession
+
+
+# Tipo real esperado para cada extensión permitida
+ALLOWED_TYPES = {
+    '.pdf': 'application/pdf',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.txt': 'text/plain',
+}
+
+# Firmas de los formatos binarios. DOCX es un zip y DOC un documento OLE.
+MAGIC_BYTES = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'PK\x03\x04', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/msword'),
+]
+
+# Bytes del inicio del archivo que se revisan
+SNIFF_BYTES = 512
+
+READ_SIZE = 64 * 1024
+
+
+class UploadRejected(Exception):
+    '''
+    El archivo o la parte recibida no se aceptan; `status` es el código HTTP
+    '''
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def extension(name):
+    return os.path.splitext(name)[1].lower()
+
+
+def sniff(head):
+    '''
+    Tipo MIME según los primeros bytes del archivo, o None si no se reconoce.
+    Se considera texto lo que no tiene bytes nulos.
+    '''
+    for magic, content_type in MAGIC_BYTES:
+        if head.startswith(magic):
+            return content_type
+    if head and b'\x00' not in head:
+        return 'text/plain'
+    return None
+
+
+def check_content(name, head):
+    '''
+    Verifica que el contenido corresponda a la extensión del nombre y
+    devuelve el tipo MIME detectado
+    '''
+    expected = ALLOWED_TYPES.get(extension(name))
+    if expected is None:
+        raise UploadRejected(f"El archivo {name} tiene un tipo no permitido", status=415)
+    detected = sniff(head)
+    if detected != expected:
+        raise UploadRejected(f"El contenido de {name} no corresponde a su extensión", status=415)
+    return detected
+
+
+def temp_path(session):
+    return os.path.join(settings.UPLOAD_TEMP_DIR, f'{session.uploadId}.part')
+
+
+def start(user, name, size):
+    '''
+    Crea la sesión de subida después de validar nombre, tamaño y cantidad de
+    subidas pendientes del estudiante
+    '''
+    name = os.path.basename(name or '').strip()
+    if not name:
+        raise UploadRejected("El nombre del archivo es obligatorio")
+    if extension(name) not in ALLOWED_TYPES:
+        raise UploadRejected(f"El archivo {name} tiene un tipo no permitido", status=415)
+    if size <= 0:
+        raise UploadRejected("El archivo está vacío")
+    if size > settings.UPLOAD_MAX_SIZE:
+        raise UploadRejected(
+            f"El archivo {name} excede el tamaño máximo de {settings.UPLOAD_MAX_SIZE // (1024 * 1024)}MB",
+            status=413,
+        )
+    if UploadSession.objects.filter(userId_student=user).count() >= settings.UPLOAD_MAX_PENDING:
+        raise UploadRejected("Hay demasiadas subidas pendientes", status=429)
+
+    session = UploadSession.objects.create(userId_student=user, fileName=name, totalSize=size)
+    os.makedirs(settings.UPLOAD_TEMP_DIR, exist_ok=True)
+    open(temp_path(session), 'wb').close()
+    return session
+
+
+def append_chunk(session, stream, offset, length):
+    '''
+    Escribe en el archivo temporal `length` bytes leídos de `stream` a partir
+    de `offset`, sin cargar la parte completa en memoria. Lo que quedó de un
+    intento anterior interrumpido después de `offset` se descarta. El tipo se
+    verifica con los primeros bytes de la primera parte, antes de seguir
+    leyendo. Devuelve el nuevo offset.
+    '''
+    if offset != session.receivedBytes:
+        raise UploadRejected("El offset no coincide con lo recibido", status=409)
+    if length <= 0:
+        raise UploadRejected("La parte está vacía")
+    if length > settings.UPLOAD_CHUNK_SIZE:
+        raise UploadRejected("La parte excede el tamaño máximo", status=413)
+    if offset + length > session.totalSize:
+        raise UploadRejected("La parte excede el tamaño declarado del archivo", status=413)
+
+    checked = offset > 0
+    head = b''
+    with open(temp_path(session), 'r+b') as f:
+        f.seek(offset)
+        f.truncate()
+        remaining = length
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            if not checked:
+                head += data[:SNIFF_BYTES - len(head)]
+                if len(head) >= min(SNIFF_BYTES, session.totalSize):
+                    session.contentType = check_content(session.fileName, head)
+                    checked = True
+            f.write(data)
+            remaining -= len(data)
+
+        if remaining:
+            # La conexión se cortó: se vuelve al último offset confirmado
+            f.truncate(offset)
+            raise UploadRejected("La parte llegó incompleta; reanude desde el offset actual")
+        if not checked:
+            session.contentType = check_content(session.fileName, head)
+
+    new_offset = offset + length
+    # Si otra petición avanzó la misma sesión, esta parte no cuenta
+    updated = UploadSession.objects.filter(pk=session.pk, receivedBytes=offset).update(
+        receivedBytes=new_offset, contentType=session.contentType
+    )
+    if not updated:
+        session.refresh_from_db(fields=['receivedBytes'])
+        raise UploadRejected("La subida cambió mientras se recibía la parte", status=409)
+    session.receivedBytes = new_offset
+    return new_offset
+
+
+def discard(session):
+    '''
+    Elimina la sesión y su archivo temporal
+    '''
+    try:
+        os.remove(temp_path(session))
+    except FileNotFoundError:
+        pass
+    session.delete()
+
+
+def attach(request_obj, user, upload_ids):
+    '''
+    Convierte las subidas completas del estudiante en archivos de la
+    solicitud. Devuelve los nombres de las que no se pudieron adjuntar.
+    '''
+    ids = []
+    for upload_id in upload_ids:
+        try:
+            ids.append(uuid.UUID(upload_id))
+        except ValueError:
+            continue
+    sessions = UploadSession.objects.filter(userId_student=user, uploadId__in=ids)
+
+    skipped = []
+    for session in sessions:
+        if not session.is_complete:
+            skipped.append(session.fileName)
+            continue
+        file_record = File(requestId=request_obj)
+        with open(temp_path(session), 'rb') as f:
+            file_record.filePath.save(session.fileName, DjangoFile(f), save=True)
+        discard(session)
+    return skipped
+
+
+def expired_sessions():
+    cutoff = timezone.now() - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    return UploadSession.objects.filter(createdAt__lt=cutoff)
@@ -1,23 +1,44 @@
+from types import SimpleNamespace
+
+from django.conf import settings
 from django.urls import path
-from .views.requests import list_requests, review_request, request_detail, create_request
+from .views import async_views
+from .views.requests import list_requests, review_request, bulk_review, request_detail, create_request
 from .views.projects import list_projects, create_project, edit_project, delete_project
 from .views.users import list_users, create_user, edit_user, delete_user
+from .views.exports import export_requests
+from .views.files import download_file, file_preview
+from .views.uploads import start_upload, upload_status, upload_chunk
+from .views.analytics import hours_analytics
+from .views.api import api_requests, api_projects, api_users, api_hours
 from .views.auth import login, logout
 from .views.home import home
 
+# Vistas de lectura más usadas: con ASYNC_VIEWS (bajo ASGI) corren sin pasar por un hilo
+read_views = async_views if settings.ASYNC_VIEWS else SimpleNamespace(
+    home=home, list_requests=list_requests, request_detail=request_detail, list_projects=list_projects,
+)
+
 urlpatterns = [
     path('login/', login, name='login'),
     path('logout/', logout, name='logout'),
-    path('', home, name='home'),
-    path('home/', home, name='home'),
+    path('', read_views.home, name='home'),
+    path('home/', read_views.home, name='home'),
     
-    path('requests/', list_requests, name='requests'),
+    path('requests/', read_views.list_requests, name='requests'),
     path('requests/create/', create_request, name='create_request'),
+    path('requests/export/', export_requests, name='export_requests'),
     path('review/<int:request_id>/', review_request, name='review_request'),
-    path('request/<int:request_id>/', request_detail, name='request_detail'),
+    path('review/bulk/', bulk_review, name='bulk_review'),
+    path('request/<int:request_id>/', read_views.request_detail, name='request_detail'),
+    path('files/<int:file_id>/', download_file, name='download_file'),
+    path('files/<int:file_id>/preview/<str:size>/', file_preview, name='file_preview'),
+    path('uploads/start/', start_upload, name='start_upload'),
+    path('uploads/<uuid:upload_id>/', upload_status, name='upload_status'),
+    path('uploads/<uuid:upload_id>/chunk/', upload_chunk, name='upload_chunk'),
     
     
-    path('projects/', list_projects, name='list_projects'),
+    path('projects/', read_views.list_projects, name='list_projects'),
     path('projects/create/', create_project, name='create_project'),
     path('projects/edit/<int:project_id>/', edit_project, name='edit_project'),
     path('projects/delete/<int:project_id>/', delete_project, name='delete_project'),
@@ -27,4 +48,13 @@ urlpatterns = [
     path('users/create/', create_user, name='create_user'),
     path('users/edit/<int:user_id>/', edit_user, name='edit_user'),
     path('users/delete/<int:user_id>/', delete_user, name='delete_user'),
+    
+    
+    path('analytics/hours/', hours_analytics, name='hours_analytics'),
+    
+    
+    path('api/v1/requests/', api_requests, name='api_requests'),
+    path('api/v1/projects/', api_projects, name='api_projects'),
+    path('api/v1/users/', api_users, name='api_users'),
+    path('api/v1/hours/', api_hours, name='api_hours'),
 ]
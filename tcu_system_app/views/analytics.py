@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.shortcuts import redirect, render
+from django.utils import timezone
+
+from .. import rollup
+from ..models import HoursRollup
+from .auth import login_required
+
+
+def report_params(query):
+    '''
+    (granularidad, inicio, fin, agrupación) de los parámetros, o un
+    mensaje de error. Por defecto, las últimas 12 semanas por proyecto.
+    '''
+    granularity = query.get('granularity') or HoursRollup.WEEK
+    group = query.get('group') or rollup.GROUP_PROJECT
+    if granularity not in dict(HoursRollup.GRANULARITIES):
+        return "Granularidad inválida"
+    if group not in rollup.GROUPS:
+        return "Agrupación inválida"
+
+    try:
+        end = date.fromisoformat(query['end']) if query.get('end') else timezone.now().date()
+        start = date.fromisoformat(query['start']) if query.get('start') else (
+            rollup.period_start(granularity, end) - timedelta(weeks=11)
+            if granularity == HoursRollup.WEEK
+            else rollup.period_start(granularity, end - timedelta(days=335))
+        )
+    except ValueError:
+        return "Formato de fecha inválido. Use YYYY-MM-DD"
+    if start > end:
+        return "La fecha inicial no puede ser posterior a la final"
+    if (end - start).days > settings.HOURS_ANALYTICS_MAX_DAYS:
+        return f"El rango no puede superar {settings.HOURS_ANALYTICS_MAX_DAYS} días"
+    return granularity, start, end, group
+
+
+def report_scope(user):
+    '''
+    Profesor al que se limita el reporte (None para el administrador), o
+    False si el rol no puede verlo
+    '''
+    user_role = user.roleId.name.lower()
+    if user_role == 'profesor':
+        return user
+    if user_role == 'admin':
+        return None
+    return False
+
+
+@login_required
+def hours_analytics(request):
+    user = request.current_user
+    professor = report_scope(user)
+    if professor is False:
+        return redirect('home')
+
+    params = report_params(request.GET)
+    error, rows = None, []
+    if isinstance(params, str):
+        # El formulario se muestra con los valores por defecto
+        error, params = params, report_params({})
+    granularity, start, end, group = params
+    if error is None:
+        rows = rollup.report(granularity, start, end, group, professor=professor)
+
+    peak = max((row['submittedHours'] for row in rows), default=0)
+    for row in rows:
+        row['barWidth'] = round(row['submittedHours'] * 100 / peak) if peak else 0
+        row['approvedWidth'] = round(row['approvedHours'] * 100 / peak) if peak else 0
+
+    context = {
+        'rows': rows,
+        'error': error,
+        'granularity': granularity,
+        'start': start,
+        'end': end,
+        'group': group,
+        'granularities': HoursRollup.GRANULARITIES,
+        'groups': rollup.GROUPS,
+        'totals': {
+            field: sum(row[field] for row in rows)
+            for field in ['submittedHours', 'approvedHours', 'pendingHours', 'rejectedHours']
+        },
+        'last_refresh': rollup.last_refresh(),
+        'user_role': user.roleId.name,
+    }
+    return render(request, 'tcu_system_app/analytics/hours.html', context)
@@ -0,0 +1,231 @@
+'''
+API JSON de solo lectura (v1) para el portal del departamento. Aplica los
+mismos permisos que las páginas HTML. Cada respuesta lleva un ETag y un
+Last-Modified calculados con una sola consulta agregada (cantidad de filas y
+MAX(updatedAt)); si el cliente ya tiene esa versión recibe 304 sin que se
+lea ninguna fila. La revisión de una solicitud (revisionDate) pasa por
+save() y actualiza updatedAt, así que no hace falta leerla aparte.
+
+?fields=id,hoursRequested elige las columnas, ?page_size= el tamaño de
+página y los enlaces next/previous llevan el cursor (pagination.py).
+'''
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_safe
+
+from .. import catalog, rollup
+from ..models import Project, Request, User
+from ..pagination import get_page_size, keyset_paginate
+from .analytics import report_params, report_scope
+from .auth import is_authenticated
+
+
+def _status_name(status_id):
+    status = catalog.status(status_id)
+    return status.name if status else None
+
+
+def _role_name(role_id):
+    role = catalog.role(role_id)
+    return role.name if role else None
+
+
+# Campo de la API -> (columna para values(), conversión opcional)
+REQUEST_FIELDS = {
+    'id': ('requestId', None),
+    'studentId': ('userId_student_id', None),
+    'projectId': ('projectId_id', None),
+    'status': ('statusId_id', _status_name),
+    'hoursRequested': ('hoursRequested', None),
+    'date': ('date', None),
+    'revisionDate': ('revisionDate', None),
+    'description': ('description', None),
+    'professorComent': ('professorComent', None),
+    'updatedAt': ('updatedAt', None),
+}
+
+PROJECT_FIELDS = {
+    'id': ('projectId', None),
+    'code': ('code', None),
+    'name': ('name', None),
+    'professorId': ('userId_professor_id', None),
+    'updatedAt': ('updatedAt', None),
+}
+
+# La contraseña nunca se expone
+USER_FIELDS = {
+    'id': ('userId', None),
+    'firstName': ('firstName', None),
+    'lastName': ('lastName', None),
+    'email': ('email', None),
+    'role': ('roleId_id', _role_name),
+    'projectId': ('projectId_id', None),
+    'updatedAt': ('updatedAt', None),
+}
+
+
+def api_view(view_func):
+    '''
+    Vista de la API: solo GET/HEAD y, sin sesión, 401 en JSON en lugar de
+    redirigir al login
+    '''
+    @require_safe
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        if not is_authenticated(request):
+            return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
+        return view_func(request, *args, **kwargs)
+    return wrapper
+
+
+def _forbidden():
+    return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+
+
+def _selected_fields(request, available):
+    '''
+    Campos pedidos con ?fields= (todos si no se indica), o None si alguno
+    no existe
+    '''
+    requested = [name.strip() for name in request.GET.get('fields', '').split(',') if name.strip()]
+    if not requested:
+        return list(available)
+    if any(name not in available for name in requested):
+        return None
+    return list(dict.fromkeys(requested))
+
+
+def _version(request, queryset):
+    '''
+    ETag y Last-Modified de la lista a partir de una consulta agregada. La
+    cantidad de filas cubre las eliminaciones y MAX(updatedAt) cualquier
+    alta o edición.
+    '''
+    version = queryset.order_by().aggregate(rows=Count('pk'), updated=Max('updatedAt'))
+
+    # Los nombres de estados y roles salen del catálogo
+    parts = [request.current_user.pk, catalog.version(), request.get_full_path()]
+    parts += [version['rows'], version['updated']]
+    etag = quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+    last_modified = int(version['updated'].timestamp()) if version['updated'] else None
+    return etag, last_modified
+
+
+def _with_version(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # El cliente debe revalidar siempre; la respuesta depende de la sesión
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _page_url(request, cursor_param, cursor):
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params[cursor_param] = cursor
+    return f'{request.path}?{params.urlencode()}'
+
+
+def _api_list(request, queryset, available, order, descending=False):
+    '''
+    Respuesta paginada con los campos pedidos, o 304/412 si la versión del
+    cliente está vigente
+    '''
+    fields = _selected_fields(request, available)
+    if fields is None:
+        return JsonResponse({
+            'success': False,
+            'error': f"Campo inválido. Campos disponibles: {', '.join(available)}",
+        }, status=400)
+
+    etag, last_modified = _version(request, queryset)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return _with_version(response, etag, last_modified)
+
+    # Las columnas del orden se leen siempre porque forman el cursor
+    columns = list(dict.fromkeys([available[name][0] for name in fields] + list(order)))
+    page_size = get_page_size(request, settings.API_PAGE_SIZE, settings.API_MAX_PAGE_SIZE)
+    page = keyset_paginate(
+        queryset.values(*columns),
+        fields=order,
+        page_size=page_size,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        descending=descending,
+    )
+
+    results = []
+    for row in page:
+        item = {}
+        for name in fields:
+            column, convert = available[name]
+            item[name] = convert(row[column]) if convert else row[column]
+        results.append(item)
+
+    response = JsonResponse({
+        'results': results,
+        'next': _page_url(request, 'after', page.next_cursor) if page.has_next else None,
+        'previous': _page_url(request, 'before', page.previous_cursor) if page.has_previous else None,
+    })
+    return _with_version(response, etag, last_modified)
+
+
+@api_view
+def api_requests(request):
+    return _api_list(
+        request,
+        Request.objects.visible_to(request.current_user),
+        REQUEST_FIELDS,
+        order=('date', 'requestId'),
+        descending=True,
+    )
+
+
+@api_view
+def api_projects(request):
+    # Mismo permiso que list_projects
+    if request.current_user.roleId.name.lower() not in ['admin']:
+        return _forbidden()
+    return _api_list(request, Project.objects.all(), PROJECT_FIELDS, order=('projectId',))
+
+
+@api_view
+def api_users(request):
+    # Mismo permiso que list_users
+    if request.current_user.roleId.name.lower() not in ['admin']:
+        return _forbidden()
+    return _api_list(request, User.objects.all(), USER_FIELDS, order=('userId',))
+
+
+@api_view
+def api_hours(request):
+    '''
+    Horas por semana o mes (rollup.py); mismos parámetros y permisos que hours_analytics
+    '''
+    professor = report_scope(request.current_user)
+    if professor is False:
+        return _forbidden()
+    params = report_params(request.GET)
+    if isinstance(params, str):
+        return JsonResponse({'success': False, 'error': params}, status=400)
+
+    granularity, start, end, group = params
+    response = JsonResponse({
+        'granularity': granularity,
+        'start': start,
+        'end': end,
+        'group': group,
+        'refreshedAt': rollup.last_refresh(),
+        'results': rollup.report(granularity, start, end, group, professor=professor),
+    })
+    response['Cache-Control'] = 'private, no-cache'
+    return response
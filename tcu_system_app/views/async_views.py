@@ -0,0 +1,131 @@
+'''
+Versiones asíncronas de las vistas de solo lectura más usadas, con el ORM
+asíncrono de Django. urls.py las usa cuando ASYNC_VIEWS está activo
+(TCU_ASYNC_VIEWS=1, solo tiene sentido al servir con asgi.py). Los estados
+y la versión del catálogo salen del objeto que devuelve catalog.aload(),
+sin llamadas síncronas al catálogo desde el event loop.
+'''
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponseForbidden
+from django.shortcuts import aget_object_or_404, render
+
+from .. import catalog, dashboard_cache, ledger, search
+from ..middleware import aget_current_user
+from ..models import File, Project, Request
+from ..pagination import akeyset_paginate, get_page_size
+from .auth import login_required
+from .home import arequest_counters, dashboard_context, dashboard_data, dashboard_scope, recent_requests_for
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+@login_required
+async def home(request):
+    user, loaded_catalog = await asyncio.gather(aget_current_user(request), catalog.aload())
+    user_role = user.roleId.name.lower()
+
+    key = dashboard_cache.scope_key(user, user_role, loaded_catalog.version)
+    data = await dashboard_cache.aload(key)
+    if data is None:
+        scoped_requests, hours_filter = dashboard_scope(user, user_role)
+
+        if hours_filter is None:
+            hours = ledger.astudent_hours(user)
+        else:
+            hours = ledger.aproject_hours(**hours_filter)
+
+        # Contadores, horas y solicitudes recientes se piden a la vez
+        counters, hours, recent_requests = await asyncio.gather(
+            arequest_counters(scoped_requests, loaded_catalog),
+            hours,
+            _alist(recent_requests_for(scoped_requests)),
+        )
+        data = dashboard_data(counters, hours, recent_requests)
+        await dashboard_cache.astore(key, data)
+
+    return await sync_to_async(render)(request, 'tcu_system_app/dashboard.html', dashboard_context(user, data))
+
+
+@login_required
+async def list_requests(request):
+    user = await aget_current_user(request)
+
+    visible_requests = Request.objects.visible_to(user).select_related(
+        'userId_student', 'projectId', 'statusId'
+    )
+
+    # Búsqueda de texto: los resultados se ordenan por relevancia
+    query = request.GET.get('q', '').strip()
+    if query:
+        visible_requests = search.search_requests(visible_requests, query)
+    fields, descending = search.result_order(query, visible_requests)
+
+    page_size = get_page_size(
+        request, settings.REQUESTS_PAGE_SIZE, settings.REQUESTS_MAX_PAGE_SIZE
+    )
+    page = await akeyset_paginate(
+        visible_requests,
+        fields=fields,
+        page_size=page_size,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        descending=descending,
+    )
+
+    context = {
+        'all_requests': page.items,
+        'page': page,
+        'page_size': page_size,
+        'query': query,
+        'current_user': user,
+        'user_role': user.roleId.name,
+    }
+    return await sync_to_async(render)(request, 'tcu_system_app/requests/requests.html', context)
+
+
+@login_required
+async def request_detail(request, request_id):
+    user = await aget_current_user(request)
+
+    # Los archivos se filtran por el ID, sin esperar a la solicitud
+    request_obj, files = await asyncio.gather(
+        aget_object_or_404(
+            Request.objects.select_related('userId_student', 'projectId__userId_professor', 'statusId'),
+            pk=request_id,
+        ),
+        _alist(File.objects.filter(requestId_id=request_id)),
+    )
+
+    if not request_obj.is_visible_to(user):
+        return HttpResponseForbidden("No tienes permiso para ver esta solicitud")
+
+    context = {
+        'request': request_obj,
+        'files': files,
+        'user_role': user.roleId.name.lower(),
+        'is_owner': request_obj.userId_student == user,
+    }
+    return await sync_to_async(render)(request, 'tcu_system_app/requests/request_detail.html', context)
+
+
+@login_required
+async def list_projects(request):
+    user, loaded_catalog = await asyncio.gather(aget_current_user(request), catalog.aload())
+
+    # Verificar permisos
+    if user.roleId.name.lower() not in ['admin']:
+        return HttpResponseForbidden("No tienes permiso para acceder a esta página")
+
+    projects = await _alist(Project.objects.with_stats(loaded_catalog.status_id(catalog.PENDING)).order_by('name'))
+
+    context = {
+        'all_projects': projects,
+        'current_user': user,
+        'user_role': user.roleId.name,
+    }
+    return await sync_to_async(render)(request, 'tcu_system_app/projects/projects.html', context)
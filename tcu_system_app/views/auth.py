@@ -1,7 +1,10 @@
-from django.shortcuts import redirect
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.contrib.auth.hashers import check_password
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from ..hashers import PasswordPoolFull, acheck_password
+from ..middleware import aget_current_user
 from ..models import User
 
 
@@ -18,25 +21,43 @@ def logout(request):
     return redirect('login')
 
 
-def login(request):
+async def login(request):
+    '''
+    Vista asíncrona: la verificación PBKDF2 corre en un pool acotado para no
+    ocupar el worker, y si el pool está lleno se responde 503 de inmediato
+    '''
     if request.method == 'POST':
         email = request.POST.get('email')
         password = request.POST.get('password')
         
+        user = await User.objects.filter(email=email).afirst()
+        
         try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            messages.error(request, 'Correo o contraseña incorrectos.')
-            return render(request, 'tcu_system_app/login.html')
+            # Sin usuario se verifica igual contra un hash ficticio para no
+            # revelar por el tiempo de respuesta si el correo existe
+            is_correct, new_hash = await acheck_password(
+                password, user.password if user else UNUSABLE_PASSWORD_PREFIX
+            )
+        except PasswordPoolFull:
+            response = HttpResponse(
+                'Hay demasiados inicios de sesión en curso. Intente de nuevo en unos segundos.',
+                status=503,
+            )
+            response['Retry-After'] = '2'
+            return response
         
-        if check_password(password, user.password):
-            request.session['user_id'] = user.userId
+        if user is not None and is_correct:
+            if new_hash:
+                # Las iteraciones cambiaron: se guarda el hash recalculado
+                user.password = new_hash
+                await user.asave(update_fields=['password'])
+            await request.session.aset('user_id', user.userId)
             return redirect('home')
         else:
             messages.error(request, 'Correo o contraseña incorrectos.')
-            return render(request, 'tcu_system_app/login.html')
+            return await sync_to_async(render)(request, 'tcu_system_app/login.html')
         
-    return render(request, 'tcu_system_app/login.html')
+    return await sync_to_async(render)(request, 'tcu_system_app/login.html')
 
 
 
@@ -44,16 +65,25 @@ def is_authenticated(request):
     '''
     Función para verificar si el usuario está autenticado
     ''' 
-    return request.session.get('user_id') is not None
+    # current_user es None si no hay sesión o si el usuario fue eliminado
+    return bool(request.current_user)
 
 
 def login_required(view_func):
     '''
     Decorador para proteger vistas que requieren autorización
     ''' 
+    if iscoroutinefunction(view_func):
+        # En vistas asíncronas el usuario se resuelve con el ORM asíncrono
+        async def async_wrapper(request, *args, **kwargs):
+            if await aget_current_user(request) is None:
+                return redirect('login')
+            return await view_func(request, *args, **kwargs)
+        return async_wrapper
+
     def wrapper(request, *args, **kwargs):
         # si el usuario no está autenticado, lo redirige al login
         if not is_authenticated(request):
             return redirect('login')
         return view_func(request, *args, **kwargs)
-    return wrapper
\ No newline at end of file
+    return wrapper
@@ -0,0 +1,124 @@
+import csv
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponseBadRequest, HttpResponseForbidden, StreamingHttpResponse
+from django.utils import timezone
+
+from .. import catalog
+from ..models import Request
+from .auth import login_required
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # openpyxl es opcional, solo se usa para XLSX
+    Workbook = None
+
+
+EXPORT_HEADER = [
+    'ID', 'Estudiante', 'Email', 'Proyecto', 'Código', 'Estado',
+    'Horas', 'Fecha', 'Fecha de revisión', 'Descripción', 'Comentario del profesor',
+]
+
+# Inicios de celda que Excel y LibreOffice interpretan como fórmula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# Columnas leídas en la misma consulta; el estado sale del catálogo
+EXPORT_FIELDS = (
+    'requestId', 'userId_student__firstName', 'userId_student__lastName', 'userId_student__email',
+    'projectId__name', 'projectId__code', 'statusId', 'hoursRequested', 'date', 'revisionDate',
+    'description', 'professorComent',
+)
+
+
+class _Echo:
+    '''
+    Pseudo-archivo para que csv.writer devuelva cada línea en lugar de escribirla
+    '''
+    def write(self, value):
+        return value
+
+
+def _safe_cell(value):
+    '''
+    Texto escrito por los usuarios con un apóstrofo delante si la hoja de
+    cálculo lo tomaría como fórmula
+    '''
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _export_rows(queryset):
+    '''
+    Filas de la exportación, leídas del servidor en bloques
+    '''
+    status_names = {status.statusId: status.name for status in catalog.statuses()}
+    rows = queryset.order_by('-date', '-requestId').values_list(*EXPORT_FIELDS)
+    for (request_id, first_name, last_name, email, project_name, project_code, status_id,
+         hours, date, revision_date, description, comment) in rows.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield [_safe_cell(value) for value in [
+            request_id,
+            f"{first_name or ''} {last_name or ''}".strip(),
+            email or '',
+            project_name or '',
+            project_code or '',
+            status_names.get(status_id, ''),
+            hours,
+            date.isoformat() if date else '',
+            revision_date.isoformat() if revision_date else '',
+            description,
+            comment or '',
+        ]]
+
+
+def _stream_csv(queryset):
+    writer = csv.writer(_Echo())
+    # BOM para que Excel detecte UTF-8
+    yield '\ufeff' + writer.writerow(EXPORT_HEADER)
+    for row in _export_rows(queryset):
+        yield writer.writerow(row)
+
+
+def _xlsx_response(queryset, filename):
+    '''
+    El formato XLSX es un zip y no puede emitirse por partes: se escribe en
+    modo write-only a un archivo temporal y se envía desde disco
+    '''
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Solicitudes')
+    sheet.append(EXPORT_HEADER)
+    for row in _export_rows(queryset):
+        sheet.append(row)
+
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(
+        output,
+        as_attachment=True,
+        filename=f'{filename}.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    )
+
+
+@login_required
+def export_requests(request):
+    user = request.current_user
+    user_role = user.roleId.name.lower()
+
+    # Solo profesores y administradores
+    if user_role == 'estudiante':
+        return HttpResponseForbidden("No tienes permiso para exportar solicitudes")
+
+    queryset = Request.objects.visible_to(user)
+    filename = f"solicitudes_{timezone.now():%Y%m%d}"
+
+    if request.GET.get('format') == 'xlsx':
+        if Workbook is None:
+            return HttpResponseBadRequest("La exportación a XLSX requiere el paquete openpyxl")
+        return _xlsx_response(queryset, filename)
+
+    response = StreamingHttpResponse(_stream_csv(queryset), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
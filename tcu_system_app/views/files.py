@@ -0,0 +1,173 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseForbidden
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+from django.views.decorators.http import require_GET, require_safe
+
+from .. import previews
+from ..models import File
+from .auth import login_required
+
+
+def _visible_file(request, file_id):
+    '''
+    Archivo con su solicitud, o None si el usuario no puede ver la solicitud
+    '''
+    file_record = get_object_or_404(File.objects.select_related('requestId__projectId'), pk=file_id)
+    if not file_record.requestId.is_visible_to(request.current_user):
+        return None
+    return file_record
+
+
+@require_GET
+@login_required
+def file_preview(request, file_id, size):
+    if size not in settings.PREVIEW_SIZES:
+        raise Http404("Tamaño de vista previa no encontrado")
+
+    file_record = _visible_file(request, file_id)
+    if file_record is None:
+        return HttpResponseForbidden("No tienes permiso para ver este archivo")
+    if not file_record.has_preview:
+        raise Http404("El archivo no tiene vista previa")
+
+    path = previews.preview_path(file_record.contentHash, size)
+    if not os.path.exists(path):
+        raise Http404("El archivo no tiene vista previa")
+
+    response = FileResponse(open(path, 'rb'), content_type='image/jpeg')
+    # La URL lleva el hash (?v=), así que el contenido nunca cambia
+    response['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
+# Un solo rango "bytes=inicio-fin", "bytes=inicio-" o "bytes=-sufijo"
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def _parse_range(header, size):
+    '''
+    (inicio, fin) inclusivos del rango pedido; None si no hay rango o si
+    pide varios (se responde el archivo completo); ValueError si el rango
+    no se puede satisfacer
+    '''
+    match = _RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        # Los últimos `end` bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start > end:
+        raise ValueError(header)
+    return start, end
+
+
+def _range_applies(request, etag, last_modified):
+    '''
+    Con If-Range el rango solo vale si el archivo no cambió
+    '''
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    return last_modified is not None and parse_http_date_safe(if_range) == last_modified
+
+
+class _RangeFile:
+    '''
+    Lectura limitada a `length` bytes desde la posición actual del archivo
+    '''
+    def __init__(self, f, length):
+        self.file = f
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+@require_safe
+@login_required
+def download_file(request, file_id):
+    file_record = _visible_file(request, file_id)
+    if file_record is None:
+        return HttpResponseForbidden("No tienes permiso para ver este archivo")
+
+    field_file = file_record.filePath
+    storage, name = field_file.storage, field_file.name
+    if not storage.exists(name):
+        raise Http404("Archivo no encontrado")
+
+    size = storage.size(name)
+    try:
+        last_modified = int(storage.get_modified_time(name).timestamp())
+    except NotImplementedError:
+        last_modified = None
+    # El hash del contenido identifica la versión; sin él, fecha y tamaño
+    etag = quote_etag(file_record.contentHash or f'{last_modified or 0:x}-{size:x}')
+
+    # 304 con If-None-Match/If-Modified-Since y 412 con If-Match
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    filename = os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    disposition = 'inline' if request.GET.get('inline') else 'attachment'
+
+    if settings.DOWNLOAD_ACCEL_REDIRECT:
+        # El servidor web envía el archivo y atiende Range y las condiciones
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = settings.DOWNLOAD_ACCEL_REDIRECT + quote(name)
+    else:
+        byte_range = None
+        if 'Range' in request.headers and _range_applies(request, etag, last_modified):
+            try:
+                byte_range = _parse_range(request.headers['Range'], size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+
+        start, end = byte_range or (0, size - 1)
+        status = 200 if byte_range is None else 206
+        if request.method == 'HEAD':
+            response = HttpResponse(status=status, content_type=content_type)
+        elif byte_range is None:
+            # Con un archivo real, el servidor WSGI lo envía con sendfile (wsgi.file_wrapper)
+            response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+        else:
+            f = storage.open(name, 'rb')
+            f.seek(start)
+            response = FileResponse(_RangeFile(f, end - start + 1), status=206, content_type=content_type)
+        if byte_range is not None:
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = f"{disposition}; filename*=UTF-8''{quote(filename)}"
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -1,93 +1,112 @@
+from django.db.models import Count, Q
 from django.shortcuts import render, redirect
-from ..models import Request, User, Project
+from .. import catalog, dashboard_cache, ledger
+from ..models import Request
 from .auth import login_required
 
 
-@login_required
-def home(request):
-    user_id = request.session.get('user_id')
-    user = User.objects.get(pk=user_id)
-    user_role_name = user.roleId.name
-    user_role_lower = user_role_name.lower()
-
-    if user_role_lower == 'estudiante': 
-        # Para estudiantes solo sus propias solicitudes
-        approved_count = Request.objects.filter(
-            userId_student=user, 
-            statusId__name__icontains='Aceptada'
-        ).count()
-        
-        pending_count = Request.objects.filter(
-            userId_student=user, 
-            statusId__name__icontains='Pendiente'
-        ).count()
-        
-        rejected_count = Request.objects.filter(
-            userId_student=user, 
-            statusId__name__icontains='Rechazada'
-        ).count()
-        
-        recent_requests = Request.objects.filter(
-            userId_student=user
-        ).order_by('-date')[:10]
-        
-    elif user_role_lower == 'profesor':
-        # Para profesores solicitudes de proyectos donde son encargados
-        professor_projects = Project.objects.filter(userId_professor=user)
-        
-        if professor_projects.exists():
-            approved_count = Request.objects.filter(
-                projectId__in=professor_projects,
-                statusId__name__icontains='Aceptada'
-            ).count()
-            
-            pending_count = Request.objects.filter(
-                projectId__in=professor_projects,
-                statusId__name__icontains='Pendiente'
-            ).count()
-            
-            rejected_count = Request.objects.filter(
-                projectId__in=professor_projects,
-                statusId__name__icontains='Rechazada'
-            ).count()
-            
-            recent_requests = Request.objects.filter(
-                projectId__in=professor_projects
-            ).order_by('-date')[:10]
-        else:
-            # Si el profesor no tiene proyectos asignados
-            approved_count = 0
-            pending_count = 0
-            rejected_count = 0
-            recent_requests = Request.objects.none()
-            
-    else: 
-        # Para otros roles (como administrador) todas las solicitudes
-        approved_count = Request.objects.filter(
-            statusId__name__icontains='Aceptada'
-        ).count()
-        
-        pending_count = Request.objects.filter(
-            statusId__name__icontains='Pendiente'
-        ).count()
-        
-        rejected_count = Request.objects.filter(
-            statusId__name__icontains='Rechazada'
-        ).count()
-        
-        recent_requests = Request.objects.all().order_by('-date')[:10]
-    
-    total_count = approved_count + pending_count + rejected_count
-
-    context = {
-        'user_role': user_role_name,
-        'approved_count': approved_count,
-        'pending_count': pending_count,
-        'rejected_count': rejected_count,
-        'total_count': total_count,
-        'recent_requests': recent_requests,
+# Contador del dashboard de cada estado canónico
+COUNTER_STATUSES = {
+    'approved_count': catalog.ACCEPTED,
+    'pending_count': catalog.PENDING,
+    'rejected_count': catalog.REJECTED,
+}
+
+
+def _counter_aggregates(loaded_catalog):
+    '''
+    Contadores del dashboard como una sola consulta agregada, filtrando por
+    el ID del estado en lugar de hacer join con Status
+    '''
+    aggregates = {}
+    for key, name in COUNTER_STATUSES.items():
+        status_id = loaded_catalog.status_id(name)
+        # Sin la fila del estado, Q(statusId=None) contaría las solicitudes sin estado
+        if status_id is not None:
+            aggregates[key] = Count('pk', filter=Q(statusId=status_id))
+    return aggregates
+
+
+def _with_total(counters):
+    counters = {key: counters.get(key, 0) for key in COUNTER_STATUSES}
+    counters['total_count'] = sum(counters.values())
+    return counters
+
+
+def request_counters(queryset):
+    return _with_total(queryset.aggregate(**_counter_aggregates(catalog.current())))
+
+
+async def arequest_counters(queryset, loaded_catalog):
+    return _with_total(await queryset.aaggregate(**_counter_aggregates(loaded_catalog)))
+
+
+def dashboard_scope(user, user_role_lower):
+    '''
+    Solicitudes que muestra el dashboard y filtro de las filas de proyecto del
+    ledger (None: se usan las horas del propio estudiante)
+    '''
+    scoped_requests = Request.objects.visible_to(user)
+    if user_role_lower == 'estudiante':
+        return scoped_requests, None
+    if user_role_lower == 'profesor':
+        return scoped_requests, {'projectId__userId_professor': user}
+    return scoped_requests, {}
+
+
+# Campos que muestra dashboard.html. Las solicitudes recientes se guardan en
+# el cache, que puede ser compartido: sin contraseñas de los usuarios
+RECENT_REQUEST_FIELDS = (
+    'requestId', 'date', 'hoursRequested',
+    'userId_student__userId', 'userId_student__firstName', 'userId_student__lastName',
+    'projectId__projectId', 'projectId__name', 'projectId__userId_professor__userId',
+    'statusId__statusId', 'statusId__name',
+)
+
+
+def recent_requests_for(scoped_requests):
+    return scoped_requests.select_related(
+        'userId_student', 'projectId__userId_professor', 'statusId'
+    ).only(*RECENT_REQUEST_FIELDS).order_by('-date')[:10]
+
+
+def dashboard_data(counters, hours, recent_requests):
+    '''
+    Datos del dashboard que no dependen de la petición; se guardan en cache
+    '''
+    return {
+        **counters,
+        'approved_hours': hours.approvedHours,
+        'pending_hours': hours.pendingHours,
+        'recent_requests': list(recent_requests),
+    }
+
+
+def dashboard_context(user, data):
+    return {
+        'user_role': user.roleId.name,
+        **data,
         'current_user': user,
         'user_full_name': f"{user.firstName} {user.lastName}",
     }
-    
-    return render(request, 'tcu_system_app/dashboard.html', context)
\ No newline at end of file
+
+
+@login_required
+def home(request):
+    user = request.current_user
+    user_role = user.roleId.name.lower()
+
+    key = dashboard_cache.scope_key(user, user_role)
+    data = dashboard_cache.load(key)
+    if data is None:
+        scoped_requests, hours_filter = dashboard_scope(user, user_role)
+
+        if hours_filter is None:
+            hours = ledger.student_hours(user)
+        else:
+            hours = ledger.project_hours(**hours_filter)
+
+        data = dashboard_data(request_counters(scoped_requests), hours, recent_requests_for(scoped_requests))
+        dashboard_cache.store(key, data)
+
+    return render(request, 'tcu_system_app/dashboard.html', dashboard_context(user, data))
@@ -4,26 +4,26 @@ from django.contrib import messages
 from django.db import IntegrityError
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
-from ..models import Project, User, Role
+from .. import catalog
+from ..models import Project, User
 from .auth import login_required
-from ..models import Request
+
+
+# Roles que pueden ser encargados de un proyecto
+PROFESSOR_ROLES = ['Profesor', 'Professor', 'Coordinador', 'Coordinator']
 
 
 @login_required
 def list_projects(request):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return redirect('login')
-    
-    user = get_object_or_404(User, pk=user_id)
+    user = request.current_user
     user_role = user.roleId.name
     
     # Verificar permisos
     if user.roleId.name.lower() not in ['admin']:
         return HttpResponseForbidden("No tienes permiso para acceder a esta página")
     
-    # Obtener todos los proyectos
-    projects = Project.objects.all().order_by('name')
+    # Proyectos con su profesor y estadísticas en una sola consulta
+    projects = Project.objects.with_stats(catalog.status_id(catalog.PENDING)).order_by('name')
     
     context = {
         'all_projects': projects,
@@ -37,11 +37,7 @@ def list_projects(request):
 
 @login_required
 def create_project(request):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return redirect('login')
-    
-    current_user = get_object_or_404(User, pk=user_id)
+    current_user = request.current_user
     
     # solo admin
     if current_user.roleId.name.lower() not in ['admin']:
@@ -69,7 +65,7 @@ def create_project(request):
             if professor_id:
                 professor = get_object_or_404(User, pk=professor_id)
                 # Verificar que sea un profesor
-                if professor.roleId.name.lower() not in ['profesor', 'professor', 'coordinador', 'coordinator']:
+                if professor.roleId_id not in catalog.role_ids(*PROFESSOR_ROLES):
                     messages.error(request, "Solo se pueden asignar profesores a los proyectos")
                     return redirect('create_project')
             
@@ -99,7 +95,7 @@ def create_project(request):
     
     # GET request - obtener profesores disponibles
     professors = User.objects.filter(
-        roleId__name__in=['Profesor', 'Professor', 'Coordinador', 'Coordinator']
+        roleId__in=catalog.role_ids(*PROFESSOR_ROLES)
     ).order_by('lastName', 'firstName')
     
     return render(request, 'tcu_system_app/projects/create_project.html', {
@@ -110,11 +106,7 @@ def create_project(request):
 
 @login_required
 def edit_project(request, project_id):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return redirect('login')
-    
-    current_user = get_object_or_404(User, pk=user_id)
+    current_user = request.current_user
     
     # solo admin
     if current_user.roleId.name.lower() not in ['admin']:
@@ -154,7 +146,7 @@ def edit_project(request, project_id):
             if professor_id:
                 professor = get_object_or_404(User, pk=professor_id)
                 # Verificar que sea un profesor
-                if professor.roleId.name.lower() not in ['profesor', 'professor', 'coordinador', 'coordinator']:
+                if professor.roleId_id not in catalog.role_ids(*PROFESSOR_ROLES):
                     messages.error(request, "Solo se pueden asignar profesores a los proyectos")
                     return redirect('edit_project', project_id=project_id)
             
@@ -173,7 +165,7 @@ def edit_project(request, project_id):
     
     # GET request - obtener profesores disponibles
     professors = User.objects.filter(
-        roleId__name__in=['Profesor', 'Professor', 'Coordinador', 'Coordinator']
+        roleId__in=catalog.role_ids(*PROFESSOR_ROLES)
     ).order_by('lastName', 'firstName')
     
     return render(request, 'tcu_system_app/projects/edit_project.html', {
@@ -188,32 +180,26 @@ def edit_project(request, project_id):
 @login_required
 def delete_project(request, project_id):
     try:
-        user_id = request.session.get('user_id')
-        if not user_id:
-            return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-        
-        current_user = get_object_or_404(User, pk=user_id)
+        current_user = request.current_user
         
         # solo admin
         if current_user.roleId.name.lower() not in ['admin']:
             return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
         
-        project_to_delete = get_object_or_404(Project, pk=project_id)
+        # Estudiantes y solicitudes asociadas salen de la misma consulta
+        project_to_delete = get_object_or_404(
+            Project.objects.with_stats(catalog.status_id(catalog.PENDING)), pk=project_id
+        )
         
         # Verificar si el proyecto tiene estudiantes asignados
-        has_students = User.objects.filter(projectId=project_to_delete).exists()
-        
-        if has_students:
+        if project_to_delete.student_count:
             return JsonResponse({
                 'success': False, 
                 'error': 'No se puede eliminar el proyecto porque tiene estudiantes asignados'
             }, status=400)
         
         # Verificar si el proyecto tiene solicitudes asociadas
-        
-        has_requests = Request.objects.filter(projectId=project_to_delete).exists()
-        
-        if has_requests:
+        if project_to_delete.has_requests:
             return JsonResponse({
                 'success': False, 
                 'error': 'No se puede eliminar el proyecto porque tiene solicitudes asociadas'
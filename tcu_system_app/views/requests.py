@@ -1,19 +1,19 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404, redirect, render
-from django.http import HttpResponseForbidden
+from django.http import Http404, HttpResponseForbidden
 from django.utils import timezone
 from django.contrib import messages
+from django.db import transaction
 from datetime import datetime
-from ..models import Request, Status, User, Project, File
+from .. import catalog, dashboard_cache, ledger, search, uploads
+from ..models import File, Project, Request
+from ..pagination import get_page_size, keyset_paginate
 from .auth import login_required
 
 
 @login_required
 def create_request(request):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return redirect('login')
-    
-    user = get_object_or_404(User, pk=user_id)
+    user = request.current_user
     
     # Solo estudiantes pueden crear solicitudes
     if user.roleId.name.lower() != 'estudiante':
@@ -57,8 +57,10 @@ def create_request(request):
                 messages.error(request, "Formato de fecha inválido. Use YYYY-MM-DD")
                 return redirect('create_request')
             
-            # Obtener el status pendiente (ID 1)
-            pending_status = get_object_or_404(Status, pk=1)
+            # Obtener el status pendiente del catálogo
+            pending_status = catalog.status(catalog.status_id(catalog.PENDING))
+            if pending_status is None:
+                raise Http404("No existe el estado Pendiente")
             
             # Crear la solicitud
             new_request = Request(
@@ -71,22 +73,31 @@ def create_request(request):
                 professorComent='', 
                 revisionDate=None 
             )
-            new_request.save()
+            # La solicitud y su registro en el ledger (signals.update_ledger)
+            # van en la misma transacción
+            with transaction.atomic():
+                new_request.save()
             
-            # Manejar archivos subidos
+            # Archivos subidos por partes (views/uploads.py)
+            for name in uploads.attach(new_request, user, request.POST.getlist('uploads')):
+                messages.warning(request, f"El archivo {name} no terminó de subirse y no se adjuntó")
+
+            # Archivos enviados en el mismo formulario (navegadores sin JavaScript)
             files = request.FILES.getlist('files')
             for uploaded_file in files:
-                # Validar tamaño del archivo (máximo 10MB)
-                if uploaded_file.size > 10 * 1024 * 1024:
+                # Validar tamaño del archivo
+                if uploaded_file.size > settings.UPLOAD_MAX_SIZE:
                     messages.warning(request, f"El archivo {uploaded_file.name} excede el tamaño máximo de 10MB")
                     continue
-                
-                # Validar tipo de archivo
-                allowed_extensions = ['.pdf', '.doc', '.docx', '.jpg', '.jpeg', '.png', '.txt']
-                if not any(uploaded_file.name.lower().endswith(ext) for ext in allowed_extensions):
-                    messages.warning(request, f"El archivo {uploaded_file.name} tiene un tipo no permitido")
+
+                # Validar tipo de archivo por extensión y contenido
+                try:
+                    uploads.check_content(uploaded_file.name, uploaded_file.read(uploads.SNIFF_BYTES))
+                except uploads.UploadRejected as e:
+                    messages.warning(request, e.message)
                     continue
-                
+                uploaded_file.seek(0)
+
                 # Crear registro de archivo
                 file_record = File(
                     requestId=new_request,
@@ -118,33 +129,36 @@ def create_request(request):
 
 @login_required
 def list_requests(request):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return redirect('login')
+    user = request.current_user
 
-    user = User.objects.get(pk=user_id)
-    user_role = user.roleId.name.lower()
+    # Todas las FK que usa la tabla se traen en la misma consulta
+    visible_requests = Request.objects.visible_to(user).select_related(
+        'userId_student', 'projectId', 'statusId'
+    )
 
-    if user_role == 'estudiante':
-        all_requests = Request.objects.filter(
-            userId_student=user
-        ).order_by('-date')
-        
-    elif user_role == 'profesor':
-        professor_projects = Project.objects.filter(userId_professor=user)
-        
-        if professor_projects.exists():
-            all_requests = Request.objects.filter(
-                projectId__in=professor_projects
-            ).order_by('-date')
-        else:
-            all_requests = Request.objects.none()
-            
-    else:
-        all_requests = Request.objects.all().order_by('-date')
+    # Búsqueda de texto: los resultados se ordenan por relevancia
+    query = request.GET.get('q', '').strip()
+    if query:
+        visible_requests = search.search_requests(visible_requests, query)
+    fields, descending = search.result_order(query, visible_requests)
+
+    page_size = get_page_size(
+        request, settings.REQUESTS_PAGE_SIZE, settings.REQUESTS_MAX_PAGE_SIZE
+    )
+    page = keyset_paginate(
+        visible_requests,
+        fields=fields,
+        page_size=page_size,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        descending=descending,
+    )
 
     context = {
-        'all_requests': all_requests,
+        'all_requests': page.items,
+        'page': page,
+        'page_size': page_size,
+        'query': query,
         'current_user': user,
         'user_role': user.roleId.name,
     }
@@ -155,31 +169,40 @@ def list_requests(request):
 
 @login_required
 def review_request(request, request_id):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return redirect('login')
-    
-    user = get_object_or_404(User, pk=user_id)
+    user = request.current_user
     if user.roleId.name.lower() == 'estudiante':
         return redirect('home')
     
-    request_obj = get_object_or_404(Request, pk=request_id)
+    request_obj = get_object_or_404(
+        Request.objects.select_related('userId_student', 'projectId__userId_professor', 'statusId'),
+        pk=request_id,
+    )
+    # El profesor solo revisa las solicitudes de sus proyectos
+    if not request_obj.is_visible_to(user):
+        return HttpResponseForbidden("No tienes permiso para revisar esta solicitud")
     files = File.objects.filter(requestId=request_obj)
-    statuses = Status.objects.all()
+    statuses = catalog.statuses()
     
     if request.method == 'POST':
         new_status_id = request.POST.get('status')
         comment = request.POST.get('professorComment', '')
         
         if new_status_id:
-            new_status = get_object_or_404(Status, pk=new_status_id)
+            new_status = catalog.status(new_status_id)
+            if new_status is None:
+                raise Http404("Estado no encontrado")
             request_obj.statusId = new_status
         
         if comment:
             request_obj.professorComent = comment
         
         request_obj.revisionDate = timezone.now().date()
-        request_obj.save()
+        with transaction.atomic():
+            # Los valores anteriores se leen con la fila bloqueada: si otra
+            # revisión la cambió después de cargarla, signals.update_ledger
+            # mueve las horas desde el estado correcto
+            request_obj._ledger_values = ledger.stored_values(request_obj.pk, lock=True)
+            request_obj.save()
         
         return redirect('home')
     
@@ -193,17 +216,97 @@ def review_request(request, request_id):
     return render(request, 'tcu_system_app/requests/review_request.html', context)
 
 
+def _bulk_review_ids(request):
+    '''
+    IDs marcados en el formulario de revisión masiva, o None si alguno no es válido
+    '''
+    try:
+        return {int(request_id) for request_id in request.POST.getlist('requests')}
+    except ValueError:
+        return None
+
+
+@login_required
+def bulk_review(request):
+    user = request.current_user
+    user_role = user.roleId.name.lower()
+    if user_role == 'estudiante':
+        return redirect('home')
+
+    # El profesor solo puede revisar las solicitudes de sus proyectos
+    scoped_requests = Request.objects.visible_to(user)
+
+    if request.method == 'POST':
+        request_ids = _bulk_review_ids(request)
+        new_status = catalog.status(request.POST.get('status'))
+        comment = request.POST.get('professorComment', '').strip()
+
+        if new_status is None:
+            messages.error(request, "Seleccione el nuevo estado")
+        elif not request_ids:
+            messages.error(request, "Seleccione al menos una solicitud")
+        elif len(request_ids) > settings.BULK_REVIEW_MAX_REQUESTS:
+            messages.error(request, f"Se pueden revisar como máximo {settings.BULK_REVIEW_MAX_REQUESTS} solicitudes a la vez")
+        else:
+            with transaction.atomic():
+                # Una sola consulta verifica la pertenencia de todas y lee lo
+                # que el ledger necesita
+                rows = list(
+                    scoped_requests.select_for_update(of=('self',))
+                    .filter(requestId__in=request_ids)
+                    .values('requestId', 'userId_student_id', 'projectId_id', 'statusId_id', 'hoursRequested')
+                )
+                if len(rows) != len(request_ids):
+                    return HttpResponseForbidden("Algunas solicitudes no existen o no pertenecen a tus proyectos")
+
+                changes = {
+                    'statusId': new_status,
+                    'revisionDate': timezone.now().date(),
+                    # update() no pasa por save(): la versión de la fila se marca aquí
+                    'updatedAt': timezone.now(),
+                }
+                if comment:
+                    changes['professorComent'] = comment
+                Request.objects.filter(requestId__in=request_ids).update(**changes)
+                ledger.record_bulk_status_change(rows, new_status.statusId)
+
+                # Tampoco hay señales: se invalidan los dashboards afectados
+                project_ids = {row['projectId_id'] for row in rows} - {None}
+                dashboard_cache.invalidate(
+                    student_ids={row['userId_student_id'] for row in rows},
+                    professor_ids=set(
+                        Project.objects.filter(pk__in=project_ids).values_list('userId_professor_id', flat=True)
+                    ),
+                )
+
+            messages.success(request, f"{len(rows)} solicitudes marcadas como {new_status.name}")
+        return redirect('bulk_review')
+
+    # Pendientes, de la más antigua a la más reciente
+    pending_requests = scoped_requests.filter(
+        statusId=catalog.status_id(catalog.PENDING)
+    ).select_related('userId_student', 'projectId').order_by('date', 'requestId')[:settings.BULK_REVIEW_MAX_REQUESTS]
+
+    context = {
+        'pending_requests': pending_requests,
+        'statuses': catalog.statuses(),
+        'max_requests': settings.BULK_REVIEW_MAX_REQUESTS,
+        'user_role': user.roleId.name,
+    }
+
+    return render(request, 'tcu_system_app/requests/bulk_review.html', context)
+
+
 @login_required
 def request_detail(request, request_id):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return redirect('login')
-    
-    user = get_object_or_404(User, pk=user_id)
-    request_obj = get_object_or_404(Request, pk=request_id)
+    user = request.current_user
+    request_obj = get_object_or_404(
+        Request.objects.select_related('userId_student', 'projectId__userId_professor', 'statusId'),
+        pk=request_id,
+    )
     files = File.objects.filter(requestId=request_obj)
     
-    if user.roleId.name.lower() == 'estudiante' and request_obj.userId_student != user:
+    if not request_obj.is_visible_to(user):
         return HttpResponseForbidden("No tienes permiso para ver esta solicitud")
     
     context = {
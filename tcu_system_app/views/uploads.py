@@ -0,0 +1,88 @@
+'''
+Subida de adjuntos por partes. El navegador crea la subida, envía el archivo
+en partes de UPLOAD_CHUNK_SIZE con X-Upload-Offset y, si la conexión se
+corta, consulta el offset recibido y continúa desde ahí. Cada parte es una
+petición corta, así que una conexión lenta no ocupa un worker durante toda
+la subida. Al crear la solicitud se adjuntan las subidas completas.
+'''
+from django.conf import settings
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET, require_POST
+
+from .. import uploads
+from ..models import UploadSession
+from .auth import login_required
+
+
+def _upload_json(session, status=200):
+    return JsonResponse({
+        'success': True,
+        'uploadId': str(session.uploadId),
+        'fileName': session.fileName,
+        'offset': session.receivedBytes,
+        'size': session.totalSize,
+        'complete': session.is_complete,
+        'chunkSize': settings.UPLOAD_CHUNK_SIZE,
+    }, status=status)
+
+
+def _own_session(request, upload_id):
+    return get_object_or_404(UploadSession, pk=upload_id, userId_student=request.current_user)
+
+
+@require_POST
+@login_required
+def start_upload(request):
+    user = request.current_user
+
+    # Solo estudiantes pueden adjuntar archivos
+    if user.roleId.name.lower() != 'estudiante':
+        return JsonResponse({'success': False, 'error': 'No autorizado'}, status=403)
+
+    try:
+        size = int(request.POST.get('size', ''))
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Tamaño inválido'}, status=400)
+
+    try:
+        session = uploads.start(user, request.POST.get('name'), size)
+    except uploads.UploadRejected as e:
+        return JsonResponse({'success': False, 'error': e.message}, status=e.status)
+
+    return _upload_json(session, status=201)
+
+
+@require_GET
+@login_required
+def upload_status(request, upload_id):
+    return _upload_json(_own_session(request, upload_id))
+
+
+@require_POST
+@login_required
+def upload_chunk(request, upload_id):
+    session = _own_session(request, upload_id)
+
+    if 'CONTENT_LENGTH' not in request.META:
+        return JsonResponse({'success': False, 'error': 'Falta Content-Length'}, status=411)
+    try:
+        offset = int(request.headers.get('X-Upload-Offset', ''))
+        length = int(request.META['CONTENT_LENGTH'])
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Offset o tamaño inválido'}, status=400)
+
+    try:
+        # El cuerpo se lee directo del socket, sin pasar por request.body
+        uploads.append_chunk(session, request, offset, length)
+    except uploads.UploadRejected as e:
+        if e.status == 415:
+            # Contenido que no corresponde a la extensión: no tiene sentido reanudar
+            uploads.discard(session)
+        return JsonResponse({
+            'success': False,
+            'error': e.message,
+            'offset': session.receivedBytes,
+        }, status=e.status)
+
+    return _upload_json(session)
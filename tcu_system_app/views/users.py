@@ -1,45 +1,110 @@
-from django.http import HttpResponseForbidden, JsonResponse
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import Http404, HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.contrib import messages
 from django.db import IntegrityError
+from django.db.models import OuterRef, Q, Subquery
 from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 import re
-from ..models import User, Role, Project
+from .. import catalog
+from ..models import User, Project, HoursLedger, search_key
+from ..pagination import get_page_size, keyset_paginate
 from .auth import login_required  
 
+# Orden del directorio; coincide con los índices user_*_name_idx
+USER_ORDER = ('lastNameKey', 'firstNameKey', 'userId')
+
+
+def _prefix(field, term):
+    '''
+    Prefijo como rango [term, term + U+FFFF) sobre una columna de
+    search_key(): a diferencia de LIKE, recorre el índice
+    '''
+    return Q(**{f'{field}__gte': term, f'{field}__lt': term + '\uffff'})
+
+
+def user_directory(query='', role_id=None, project_id=None):
+    '''
+    Usuarios filtrados por rol, por proyecto (0: sin proyecto) y por prefijo
+    del nombre, el apellido o el email; cada palabra debe coincidir con
+    alguno. Para paginar por USER_ORDER.
+    '''
+    # Horas aprobadas de cada estudiante leídas del ledger (una fila por estudiante)
+    approved_hours = HoursLedger.objects.filter(
+        userId_student=OuterRef('pk')
+    ).values('approvedHours')[:1]
+    users = User.objects.select_related('roleId', 'projectId').annotate(
+        approved_hours=Subquery(approved_hours),
+    )
+
+    if role_id is not None:
+        users = users.filter(roleId=role_id)
+    if project_id == 0:
+        users = users.filter(projectId__isnull=True)
+    elif project_id is not None:
+        users = users.filter(projectId=project_id)
+
+    for term in search_key(query).split():
+        users = users.filter(_prefix('lastNameKey', term) | _prefix('firstNameKey', term) | _prefix('emailKey', term))
+    return users
+
+
+def _int_param(request, name):
+    try:
+        return int(request.GET[name])
+    except (KeyError, ValueError):
+        return None
+
+
 @login_required
 def list_users(request):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return redirect('login')
-    
-    user = get_object_or_404(User, pk=user_id)
+    user = request.current_user
     user_role = user.roleId.name
     
     # solo admin
     if user.roleId.name.lower() not in ['admin']:
         return HttpResponseForbidden("No tienes permiso para acceder a esta página")
-    
-    # Obtener todos los usuarios
-    users = User.objects.all().order_by('lastName', 'firstName')
+
+    query = request.GET.get('q', '').strip()
+    role = catalog.role(request.GET.get('role'))
+    project_id = _int_param(request, 'project')
+
+    page_size = get_page_size(request, settings.USERS_PAGE_SIZE, settings.USERS_MAX_PAGE_SIZE)
+    page = keyset_paginate(
+        user_directory(query, role.roleId if role else None, project_id),
+        fields=USER_ORDER,
+        page_size=page_size,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+        descending=False,
+    )
+
+    # Filtros que conservan los enlaces de paginación
+    filters = {'q': query, 'role': role.roleId if role else '', 'project': '' if project_id is None else project_id}
+    filters = urlencode({'page_size': page_size, **{key: value for key, value in filters.items() if value != ''}})
 
     return render(request, 'tcu_system_app/users/users.html', {
-        'users': users, 
+        'users': page.items,
+        'page': page,
+        'page_size': page_size,
+        'query': query,
+        'role_filter': role,
+        'project_filter': project_id,
+        'filters': filters,
         'current_user': user, 
         'user_role': user_role,
-        'roles': Role.objects.all(),
-        'projects': Project.objects.all()
+        'roles': catalog.roles(),
+        # Solo lo que usa el selector de proyectos, sin instanciar modelos
+        'projects': Project.objects.values('projectId', 'name').order_by('name'),
     })
 
 
 @login_required
 def create_user(request):
-    user_id = request.session.get('user_id')
-    if not user_id:
-        return redirect('login')
-    
-    current_user = get_object_or_404(User, pk=user_id)
+    current_user = request.current_user
     
     # solo admin
     if current_user.roleId.name.lower() not in ['admin']:
@@ -76,7 +141,9 @@ def create_user(request):
                 return redirect('create_user')
             
             # Obtener rol
-            role = get_object_or_404(Role, pk=role_id)
+            role = catalog.role(role_id)
+            if role is None:
+                raise Http404("Rol no encontrado")
             
             # Si es estudiante, validar proyecto
             project = None
@@ -108,7 +175,7 @@ def create_user(request):
             return redirect('create_user')
     
     # GET request
-    roles = Role.objects.all()
+    roles = catalog.roles()
     projects = Project.objects.all()
     
     return render(request, 'tcu_system_app/users/create_user.html', {
@@ -120,11 +187,7 @@ def create_user(request):
 
 @login_required
 def edit_user(request, user_id):
-    current_user_id = request.session.get('user_id')
-    if not current_user_id:
-        return redirect('login')
-    
-    current_user = get_object_or_404(User, pk=current_user_id)
+    current_user = request.current_user
     
     # solo admin
     if current_user.roleId.name.lower() not in ['admin']:
@@ -164,7 +227,9 @@ def edit_user(request, user_id):
                 return redirect('edit_user', user_id=user_id)
             
             # Obtener rol
-            role = get_object_or_404(Role, pk=role_id)
+            role = catalog.role(role_id)
+            if role is None:
+                raise Http404("Rol no encontrado")
             
             # Manejar proyecto según el rol
             project = None
@@ -204,7 +269,7 @@ def edit_user(request, user_id):
             return redirect('edit_user', user_id=user_id)
     
     # GET request
-    roles = Role.objects.all()
+    roles = catalog.roles()
     projects = Project.objects.all()
     
     return render(request, 'tcu_system_app/users/edit_user.html', {
@@ -220,11 +285,7 @@ def edit_user(request, user_id):
 @login_required
 def delete_user(request, user_id):
     try:
-        current_user_id = request.session.get('user_id')
-        if not current_user_id:
-            return JsonResponse({'success': False, 'error': 'No autenticado'}, status=401)
-        
-        current_user = get_object_or_404(User, pk=current_user_id)
+        current_user = request.current_user
         
         # solo admin
         if current_user.roleId.name.lower() not in ['admin']:
@@ -240,7 +301,7 @@ def delete_user(request, user_id):
             }, status=400)
         
         # No permitir eliminar al propio usuario
-        if int(user_id) == int(current_user_id):
+        if int(user_id) == current_user.userId:
             return JsonResponse({
                 'success': False, 
                 'error': 'No puedes eliminar tu propia cuenta'